@@ -0,0 +1,28 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+性能基准。
+
+    python -m benchmarks                      运行事件总线基准套件并与 benchmarks/baseline.json 比较
+    python -m benchmarks --save-baseline      运行后把结果保存为新的基准线
+    python benchmarks/bench_dispatch.py       单独的微基准脚本也可以直接运行
+"""
+import sys
+from pathlib import Path
+
+# 基准以仓库根目录为工作目录运行，被测代码位于 src 下
+_SRC = str(Path(__file__).resolve().parent.parent / "src")
+if _SRC not in sys.path:
+    sys.path.insert(0, _SRC)
@@ -0,0 +1,142 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+运行 EventBus 基准套件，把结果写成 JSON，并与保存的基准线比较。
+
+基准线与机器和 Python 版本绑定，不提交到仓库（benchmarks/baseline.json 已被 git 忽略）：
+先在同一台机器上用 --save-baseline 记录一次（例如在改动前的提交上），之后的运行与它比较；
+在 CI 中则在同一个任务里先对目标分支记录基准线，再对改动后的代码运行。
+基准线的 Python 版本或平台与本次运行不同时会给出警告。
+
+退出状态：0 表示没有回退（或没有基准线、只保存了基准线），
+有指标比基准线差超过 --tolerance 时为 1，可以直接作为 CI 的检查步骤。
+
+用法：python -m benchmarks [--duration 0.5] [--only publish,filters]
+                           [--output benchmarks/latest.json] [--baseline benchmarks/baseline.json]
+                           [--save-baseline] [--tolerance 0.25]
+"""
+import sys
+import json
+import asyncio
+import logging
+import platform
+import argparse
+from pathlib import Path
+from datetime import datetime
+from typing import Any, Dict, List
+
+from utils.logger import set_log_level
+from benchmarks.event_bus_suite import EventBusSuite
+
+_HERE = Path(__file__).resolve().parent
+DEFAULT_OUTPUT = _HERE / "latest.json"
+DEFAULT_BASELINE = _HERE / "baseline.json"
+
+
+def _quiet_logging() -> None:
+    # 基准运行期间只输出警告以上的日志，避免日志输出本身成为被测开销
+    set_log_level(logging.WARNING)
+    for handler in logging.getLogger().handlers:
+        handler.setLevel(logging.WARNING)
+
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+            tolerance: float) -> List[Dict[str, Any]]:
+    """
+    与基准线逐项比较，返回每项的变化；change 为正表示变好，
+    regression 为 True 表示比基准线差超过 tolerance
+    """
+    previous = {item['name']: item for item in baseline}
+    rows = []
+    for item in results:
+        base = previous.get(item['name'])
+        if base is None or not base['value']:
+            continue
+        if item['higher_is_better']:
+            change = item['value'] / base['value'] - 1
+        else:
+            change = base['value'] / item['value'] - 1 if item['value'] else 0.0
+        rows.append({
+            'name': item['name'],
+            'baseline': base['value'],
+            'value': item['value'],
+            'unit': item['unit'],
+            'change': change,
+            'regression': change < -tolerance,
+        })
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="EventBus 基准套件")
+    parser.add_argument("--duration", type=float, default=0.5,
+                        help="吞吐量用例每轮的测量时长（秒），每个用例测量三轮取最好的一轮")
+    parser.add_argument("--only", default="",
+                        help="只运行指定的用例组，逗号分隔：publish,request_latency,filters,threadsafe")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="结果 JSON 的保存路径")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="用于比较的基准线 JSON")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果保存为基准线")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="允许比基准线差的比例，超过时视为性能回退")
+    args = parser.parse_args()
+
+    _quiet_logging()
+    only = {name.strip() for name in args.only.split(",") if name.strip()}
+    suite = EventBusSuite(duration=args.duration)
+    results = asyncio.run(suite.run(lambda name: not only or name in only))
+    suite.bus.shutdown()
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'duration': args.duration,
+        'results': results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+
+    print(f"{'指标':<32}{'结果':>16}  单位")
+    for item in results:
+        print(f"{item['name']:<32}{item['value']:>16.1f}  {item['unit']}")
+    print(f"结果已写入 {args.output}")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"已保存为基准线 {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"没有找到基准线 {args.baseline}，跳过比较")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text(encoding='utf-8'))
+    rows = compare(results, baseline['results'], args.tolerance)
+    print(f"\n与基准线比较（{baseline.get('created')}，Python {baseline.get('python')}）：")
+    if (baseline.get('python'), baseline.get('platform')) != (report['python'], report['platform']):
+        print(f"警告：基准线记录于 Python {baseline.get('python')} / {baseline.get('platform')}，"
+              f"本次为 Python {report['python']} / {report['platform']}，比较结果可能不可靠")
+    for row in rows:
+        flag = "  <-- 回退" if row['regression'] else ""
+        print(f"{row['name']:<32}{row['baseline']:>14.1f} -> {row['value']:<14.1f}{row['change']:>+8.1%}{flag}")
+    regressions = [row for row in rows if row['regression']]
+    if regressions:
+        print(f"{len(regressions)} 项指标比基准线差超过 {args.tolerance:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+EventBus.publish 的单次开销微基准：订阅者本身什么都不做，测得的耗时全部是总线的分发开销。
+
+日志级别设为 INFO（生产环境的常见设置）。分发路径上的调试日志使用 % 格式化参数，
+级别不够时在 log.debug 入口处直接返回，不会拼接字符串；没有启用优先级通道，订阅者处理后不记录通道延迟。
+
+用法：python benchmarks/bench_dispatch.py [--number 20000]
+"""
+import sys
+import time
+import asyncio
+import logging
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from core.event_bus import EventBus, Event  # noqa: E402
+from utils.logger import set_log_level  # noqa: E402
+
+
+async def _async_noop(event):
+    return None
+
+
+def _sync_noop(event):
+    return None
+
+
+def _setup(bus: EventBus) -> dict:
+    """注册各个场景的订阅者，返回 场景名 -> 事件名"""
+    cases = {}
+
+    cases["无订阅者"] = "bench.none"
+
+    cases["1 个异步订阅者"] = "bench.async1"
+    bus.subscribe("bench.async1", _async_noop)
+
+    cases["4 个异步订阅者"] = "bench.async4"
+    for _ in range(4):
+        bus.subscribe("bench.async4", _async_noop)
+
+    cases["4 个内联同步订阅者"] = "bench.sync4"
+    for _ in range(4):
+        bus.subscribe("bench.sync4", _sync_noop, inline=True)
+
+    cases["4 个带过滤器的订阅者"] = "bench.filter4"
+    for index in range(4):
+        bus.subscribe("bench.filter4", _async_noop, filter_func=lambda event, i=index: i % 2 == 0)
+
+    cases["通配订阅 + 精确订阅"] = "bench.wild.topic"
+    bus.subscribe("bench.wild.*", _async_noop)
+    bus.subscribe("bench.wild.topic", _async_noop)
+    return cases
+
+
+async def _measure(bus: EventBus, event_name: str, number: int) -> float:
+    """返回单次 publish 的平均耗时（微秒），取 5 轮中最好的一轮"""
+    best = None
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(number):
+            await bus.publish(Event(name=event_name, data=None, source="bench"))
+        elapsed = (time.perf_counter() - started) / number
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1e6
+
+
+async def run(number: int) -> dict:
+    set_log_level(logging.INFO)
+    for handler in logging.getLogger().handlers:
+        handler.setLevel(logging.INFO)
+
+    bus = EventBus()
+    bus.bind_loop()
+    cases = _setup(bus)
+    # 预热：让缓存、指标对象等都已经建立
+    for event_name in cases.values():
+        await _measure(bus, event_name, 100)
+
+    results = {}
+    for label, event_name in cases.items():
+        results[label] = await _measure(bus, event_name, number)
+    bus.shutdown()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EventBus.publish 单次开销")
+    parser.add_argument("--number", type=int, default=20_000, help="每轮发布的事件数量")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.number))
+    print(f"{'场景':<20}{'耗时(µs/次)':>14}")
+    for label, micros in results.items():
+        print(f"{label:<20}{micros:>14.2f}")
+
+
+if __name__ == '__main__':
+    main()
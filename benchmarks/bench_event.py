@@ -0,0 +1,114 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Event 对象的微基准：对比原先基于 @dataclass + datetime.now() 的实现与当前的 __slots__ 实现，
+输出每个事件的构造耗时和内存占用。
+
+当前的 Event 只为常用字段预留 slots，不再创建 datetime；响应通道、来源进程和链路追踪字段放在
+按需创建的附属对象中。没有启用追踪或结构化日志时分发不会给事件增加任何内容，
+启用后事件在分发时会被分配 trace_id 和 span_id，"traced" 一行是这种情况下分发后的内存占用。
+
+用法：python benchmarks/bench_event.py [--number 200000]
+"""
+import sys
+import gc
+import timeit
+import argparse
+import tracemalloc
+from pathlib import Path
+from datetime import datetime
+from dataclasses import dataclass
+from typing import Any, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from core.event_bus import Event  # noqa: E402
+from core.tracing import assign_span  # noqa: E402
+
+
+@dataclass
+class LegacyEvent:
+    """改动前的 Event 实现，仅用于对比"""
+    name: str
+    data: Any
+    source: str
+    timestamp: datetime = None  # type: ignore
+    need_response: bool = False
+    response_channel: Optional[str] = None
+
+    def __post_init__(self):
+        if self.timestamp is None:
+            self.timestamp = datetime.now()
+
+
+def measure_construction(event_class, number: int) -> float:
+    """返回构造单个事件的平均耗时（纳秒）"""
+    timer = timeit.Timer(lambda: event_class(name="dummy01.message", data=None, source="bench"))
+    best = min(timer.repeat(repeat=5, number=number))
+    return best / number * 1e9
+
+
+def traced_event(name: str, data: Any, source: str) -> Event:
+    """与启用追踪时分发的事件一样分配了追踪 id 的事件"""
+    event = Event(name=name, data=data, source=source)
+    assign_span(event)
+    return event
+
+
+def measure_memory(event_class, number: int) -> float:
+    """返回每个存活事件占用的平均内存（字节），包括 timestamp、追踪 id 等附属对象"""
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    events = [event_class(name="dummy01.message", data=None, source="bench") for _ in range(number)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # 减去列表本身的开销
+    per_event = (after - before - sys.getsizeof(events)) / number
+    del events
+    return per_event
+
+
+def run(number: int) -> dict:
+    results = {}
+    for label, event_class in (("legacy", LegacyEvent), ("slots", Event)):
+        results[label] = {
+            "construct_ns": measure_construction(event_class, number),
+            "bytes_per_event": measure_memory(event_class, number),
+        }
+    results["traced"] = {
+        "construct_ns": measure_construction(traced_event, number),
+        "bytes_per_event": measure_memory(traced_event, number),
+    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Event 构造耗时与内存占用对比")
+    parser.add_argument("--number", type=int, default=200_000, help="每轮创建的事件数量")
+    args = parser.parse_args()
+
+    results = run(args.number)
+    legacy, slots = results["legacy"], results["slots"]
+
+    print(f"{'实现':<10}{'构造耗时(ns/个)':>18}{'内存(字节/个)':>16}")
+    for label, values in results.items():
+        print(f"{label:<10}{values['construct_ns']:>18.1f}{values['bytes_per_event']:>16.1f}")
+    print(f"构造耗时降低 {1 - slots['construct_ns'] / legacy['construct_ns']:.1%}，"
+          f"内存占用降低 {1 - slots['bytes_per_event'] / legacy['bytes_per_event']:.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+EventBus 基准套件。每个用例返回一个或多个指标：
+
+    {"name": "publish.async.10", "value": 12345.6, "unit": "events/s", "higher_is_better": true}
+
+订阅者本身不做任何工作，测得的是事件总线自身的开销。
+"""
+import time
+import asyncio
+import threading
+from typing import Any, Callable, Dict, List
+
+from core.event_bus import EventBus, Event
+
+SUBSCRIBER_COUNTS = (1, 10, 100)
+
+
+def _metric(name: str, value: float, unit: str, higher_is_better: bool, **extra: Any) -> Dict[str, Any]:
+    return {'name': name, 'value': value, 'unit': unit, 'higher_is_better': higher_is_better, **extra}
+
+
+async def _async_noop(event):
+    return None
+
+
+def _sync_noop(event):
+    return None
+
+
+async def _async_reply(event):
+    return event.data
+
+
+async def _rate(publish_once: Callable, duration: float, rounds: int = 3) -> float:
+    """反复调用 publish_once，每轮 duration 秒，返回最好一轮的每秒完成次数"""
+    # 预热，建立分发计划、指标对象等
+    for _ in range(10):
+        await publish_once()
+    best = 0.0
+    for _ in range(rounds):
+        count = 0
+        batch = 1
+        started = time.perf_counter()
+        while True:
+            for _ in range(batch):
+                await publish_once()
+            count += batch
+            elapsed = time.perf_counter() - started
+            if elapsed >= duration:
+                break
+            # 批量逐步增大，减少读时钟的次数
+            batch = min(batch * 2, 1024)
+        best = max(best, count / elapsed)
+    return best
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+class EventBusSuite:
+    def __init__(self, duration: float = 0.5):
+        """
+        :param duration: 吞吐量用例每轮的测量时长（秒），每个用例测量三轮取最好的一轮
+        """
+        self.duration = duration
+        self.bus = EventBus()
+
+    async def _publish_throughput(self, kind: str, count: int) -> Dict[str, Any]:
+        topic = f"bench.publish.{kind}.{count}"
+        callback = _async_noop if kind == "async" else _sync_noop
+        for _ in range(count):
+            # 同步订阅者按默认方式在线程池中执行
+            self.bus.subscribe(topic, callback)
+        try:
+            rate = await _rate(lambda: self.bus.publish(Event(name=topic, data=None, source="bench")),
+                               self.duration)
+        finally:
+            self.bus.unsubscribe(topic, callback)
+        return _metric(f"publish.{kind}.{count}", rate, "events/s", True)
+
+    async def bench_publish(self) -> List[Dict[str, Any]]:
+        """publish 吞吐量：1/10/100 个同步或异步订阅者"""
+        results = []
+        for kind in ("async", "sync"):
+            for count in SUBSCRIBER_COUNTS:
+                results.append(await self._publish_throughput(kind, count))
+        return results
+
+    async def bench_request_latency(self, requests: int = 2000) -> List[Dict[str, Any]]:
+        """request() 往返延迟的分位数：一个异步订阅者直接返回请求数据"""
+        topic = "bench.request"
+        self.bus.subscribe(topic, _async_reply)
+        latencies = []
+        try:
+            for _ in range(50):
+                await self.bus.request(topic, 1, "bench")
+            for index in range(requests):
+                started = time.perf_counter()
+                await self.bus.request(topic, index, "bench")
+                latencies.append((time.perf_counter() - started) * 1e6)
+        finally:
+            self.bus.unsubscribe(topic, _async_reply)
+        latencies.sort()
+        return [
+            _metric(f"request.{label}", _percentile(latencies, fraction), "us", False)
+            for label, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99))
+        ]
+
+    async def bench_filters(self, count: int = 100) -> List[Dict[str, Any]]:
+        """大量带过滤器的订阅：100 个订阅者，每个事件只有其中约 10% 通过过滤器"""
+        topic = "bench.filter"
+        callbacks = []
+        for index in range(count):
+            async def callback(event, index=index):
+                return None
+            callbacks.append(callback)
+            self.bus.subscribe(topic, callback, filter_func=lambda event, i=index: event.data == i % 10)
+        sequence = iter(range(1 << 62))
+        try:
+            rate = await _rate(
+                lambda: self.bus.publish(Event(name=topic, data=next(sequence) % 10, source="bench")),
+                self.duration
+            )
+        finally:
+            for callback in callbacks:
+                self.bus.unsubscribe(topic, callback)
+        return [_metric(f"publish.filtered.{count}", rate, "events/s", True)]
+
+    async def bench_threadsafe(self, threads: int = 4) -> List[Dict[str, Any]]:
+        """从多个线程调用 publish_threadsafe().result() 的总吞吐量"""
+        topic = "bench.threadsafe"
+        self.bus.subscribe(topic, _async_noop)
+        stop = threading.Event()
+        counts = [0] * threads
+
+        def worker(index: int) -> None:
+            event_count = 0
+            while not stop.is_set():
+                self.bus.publish_threadsafe(Event(name=topic, data=None, source="bench")).result()
+                event_count += 1
+            counts[index] = event_count
+
+        workers = [threading.Thread(target=worker, args=(index,), daemon=True) for index in range(threads)]
+        try:
+            started = time.perf_counter()
+            for thread in workers:
+                thread.start()
+            await asyncio.sleep(self.duration)
+            stop.set()
+            # 工作线程等待的 Future 需要事件循环继续运行才能完成
+            while any(thread.is_alive() for thread in workers):
+                await asyncio.sleep(0.01)
+            elapsed = time.perf_counter() - started
+        finally:
+            self.bus.unsubscribe(topic, _async_noop)
+        return [_metric(f"publish_threadsafe.{threads}threads", sum(counts) / elapsed, "events/s", True)]
+
+    async def run(self, selected: Callable[[str], bool] = lambda name: True) -> List[Dict[str, Any]]:
+        self.bus.bind_loop()
+        results = []
+        for name in ("publish", "request_latency", "filters", "threadsafe"):
+            if selected(name):
+                results.extend(await getattr(self, f"bench_{name}")())
+        return results
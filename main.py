@@ -15,12 +15,15 @@
 import asyncio
 from quart import Request
 
-from utils.logger import log
-from core.api_server import APIServer
+from utils.logger import get_logger, configure_log_flood_control, enable_json_logs, shutdown_logging
+from core.api_server import APIServer, metrics_handler
 from core.config_manager import ConfigManager
 from core.event_bus import EventBus
+from core.tracing import enable_log_context
 from core.module_manager import ModuleManager
 
+log = get_logger(__name__)
+
 
 def root_page_handler(request: Request):
 
@@ -96,11 +99,36 @@ async def main():
 
     api_server = APIServer(port=port)
     config_manager = ConfigManager()
+    # 设置 {"logging": {"json_dir": "logs/json"}} 同时写一份 JSON lines 格式的结构化日志（带事件名和 trace），
+    # 单个文件超过 json_max_mb 或日期变化时切换到新文件，旧文件在后台压缩为 .gz
+    json_dir = config_manager.get("logging", "json_dir")
+    if json_dir:
+        enable_json_logs(json_dir, int(config_manager.get("logging", "json_max_mb", 64) * 1024 * 1024))
+        enable_log_context()
+    # logging.flood_control 对刷屏的日志去重、按 logger 限流或采样（格式见 utils.logger.LogFloodFilter），运行中修改配置立即生效
+    config_manager.register("logging", "flood_control", {}, configure_log_flood_control)
+    configure_log_flood_control(config_manager.get("logging", "flood_control"))
     event_bus = EventBus()
+    event_bus.bind_loop()
+    # 在 config.json 中设置 {"event_bus": {"trace_file": "logs/trace.json"}} 即可记录事件链路
+    trace_file = config_manager.get("event_bus", "trace_file")
+    if trace_file:
+        event_bus.enable_tracing(trace_file)
+    # 设置 {"event_bus": {"journal_dir": "logs/journal"}} 即可记录所有事件，之后可用 replay_journal() 重放
+    journal_dir = config_manager.get("event_bus", "journal_dir")
+    if journal_dir:
+        event_bus.enable_journal(journal_dir)
+    # 设置 {"event_bus": {"state_topics": ["viewer.count"]}} 把事件声明为状态，订阅者只关心最新值
+    for event_name in config_manager.get("event_bus", "state_topics", []):
+        event_bus.declare_state(event_name)
+    # event_bus.rate_limits 按事件名和来源限制发布频率（格式见 core.rate_limiter），运行中修改配置立即生效
+    config_manager.register("event_bus", "rate_limits", {}, event_bus.configure_rate_limits)
+    event_bus.configure_rate_limits(config_manager.get("event_bus", "rate_limits"))
     module_manager = ModuleManager(config_manager, api_server, event_bus)
 
     await api_server.start()
-    await api_server.add_route("/", methods=["GET"], handler=root_page_handler)
+    await api_server.add_route("/", methods=["GET"], handler=root_page_handler, inline=True)
+    await api_server.add_route("/metrics", methods=["GET"], handler=metrics_handler(event_bus, api_server))
     module_manager.discover_modules()
 
     init_success = await module_manager.initialize_all_enabled()
@@ -135,6 +163,8 @@ async def main():
             await asyncio.wait_for(api_server.stop(), timeout=5.0)
         except Exception:
             pass
+        event_bus.disable_tracing()
+        event_bus.disable_journal()
         log.info("服务已停止")
 
 
@@ -142,4 +172,7 @@ if __name__ == '__main__':
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
-        pass
\ No newline at end of file
+        pass
+    finally:
+        # 写完后台日志队列中剩余的日志
+        shutdown_logging()
\ No newline at end of file
@@ -12,53 +12,86 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import time
+import types
 import asyncio
-from typing import List, Callable, Dict, Any
+import inspect
+import functools
+import contextvars
+from typing import List, Callable, Dict, Any, Awaitable, Mapping
 
-from quart import Quart, request, jsonify, Response
+from quart import Quart, Request, request, jsonify, Response
 from hypercorn.config import Config
 from hypercorn.asyncio import serve
 
-from utils.logger import log
+from utils.logger import get_logger
+from core.route_table import RouteTable, route_params
+from core.executor_pool import ExecutorPool
+from core.event_metrics import RouteMetrics, render_prometheus
+
+log = get_logger(__name__)
+
+# 通用 dispatcher 接受的 HTTP 方法，每条路由实际允许的方法由 add_route 的 methods 决定
+DISPATCH_METHODS = ["GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
 
 
 class APIServer:
-    def __init__(self, port: int, host: str = "127.0.0.1"):
+    def __init__(self, port: int, host: str = "127.0.0.1", handler_workers: int = 16):
+        """
+        :param handler_workers: 运行同步处理函数的线程数量上限
+        """
         self.port = port
         self.host = host
         self.app = Quart(__name__)
-        self.routes: Dict[str, Dict[str, Any]] = {}
+        # 当前的路由表。增删路由时整体替换为新的路由表，dispatcher 读取时不需要加锁
+        self.route_table = RouteTable({})
+        # 只用于串行化路由的增删
         self.routes_lock = asyncio.Lock()
         self.server_task: asyncio.Task | None = None
+        # 同步处理函数默认在这个线程池中运行，阻塞的处理函数不会卡住事件循环。
+        # 在 start() 或第一次需要时创建，stop() 时关闭，之后可以再次 start()
+        self.handler_workers = handler_workers
+        self.executor: ExecutorPool | None = None
+        # 路由路径（带参数的路由为模式本身） -> 指标，路由移除后保留，以免计数倒退
+        self.route_metrics: Dict[str, RouteMetrics] = {}
 
         # 设置一个通用的dispatcher
-        @self.app.route('/', defaults={'path': ''}, methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
-        @self.app.route('/<path:path>', methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
+        @self.app.route('/', defaults={'path': ''}, methods=DISPATCH_METHODS, provide_automatic_options=False)
+        @self.app.route('/<path:path>', methods=DISPATCH_METHODS, provide_automatic_options=False)
         async def dispatcher(path: str):
             full_path = '/' + path if path else '/'
 
-            async with self.routes_lock:
-                route_info = self.routes.get(full_path)
-
-            if route_info:
-                handler = route_info['handler']
+            matched = self.route_table.match(full_path)
+            if matched:
+                route_info, params = matched
+                if request.method not in route_info['methods']:
+                    allow = ", ".join(sorted(route_info['methods'] | {'OPTIONS'}))
+                    if request.method == 'OPTIONS':
+                        return Response(status=204, headers={'Allow': allow})
+                    return jsonify({"error": "method not allowed", "path": full_path,
+                                    "method": request.method}), 405, {'Allow': allow}
+
+                metrics = route_info['metrics']
+                started = time.perf_counter()
                 try:
-                    # 检测并支持异步/同步回调
-                    if asyncio.iscoroutinefunction(handler):
-                        result = await handler(request)
-                    else:
-                        result = handler(request)
+                    result = await route_info['call'](request, params)
 
                     # 处理不同类型的返回值
-                    if isinstance(result, str):
+                    if isinstance(result, Response):
+                        # 处理函数自行构造的响应（如自定义 Content-Type）原样返回
+                        return result
+                    elif isinstance(result, str):
                         return Response(result, mimetype='text/html')
                     elif isinstance(result, tuple):
                         return jsonify(result[0]), result[1]
                     else:
                         return jsonify(result)
                 except Exception as e:
+                    metrics.errors += 1
                     log.error(f"Error handling request {full_path}: {e}")
                     return jsonify({"error": str(e)}), 500
+                finally:
+                    metrics.latency.observe(time.perf_counter() - started)
 
             return jsonify({"error": "not found", "path": full_path}), 404
 
@@ -67,6 +100,7 @@ class APIServer:
         if self.server_task and not self.server_task.done():
             return True
 
+        self._handler_executor()
         config = Config()
         config.bind = [f"{self.host}:{self.port}"]
 
@@ -88,19 +122,74 @@ class APIServer:
                 pass
             self.server_task = None
             log.info("API服务器已停止")
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
 
-    async def add_route(self, path: str, methods: List[str], handler: Callable) -> Dict[str, Any]:
+    def _handler_executor(self) -> ExecutorPool:
+        """运行同步处理函数的线程池，不存在（尚未启动或已经停止）时创建"""
+        if self.executor is None:
+            self.executor = ExecutorPool("handlers", self.handler_workers, prefix="APIServer")
+        return self.executor
+
+    def _adapt(self, handler: Callable, inline: bool) -> Callable[[Any, Dict[str, str]], Awaitable[Any]]:
+        """
+        在添加路由时判断一次处理函数的类型，返回统一的 async (request, params) 调用方式。
+        同步处理函数除非 inline，否则连同当前上下文（Quart 的请求上下文等）一起交给线程池运行；
+        同步函数返回的可等待对象在事件循环中等待
         """
-        添加动态路由
+        if inspect.iscoroutinefunction(handler):
+            async def call(request, params):
+                return await handler(request, **params)
+        elif inline:
+            async def call(request, params):
+                result = handler(request, **params)
+                return await result if inspect.isawaitable(result) else result
+        else:
+            async def call(request, params):
+                context = contextvars.copy_context()
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self._handler_executor(), functools.partial(context.run, handler, request, **params))
+                return await result if inspect.isawaitable(result) else result
+        return call
+
+    @property
+    def routes(self) -> Mapping[str, Dict[str, Any]]:
+        """路径 -> 路由信息的只读视图，增删路由请使用 add_route / remove_route"""
+        return types.MappingProxyType(self.route_table.routes)
+
+    async def add_route(self, path: str, methods: List[str], handler: Callable,
+                        inline: bool = False) -> Dict[str, Any]:
+        """
+        添加动态路由。路径中可以包含 "{name}" 形式的路径参数，参数值以关键字参数传给 handler：
+
+            await api_server.add_route("/agent/{module}/session/{id}", ["GET"], handler)
+            async def handler(request, module, id): ...
+
+        请求的方法不在 methods 中时返回 405（允许 GET 时也允许 HEAD）。
+        路径不合法或与已有路由冲突（如 "/a/{x}" 与 "/a/{y}"）时抛出 ValueError
+
+        :param inline: 同步处理函数默认在线程池中运行；很快且不会阻塞的处理函数可设为 True，直接在事件循环中调用
         """
         if methods is None:
             methods = ['GET']
-
+        allowed = {method.upper() for method in methods}
+        if 'GET' in allowed:
+            allowed.add('HEAD')
+
+        metrics = self.route_metrics.get(path)
+        if metrics is None:
+            metrics = self.route_metrics[path] = RouteMetrics()
+        route = {
+            'path': path,
+            'handler': handler,
+            'call': self._adapt(handler, inline),
+            'methods': frozenset(allowed),
+            'params': route_params(path),
+            'metrics': metrics,
+        }
         async with self.routes_lock:
-            self.routes[path] = {
-                'handler': handler,
-                'methods': methods
-            }
+            self.route_table = self.route_table.with_route(path, route)
 
         log.debug(f"添加路由: {path}, 方法: {methods}")
         return {'status': 'ok', 'action': 'added', 'path': path}
@@ -110,7 +199,9 @@ class APIServer:
         移除动态路由
         """
         async with self.routes_lock:
-            removed = self.routes.pop(path, None) is not None
+            removed = path in self.route_table.routes
+            if removed:
+                self.route_table = self.route_table.without_route(path)
 
         log.debug(f"移除路由: {path}, 存在: {removed}")
         return {
@@ -118,4 +209,33 @@ class APIServer:
             'action': 'removed',
             'path': path,
             'existed': removed
-        }
\ No newline at end of file
+        }
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """各路由的处理耗时（秒）与异常计数，以及运行同步处理函数的线程池状态"""
+        return {
+            'routes': {path: metrics.snapshot() for path, metrics in self.route_metrics.items()},
+            'executor': self._handler_executor().stats(),
+        }
+
+
+def metrics_handler(event_bus, api_server: APIServer = None) -> Callable[[Request], Any]:
+    """
+    创建 /metrics 路由的处理函数：默认返回 Prometheus 文本格式，
+    带 ?format=json 或 Accept: application/json 时返回 JSON。
+    传入 api_server 时同时包含各 HTTP 路由的处理耗时
+    """
+    async def handler(request: Request):
+        wants_json = (request.args.get('format') == 'json'
+                      or 'application/json' in request.headers.get('Accept', ''))
+        # 两种格式各自计算发布速率，Prometheus 抓取不会重置 JSON 视图的速率基准
+        snapshot = event_bus.get_metrics(reader='json' if wants_json else 'prometheus')
+        if api_server is not None:
+            snapshot['http'] = api_server.get_metrics()
+        if wants_json:
+            return snapshot
+        return Response(render_prometheus(event_bus.metrics, snapshot,
+                                          api_server.route_metrics if api_server is not None else None),
+                        content_type='text/plain; version=0.0.4; charset=utf-8')
+
+    return handler
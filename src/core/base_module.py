@@ -14,13 +14,19 @@
 # limitations under the License.
 import asyncio
 from abc import ABC, abstractmethod
-from typing import Optional, Callable, Any, List
+from concurrent.futures import Future
+from typing import Optional, Callable, Any, Hashable, List, Union
 
-from utils.logger import log
+from utils.logger import get_logger
 from core.api_server import APIServer
-from core.event_bus import EventBus, Event
+from core.event_bus import EventBus, Event, RequestMode
+from core.event_stream import EventStream
+from core.event_queue import OverflowPolicy
+from core.priority_lanes import EventPriority, to_priority
 from core.config_manager import ConfigManager
 
+log = get_logger(__name__)
+
 
 class BaseModule(ABC):
     """
@@ -77,15 +83,17 @@ class BaseModule(ABC):
     async def add_route(self, path: str,
                         module_category: str = None,
                         methods: list = None,
-                        handler: Callable = None) -> None:
+                        handler: Callable = None,
+                        inline: bool = False) -> None:
         """
         为当前模块异步注册一个API路由，路径会自动添加模块名前缀。
-        handler 可以是异步函数或同步函数。
+        handler 可以是异步函数或同步函数，同步函数默认在线程池中运行。
 
         :param path: 路由路径，不需要包含模块名前缀，需要以"/"开头
         :param module_category: 路由分类，可选，会被添加在模块名前缀前面
         :param methods: HTTP方法列表，如 ['GET', 'POST']
         :param handler: 处理函数（支持 async def 或普通 def）
+        :param inline: 同步处理函数很快且不会阻塞时可设为 True，直接在事件循环中调用而不经过线程池
         """
         if methods is None:
             methods = ['GET']
@@ -96,39 +104,131 @@ class BaseModule(ABC):
         else:
             full_path = f"/{self.name}{path}"
 
-        await self.api_server.add_route(full_path, methods, handler)
+        await self.api_server.add_route(full_path, methods, handler, inline)
         self._routes.append(full_path)
         log.debug(f"已注册路由 {full_path}，方法: {methods}")
 
     async def subscribe(self, event_name: str,
                         callback: Callable,
-                        filter_func: Optional[Callable[[Event], bool]] = None) -> None:
+                        filter_func: Optional[Callable[[Event], bool]] = None,
+                        timeout: Optional[float] = None,
+                        queue_size: Optional[int] = None,
+                        overflow: Union[OverflowPolicy, str] = OverflowPolicy.BLOCK,
+                        coalesce_key: Optional[Callable[[Event], Hashable]] = None,
+                        inline: Optional[bool] = None) -> None:
         """
         异步订阅一个事件。callback 可以是异步函数。
 
         :param event_name: 事件名称
         :param callback: 事件发生时调用的回调函数（支持 async），接受 Event 对象
         :param filter_func: 事件过滤函数，返回 True 则处理该事件
+        :param timeout: 处理单个事件的时限（秒），可选
+        :param queue_size: 为该订阅分配的专属队列容量，可选。处理较慢的模块（如LLM、TTS）建议设置
+        :param overflow: 队列已满时的策略："block" / "drop_oldest" / "drop_newest" / "coalesce"
+        :param coalesce_key: "coalesce" 策略下的合并键函数
+        :param inline: 同步回调很快且不会阻塞时可设为 True，直接在事件循环中调用而不经过线程池；
+                       回调中调用了 publish_threadsafe().result() 等阻塞等待事件循环的方法时绝不能设为 True
         """
-        self.event_bus.subscribe(event_name, callback, filter_func)
+        self.event_bus.subscribe(event_name, callback, filter_func, timeout,
+                                 queue_size, overflow, coalesce_key,
+                                 executor=self.name, inline=inline)
         self._event_handlers.append((event_name, callback))
         log.debug(f"模块 {self.name} 已订阅事件 {event_name}")
 
-    async def publish(self, event_name: str, data: Any = None) -> None:
+    async def subscribe_batch(self, event_name: str,
+                              callback: Callable,
+                              max_items: int,
+                              max_delay: float,
+                              filter_func: Optional[Callable[[Event], bool]] = None) -> None:
+        """
+        以批次的方式订阅一个事件，callback 每次收到一个 List[Event]。
+        适合对弹幕等高频事件做打分、过滤或批量送入模型。
+
+        :param event_name: 事件名称
+        :param callback: 批次就绪时调用的回调函数（支持 async），接受 List[Event]
+        :param max_items: 每批最多包含的事件数量
+        :param max_delay: 批次中第一个事件最多等待的时间（秒）
+        :param filter_func: 事件过滤函数，返回 True 则该事件进入批次
+        """
+        self.event_bus.subscribe_batch(event_name, callback, max_items, max_delay, filter_func,
+                                       executor=self.name)
+        self._event_handlers.append((event_name, callback))
+        log.debug(f"模块 {self.name} 已批量订阅事件 {event_name}")
+
+    def get_state(self, event_name: str, default: Any = None) -> Any:
+        """
+        读取状态事件（见 EventBus.declare_state）的当前值，还没有发布过时返回 default
+        """
+        return self.event_bus.get_state(event_name, default)
+
+    def set_executor(self, max_workers: int) -> None:
+        """
+        为本模块的同步事件回调设置专属线程池，避免与其他模块争抢默认线程池
+        """
+        self.event_bus.set_module_executor(self.name, max_workers)
+
+    async def publish(self, event_name: str, data: Any = None,
+                      priority: Union[EventPriority, str, None] = None) -> None:
         """
         发布一个事件
+
+        :param priority: 事件的优先级（"interactive" / "normal" / "background"），
+                         不指定时使用事件总线中为该事件设置的默认优先级
         """
-        event = Event(name=event_name, data=data, source=self.name)
+        event = Event(name=event_name, data=data, source=self.name,
+                      priority=None if priority is None else to_priority(priority))
         await self.event_bus.publish(event)
-        log.debug(f"Module {self.name} published event: {event_name}, data: {data}")
+        log.debug("Module %s published event: %s, data: %s", self.name, event_name, data)
 
     async def request(self, event_name: str, data: Any,
-                      timeout: float = 5.0) -> Any:
+                      timeout: float = 5.0,
+                      mode: Union[RequestMode, str] = RequestMode.ORDERED,
+                      quorum: int = 1) -> Any:
         """
         请求-响应模式
+
+        :param mode: "ordered"（默认，所有订阅者运行完后按订阅顺序的第一个非空结果）/
+                     "first"（最快的结果，取消其余订阅者）/ "all"（全部结果）/ "quorum"（quorum 个结果）
+        :param quorum: "quorum" 模式下需要的结果数量
+        """
+        log.debug("Module %s requested an event session, data: %s", self.name, data)
+        return await self.event_bus.request(event_name, data, self.name, timeout, mode, quorum)
+
+    def request_stream(self, event_name: str, data: Any,
+                       buffer_size: int = 16,
+                       timeout: Optional[float] = 10.0) -> EventStream:
+        """
+        流式请求，返回异步迭代器，逐个产出订阅者（异步生成器）生成的分片：
+
+            async with self.request_stream("llm.generate", prompt) as stream:
+                async for token in stream:
+                    ...
+
+        :param buffer_size: 最多缓存的分片数量
+        :param timeout: 等待下一个分片的最长时间（秒）
+        """
+        log.debug("Module %s requested an event stream, data: %s", self.name, data)
+        return self.event_bus.request_stream(event_name, data, self.name, buffer_size, timeout)
+
+    def publish_threadsafe(self, event_name: str, data: Any = None,
+                           priority: Union[EventPriority, str, None] = None) -> Future:
+        """
+        在模块自己的线程中发布一个事件，事件在主事件循环中处理。
+        返回 concurrent.futures.Future，需要等待发布完成时调用 .result()
+        """
+        event = Event(name=event_name, data=data, source=self.name,
+                      priority=None if priority is None else to_priority(priority))
+        return self.event_bus.publish_threadsafe(event)
+
+    def request_threadsafe(self, event_name: str, data: Any,
+                           timeout: float = 5.0,
+                           mode: Union[RequestMode, str] = RequestMode.ORDERED,
+                           quorum: int = 1) -> Future:
+        """
+        在模块自己的线程中发起请求，请求在主事件循环中处理。
+        返回 concurrent.futures.Future，调用 .result() 获取响应
         """
-        log.debug(f"Module {self.name} requested an event session, data: {data}")
-        return await self.event_bus.request(event_name, data, self.name, timeout)
+        return self.event_bus.request_threadsafe(event_name, data, self.name, timeout, mode, quorum)
 
     @abstractmethod
     async def initialize(self) -> None:
@@ -0,0 +1,258 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+音频、图像帧等大块二进制数据的零拷贝载荷。
+
+BufferPool 预先分配一整块内存（arena）并切分成固定大小的块，BufferPayload 占用其中一块，
+订阅者通过只读的 memoryview（payload.view）读取，不产生拷贝。载荷带引用计数，
+计数归零时块回到池中，稳定运行时音频链路几乎不再分配内存。
+
+用法：
+    pool = BufferPool(block_size=16384, blocks=64)
+    with pool.acquire(len(chunk)) as payload:
+        payload.writable()[:] = chunk
+        payload.meta = {"sample_rate": 24000}
+        await self.publish("tts.audio", payload)
+
+Event.data 本身是 BufferPayload 时，事件总线会为每个收到事件的订阅者持有一个引用，
+订阅者处理完成（包括排队、批量、被丢弃的情况）后自动释放，因此发布者在 publish 返回后即可释放自己的引用。
+订阅者需要在回调结束后继续使用数据时，调用 retain() 并在用完后 release()。
+"""
+import weakref
+import threading
+from collections import deque
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Dict, Optional
+
+# 不属于任何池的载荷共用的锁
+_standalone_lock = threading.Lock()
+# 当前存活的全部缓冲池，用于汇总指标
+_pools: 'weakref.WeakSet[BufferPool]' = weakref.WeakSet()
+
+
+class BufferPayload:
+    """
+    引用计数的二进制载荷。创建者持有第一个引用，release() 使计数归零后底层内存被回收，
+    之后再访问 view 会抛出 ValueError
+    """
+    __slots__ = ('meta', '_memory', '_length', '_refs', '_lock', '_on_free', '_view', '__weakref__')
+
+    def __init__(self, memory: memoryview, length: int,
+                 on_free: Optional[Callable[['BufferPayload'], None]] = None,
+                 lock: Optional[threading.Lock] = None,
+                 meta: Optional[Dict[str, Any]] = None):
+        """
+        :param memory: 可写的底层内存，长度不小于 length
+        :param on_free: 引用计数归零时调用，用于把内存还给池
+        """
+        # 随数据一起传递的小型元数据，如采样率、帧序号
+        self.meta = meta
+        self._memory: Optional[memoryview] = memory
+        self._length = length
+        self._refs = 1
+        self._lock = lock or _standalone_lock
+        self._on_free = on_free
+        self._view: Optional[memoryview] = None
+
+    @classmethod
+    def from_bytes(cls, data, meta: Optional[Dict[str, Any]] = None) -> 'BufferPayload':
+        """复制一段数据创建不属于任何池的载荷"""
+        buffer = bytearray(data)
+        return cls(memoryview(buffer), len(buffer), meta=meta)
+
+    @property
+    def view(self) -> memoryview:
+        """数据的只读视图"""
+        view = self._view
+        if view is None:
+            memory = self._memory
+            if memory is None:
+                raise ValueError("BufferPayload 已经被释放")
+            view = self._view = memory[:self._length].toreadonly()
+        return view
+
+    def writable(self) -> memoryview:
+        """数据的可写视图，只应由创建者在发布之前使用"""
+        memory = self._memory
+        if memory is None:
+            raise ValueError("BufferPayload 已经被释放")
+        return memory[:self._length]
+
+    @property
+    def nbytes(self) -> int:
+        return self._length
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def refcount(self) -> int:
+        return self._refs
+
+    @property
+    def released(self) -> bool:
+        return self._memory is None
+
+    def tobytes(self) -> bytes:
+        return self.view.tobytes()
+
+    def retain(self, count: int = 1) -> 'BufferPayload':
+        """增加引用计数，返回自身"""
+        with self._lock:
+            if self._memory is None:
+                raise ValueError("BufferPayload 已经被释放")
+            self._refs += count
+        return self
+
+    def release(self, count: int = 1) -> None:
+        """减少引用计数，归零时回收底层内存"""
+        with self._lock:
+            if self._memory is None:
+                return
+            self._refs -= count
+            if self._refs > 0:
+                return
+            memory, self._memory = self._memory, None
+            view, self._view = self._view, None
+        if view is not None:
+            # 让仍然持有这个视图的代码在访问时报错，而不是读到已经被复用的数据
+            try:
+                view.release()
+            except BufferError:
+                pass
+        if self._on_free is not None:
+            self._on_free(memory)
+
+    def __enter__(self) -> 'BufferPayload':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.release()
+
+    def __reduce__(self):
+        # 序列化（写入事件日志、小载荷跨进程）时复制数据，接收方得到不属于任何池的载荷
+        return _payload_from_bytes, (self.tobytes(), self.meta)
+
+    def __repr__(self) -> str:
+        state = "released" if self._memory is None else f"refs={self._refs}"
+        return f"BufferPayload({self._length} bytes, {state})"
+
+
+def _payload_from_bytes(data: bytes, meta: Optional[Dict[str, Any]]) -> BufferPayload:
+    return BufferPayload.from_bytes(data, meta)
+
+
+def payload_from_shared_memory(shm: SharedMemory, length: int,
+                               meta: Optional[Dict[str, Any]] = None) -> BufferPayload:
+    """
+    直接以共享内存为底层内存创建载荷（不复制），引用计数归零时关闭并删除共享内存
+    """
+    def free(memory: memoryview) -> None:
+        memory.release()
+        try:
+            shm.close()
+        except BufferError:
+            # 还有代码持有从视图切出的子视图，映射留给垃圾回收
+            pass
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    return BufferPayload(shm.buf[:length], length, on_free=free, meta=meta)
+
+
+def release_payloads(data: Any) -> None:
+    """释放 data 中（包括 dict/list/tuple 中一层或多层嵌套的）全部 BufferPayload 的一个引用"""
+    kind = type(data)
+    if kind is BufferPayload:
+        data.release()
+    elif kind is dict:
+        for value in data.values():
+            release_payloads(value)
+    elif kind is list or kind is tuple:
+        for value in data:
+            release_payloads(value)
+
+
+class BufferPool:
+    """
+    固定块大小的缓冲池。一次性分配 block_size * blocks 字节的 arena，
+    acquire() 从空闲块中取出一块；请求的大小超过块大小或池已耗尽时退化为单独分配（计入 fallback）。
+    可以在任意线程中 acquire/release
+    """
+    def __init__(self, block_size: int = 64 * 1024, blocks: int = 64, name: str = "default"):
+        if block_size <= 0 or blocks <= 0:
+            raise ValueError("block_size 和 blocks 必须大于 0")
+
+        self.name = name
+        self.block_size = block_size
+        self.blocks = blocks
+        self._arena = bytearray(block_size * blocks)
+        arena_view = memoryview(self._arena)
+        self._free: deque = deque(arena_view[i * block_size:(i + 1) * block_size] for i in range(blocks))
+        self._lock = threading.Lock()
+
+        self.acquired = 0
+        self.fallback = 0
+        self.in_use = 0
+        self.max_in_use = 0
+        _pools.add(self)
+
+    def acquire(self, size: int, meta: Optional[Dict[str, Any]] = None) -> BufferPayload:
+        """取得一个 size 字节的载荷，调用方持有它的第一个引用"""
+        with self._lock:
+            self.acquired += 1
+            if size <= self.block_size and self._free:
+                block = self._free.popleft()
+                self.in_use += 1
+                if self.in_use > self.max_in_use:
+                    self.max_in_use = self.in_use
+            else:
+                block = None
+                self.fallback += 1
+        if block is None:
+            return BufferPayload(memoryview(bytearray(size)), size, meta=meta)
+        return BufferPayload(block, size, on_free=self._give_back, lock=self._lock, meta=meta)
+
+    def wrap(self, data, meta: Optional[Dict[str, Any]] = None) -> BufferPayload:
+        """取得一个载荷并把 data 复制进去"""
+        size = data.nbytes if isinstance(data, memoryview) else len(data)
+        payload = self.acquire(size, meta)
+        payload.writable()[:] = data
+        return payload
+
+    def _give_back(self, block: memoryview) -> None:
+        # 在 release() 中调用，此时已经不持有锁
+        with self._lock:
+            self._free.append(block)
+            self.in_use -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'block_size': self.block_size,
+                'blocks': self.blocks,
+                'free': len(self._free),
+                'in_use': self.in_use,
+                'max_in_use': self.max_in_use,
+                'acquired': self.acquired,
+                'fallback': self.fallback,
+            }
+
+
+def get_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """获取当前全部缓冲池的状态"""
+    return {pool.name: pool.stats() for pool in list(_pools)}
@@ -16,7 +16,9 @@ import json
 from pathlib import Path
 from typing import Any, Callable, Dict
 
-from utils.logger import log
+from utils.logger import get_logger
+
+log = get_logger(__name__)
 
 
 class ConfigEventBus:
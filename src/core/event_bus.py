@@ -12,34 +12,284 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import os
+import time
 import asyncio
 import inspect
+import contextvars
+import itertools
+from enum import Enum
 from datetime import datetime
-from dataclasses import dataclass
-from concurrent.futures import ThreadPoolExecutor
-from typing import Any, Callable, Dict, List, Optional, Set
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple, Union
 
-from utils.logger import log
+from utils.logger import get_logger
+from core.topic_trie import TopicTrie, is_pattern
+from core.event_queue import EventBatcher, OverflowPolicy, SubscriberQueue
+from core.event_stream import EventStream
+from core.priority_lanes import EventPriority, PriorityLanes, to_priority
+from core.executor_pool import ExecutorPool, mark_threadsafe_call, take_threadsafe_mark
+from core.event_metrics import EventMetrics, HandlerMetrics, TopicMetrics
+from core.tracing import TraceWriter, activate, assign_span, deactivate, spans_enabled
+from core.event_journal import DEFAULT_SEGMENT_SIZE, JOURNAL_ORIGIN, EventJournal, replay
+from core.buffer_pool import BufferPayload, get_pool_stats
+from core.rate_limiter import RateLimiter, RateLimitPolicy
+
+log = get_logger(__name__)
+
+# 事件名到分发计划的缓存上限，超过后整体清空重建
+_MATCH_CACHE_LIMIT = 4096
+
+# 订阅时对回调的分类，分发时不再调用 inspect
+_ASYNC = 'async'
+_ASYNC_GEN = 'asyncgen'
+_SYNC = 'sync'
+
+# 同步订阅者至少在线程池中执行这么多次、积累了耗时数据之后，才可能被自动改为在事件循环中直接调用
+_AUTO_INLINE_SAMPLES = 20
+# 同步订阅者耗时的指数移动平均系数
+_COST_EWMA_ALPHA = 0.2
+
+
+# 墙上时钟与单调时钟的差值（纳秒），用于把事件的单调时间戳换算成 datetime
+_WALL_CLOCK_OFFSET_NS = time.time_ns() - time.monotonic_ns()
+
+
+class _EventContext:
+    """Event 中不常用的字段，只有其中某一项被设置时才创建，大多数事件不需要它"""
+    __slots__ = ('response_channel', 'origin', 'trace_id', 'span_id', 'parent_span_id')
+
+    def __init__(self, response_channel: Optional[str] = None, origin: Optional[str] = None,
+                 trace_id: Optional[int] = None, span_id: Optional[int] = None,
+                 parent_span_id: Optional[int] = None):
+        self.response_channel = response_channel
+        self.origin = origin
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_span_id = parent_span_id
+
+
+def _context_field(name: str, doc: str) -> property:
+    """Event 上读写 _EventContext 字段的属性，未设置过时读到 None，写入 None 时不创建 _EventContext"""
+    def getter(self):
+        context = self._context
+        return None if context is None else getattr(context, name)
+
+    def setter(self, value):
+        context = self._context
+        if context is None:
+            if value is None:
+                return
+            context = self._context = _EventContext()
+        setattr(context, name, value)
+
+    return property(getter, setter, doc=doc)
 
 
-@dataclass
 class Event:
-    name: str
-    data: Any
-    source: str
-    timestamp: datetime = None  # type: ignore
-    # 如果将 need_response 设置为 True，那么订阅者的回调函数返回值会被收集并返回给发布者。
-    # 这适用于需要获取处理结果的场景（例如：RPC调用、数据查询等）。
-    # 当使用 request() 方法时，该字段会自动设置为 True。
-    need_response: bool = False
+    """
+    在事件总线上传递的事件。
+
+    为了降低高频事件的开销，Event 使用 __slots__，创建时只记录一个单调时钟的纳秒时间戳
+    （timestamp_ns），datetime 形式的 timestamp 在第一次被访问时才生成。
+    响应通道、来源进程和链路追踪等不常用的字段放在按需创建的 _EventContext 中，
+    普通事件只占用常用字段的空间。
+    构造方式与原先的 dataclass 保持一致：Event(name=..., data=..., source=...)
+    """
+    __slots__ = ('name', 'data', 'source', 'need_response', 'priority',
+                 'timestamp_ns', '_timestamp', '_context')
+
+    def __init__(self, name: str, data: Any, source: str,
+                 timestamp: Optional[datetime] = None,
+                 need_response: bool = False,
+                 response_channel: Optional[str] = None,
+                 origin: Optional[str] = None,
+                 priority: Optional[EventPriority] = None,
+                 trace_id: Optional[int] = None,
+                 span_id: Optional[int] = None,
+                 parent_span_id: Optional[int] = None):
+        self.name = name
+        self.data = data
+        self.source = source
+        # 如果将 need_response 设置为 True，那么订阅者的回调函数返回值会被收集并返回给发布者。
+        # 这适用于需要获取处理结果的场景（例如：RPC调用、数据查询等）。
+        # 当使用 request() 方法时，该字段会自动设置为 True。
+        self.need_response = need_response
+        # 事件的优先级（延迟等级），None 表示使用事件名的默认优先级（见 EventBus.set_priority）
+        self.priority = priority
+        # 事件创建时的单调时钟时间（纳秒），适合计算延迟
+        self.timestamp_ns = time.monotonic_ns()
+        self._timestamp = timestamp
+        if (response_channel is None and origin is None and trace_id is None
+                and span_id is None and parent_span_id is None):
+            self._context = None
+        else:
+            self._context = _EventContext(response_channel, origin, trace_id, span_id, parent_span_id)
+
     # 响应通道标识符，用于 request-response 模式下的结果返回。
     # 当 need_response 为 True 时，系统会通过此通道将结果传递回调用方。
     # 通常由 request() 方法自动生成，无需手动设置。
-    response_channel: Optional[str] = None
+    response_channel = _context_field('response_channel', "request-response 模式下返回结果的通道")
+    # 事件来自哪个进程（工作进程名或 "main"），None 表示在本进程中产生，
+    # 由 core.process_transport 在跨进程转发时设置
+    origin = _context_field('origin', "事件来自哪个进程，None 表示在本进程中产生")
+    # 链路追踪信息，分发时由 core.tracing 根据当前上下文自动填写，通常无需手动设置
+    trace_id = _context_field('trace_id', "事件所属 trace 的 ID")
+    span_id = _context_field('span_id', "事件自身的 span ID")
+    parent_span_id = _context_field('parent_span_id', "发布该事件时正在处理的事件的 span ID")
 
-    def __post_init__(self):
-        if self.timestamp is None:
-            self.timestamp = datetime.now()
+    @property
+    def timestamp(self) -> datetime:
+        """事件创建时的墙上时间，首次访问时由 timestamp_ns 换算得到"""
+        if self._timestamp is None:
+            self._timestamp = datetime.fromtimestamp(
+                (self.timestamp_ns + _WALL_CLOCK_OFFSET_NS) / 1_000_000_000
+            )
+        return self._timestamp
+
+    @timestamp.setter
+    def timestamp(self, value: datetime) -> None:
+        self._timestamp = value
+
+    def __repr__(self) -> str:
+        return (f"Event(name={self.name!r}, data={self.data!r}, source={self.source!r}, "
+                f"timestamp={self.timestamp!r}, need_response={self.need_response!r}, "
+                f"response_channel={self.response_channel!r})")
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return ((self.name, self.data, self.source, self.timestamp,
+                 self.need_response, self.response_channel) ==
+                (other.name, other.data, other.source, other.timestamp,
+                 other.need_response, other.response_channel))
+
+    __hash__ = None  # type: ignore
+
+
+class DispatchMode(Enum):
+    """同一事件的多个订阅者的分发方式"""
+    # 逐个 await 订阅者，前一个处理完成后才会调用下一个
+    SEQUENTIAL = "sequential"
+    # 所有订阅者同时运行，互不阻塞，单个订阅者的异常或超时不会影响其他订阅者
+    CONCURRENT = "concurrent"
+
+
+class RequestMode(Enum):
+    """request() 等待响应的方式"""
+    # 默认方式：按事件的分发方式运行所有订阅者直到完成，返回按订阅顺序的第一个非空结果，
+    # 全部为空时返回 {"no_response": True}。不取消任何订阅者
+    ORDERED = "ordered"
+    # 返回最先得到的非空结果，并取消其余仍在运行的订阅者
+    FIRST = "first"
+    # 等待所有订阅者，返回全部非空结果的列表；超时时返回已经收到的部分结果
+    ALL = "all"
+    # 收到 quorum 个非空结果后返回这些结果的列表，并取消其余订阅者；超时仍未达到时返回 None
+    QUORUM = "quorum"
+
+
+class _ResultList(list):
+    """
+    一个订阅者代为收集的多个结果（例如转发到其他进程的请求），
+    请求会把其中的每一项分别计入，而不是作为一个结果
+    """
+
+
+class _ResponseCollector:
+    """收集一次请求的响应，满足 RequestMode 的完成条件时设置 future"""
+    def __init__(self, mode: RequestMode, quorum: int, future: asyncio.Future):
+        self.mode = mode
+        self.quorum = quorum
+        self.future = future
+        self.results: List[Any] = []
+        # 与 results 对应的订阅顺序，ORDERED 模式按它排序
+        self.positions: List[int] = []
+        self.responded = 0
+        # 事件实际分发到的订阅者数量，分发前未知
+        self.expected: Optional[int] = None
+        # id(订阅者) -> 订阅顺序
+        self._order: Dict[int, int] = {}
+
+    def expect(self, subscribers: List[Dict]) -> None:
+        self.expected = len(subscribers)
+        self._order = {id(subscriber): index for index, subscriber in enumerate(subscribers)}
+        self._check()
+
+    def feed(self, result: Any, subscriber: Optional[Dict] = None) -> None:
+        self.responded += 1
+        if result is not None:
+            position = self._order.get(id(subscriber), len(self._order))
+            if type(result) is _ResultList:
+                self.results.extend(result)
+                self.positions.extend([position] * len(result))
+            else:
+                self.results.append(result)
+                self.positions.append(position)
+        self._check()
+
+    def _check(self) -> None:
+        if self.future.done():
+            return
+        if self.mode is RequestMode.FIRST and self.results:
+            self.future.set_result(True)
+        elif self.mode is RequestMode.QUORUM and len(self.results) >= self.quorum:
+            self.future.set_result(True)
+        elif self.expected is not None and self.responded >= self.expected:
+            self.future.set_result(True)
+
+    def outcome(self) -> Any:
+        if self.mode is RequestMode.ORDERED:
+            if not self.results:
+                # 与早期版本一致：所有订阅者都没有结果时返回这个标记
+                return {"no_response": True}
+            return self.results[self.positions.index(min(self.positions))]
+        if self.mode is RequestMode.FIRST:
+            return self.results[0] if self.results else None
+        if self.mode is RequestMode.QUORUM and len(self.results) < self.quorum:
+            return None
+        return list(self.results)
+
+    def collected(self) -> _ResultList:
+        """已收到的所有非空结果，按订阅顺序排列"""
+        order = sorted(range(len(self.results)), key=self.positions.__getitem__)
+        return _ResultList(self.results[index] for index in order)
+
+
+def _callback_name(callback: Callable) -> str:
+    return getattr(callback, '__qualname__', repr(callback))
+
+
+def _callback_kind(callback: Callable) -> str:
+    if inspect.iscoroutinefunction(callback):
+        return _ASYNC
+    if inspect.isasyncgenfunction(callback):
+        return _ASYNC_GEN
+    return _SYNC
+
+
+class _DispatchPlan:
+    """
+    一个事件名的分发计划：匹配的订阅者以及分发时需要的各项设置，
+    在订阅变化或设置分发方式、优先级、状态时失效并在下一次发布时重新生成
+    """
+    __slots__ = ('subscribers', 'filtered', 'buffered', 'mode', 'priority', 'state', 'topic', 'handlers')
+
+    def __init__(self, subscribers: List[Dict], mode: Optional[DispatchMode],
+                 priority: EventPriority, state: bool, topic: TopicMetrics,
+                 handlers: Dict[int, HandlerMetrics]):
+        self.subscribers = subscribers
+        # 是否有订阅者设置了过滤器，没有时直接使用全部订阅者
+        self.filtered = any(subscriber['filter'] for subscriber in subscribers)
+        # 是否有订阅者拥有专属队列或批次
+        self.buffered = any(subscriber['queue'] is not None or subscriber['batch'] is not None
+                            for subscriber in subscribers)
+        # 单独设置的分发方式，None 表示使用 default_dispatch_mode
+        self.mode = mode
+        self.priority = priority
+        self.state = state
+        self.topic = topic
+        # id(订阅者) -> 该订阅者处理这个事件名的指标，分发时不必再按 (事件名, 模块名) 查找
+        self.handlers = handlers
 
 
 class EventBus:
@@ -58,29 +308,494 @@ class EventBus:
             return
         self._initialized_attr = True
 
+        # 事件总线所属的事件循环（主循环），其他线程通过 *_threadsafe 方法把任务交给它执行
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # 跨进程传输（见 core.process_transport），订阅变化时会通知它
+        self._transport = None
+
+        # 键为订阅时使用的事件名或通配模式（如 "dummy02.*"、"#.reply"）
         self._subscribers: Dict[str, List[Dict]] = {}
-        self._executor = ThreadPoolExecutor(max_workers=512)
+        # 只包含带通配符的模式，精确事件名直接在 _subscribers 中查找
+        self._pattern_trie = TopicTrie()
+        # 事件名 -> 分发计划（按订阅顺序排列的匹配订阅者等），见 _plan()
+        self._plans: Dict[str, _DispatchPlan] = {}
+        self._subscription_seq = itertools.count()
+        # 同步订阅者默认使用的线程池，设置了模块专属线程池的订阅者使用 _executors 中的线程池
+        self._executor = ExecutorPool("default", 512)
+        self._executors: Dict[str, ExecutorPool] = {}
+        # 平均耗时低于该值（秒）的同步订阅者自动改为在事件循环中直接调用，None 表示不自动内联
+        self.auto_inline_threshold: Optional[float] = None
         self._response_handlers: Dict[str, Callable] = {}
         self._response_futures: Dict[str, asyncio.Future] = {}
+        self._response_collectors: Dict[str, _ResponseCollector] = {}
+        # 没有其他地方持有引用的后台任务，保留引用防止运行中被垃圾回收，结束时记录异常
+        self._background_tasks: Set[asyncio.Task] = set()
         self._pending_requests: Set[str] = set()
+        # 响应通道编号，加上进程号保证在多个进程之间也不会重复
+        self._request_ids = itertools.count()
+        # 事件名 -> 流式请求的统计（次数、分片数、首个分片延迟等）
+        self._stream_stats: Dict[str, Dict[str, Any]] = {}
+
+        # 每个事件的分发方式，没有单独设置的事件使用 default_dispatch_mode
+        self._dispatch_modes: Dict[str, DispatchMode] = {}
+        self.default_dispatch_mode = DispatchMode.SEQUENTIAL
+        # 订阅者处理单个事件的默认时限（秒），None 表示不限时
+        self.default_handler_timeout: Optional[float] = None
+
+        # 每个事件的默认优先级，没有单独设置的事件使用 EventPriority.NORMAL
+        self._priorities: Dict[str, EventPriority] = {}
+        # 按优先级调度订阅者并统计各通道的延迟，默认不启用，见 configure_priority_lanes()
+        self._lanes: Optional[PriorityLanes] = None
+        # 各事件的发布、请求与处理耗时等指标，见 get_metrics()
+        self.metrics = EventMetrics()
+        # 启用追踪后把每次订阅者处理写入追踪文件，见 enable_tracing()
+        self._tracer: Optional[TraceWriter] = None
+        # 启用事件日志后把发布的每个事件追加写入日志，见 enable_journal()
+        self._journal: Optional[EventJournal] = None
+        # 声明为状态的事件名（只有最新值有意义），见 declare_state()
+        self._state_topics: Set[str] = set()
+        # 状态事件名 -> 最近一次发布的事件
+        self._state_values: Dict[str, Event] = {}
+        # 按事件名和来源限制发布频率，见 set_rate_limit() / configure_rate_limits()
+        self._rate_limiter = RateLimiter()
+        # 来自这些 origin 的事件已经在别处经过了频率限制（事件日志的重放不受限制），
+        # 工作进程把主进程转发来的事件也加入其中，见 core.process_transport
+        self._admitted_origins: Set[str] = {JOURNAL_ORIGIN}
+
+    def bind_loop(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """
+        绑定事件总线所属的事件循环，不传入参数时绑定当前正在运行的事件循环。
+        第一次在事件循环中订阅事件时也会自动绑定。
+        """
+        self._loop = loop if loop is not None else asyncio.get_running_loop()
+        log.debug(f"事件总线已绑定事件循环 {self._loop!r}")
+
+    def _bind_running_loop(self) -> None:
+        if self._loop is None or self._loop.is_closed():
+            try:
+                self._loop = asyncio.get_running_loop()
+            except RuntimeError:
+                pass
+
+    def _owner_loop(self) -> asyncio.AbstractEventLoop:
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            raise RuntimeError("事件总线尚未绑定事件循环，请先调用 bind_loop()")
+        return loop
+
+    def set_dispatch_mode(self, event_name: str,
+                          mode: Union[DispatchMode, str]) -> None:
+        """
+        设置指定事件的分发方式
+
+        :param event_name: 事件名称
+        :param mode: DispatchMode 或其字符串值（"sequential" / "concurrent"）
+        """
+        self._dispatch_modes[event_name] = DispatchMode(mode)
+        self._plans.clear()
+        log.debug(f"事件 {event_name} 的分发方式设置为 {DispatchMode(mode).value}")
+
+    def get_dispatch_mode(self, event_name: str) -> DispatchMode:
+        """获取指定事件的分发方式"""
+        return self._dispatch_modes.get(event_name, self.default_dispatch_mode)
+
+    def set_priority(self, event_name: str,
+                     priority: Union[EventPriority, int, str]) -> None:
+        """
+        设置指定事件的默认优先级，发布时没有显式指定优先级的事件使用它
+
+        :param priority: EventPriority 或其名称（"interactive" / "normal" / "background"）
+        """
+        self._priorities[event_name] = to_priority(priority)
+        self._plans.clear()
+        log.debug(f"事件 {event_name} 的默认优先级设置为 {self._priorities[event_name].name}")
+
+    def get_priority(self, event_name: str) -> EventPriority:
+        """获取指定事件的默认优先级"""
+        return self._priorities.get(event_name, EventPriority.NORMAL)
+
+    def set_rate_limit(self, scope: str, key: str, rate: float,
+                       burst: Optional[float] = None,
+                       policy: Union[RateLimitPolicy, str] = RateLimitPolicy.DELAY) -> None:
+        """
+        设置发布频率限制（令牌桶）。publish 和 request 都受限制，流式请求和事件日志的重放不受限制
+
+        :param scope: "topic" 按事件名（可以是通配模式）限制，"source" 按 Event.source 限制
+        :param rate: 每秒允许的事件数
+        :param burst: 允许的突发数量，默认取 rate 与 1 中较大者
+        :param policy: 超出限制时 "delay"（发布者等待，最多预支 burst 个令牌，超出后丢弃）/ "drop"（静默丢弃）/
+                       "reject"（抛出 RateLimitExceeded）
+        """
+        self._rate_limiter.set_limit(scope, key, rate, burst, policy)
+        log.debug(f"{'事件' if scope == 'topic' else '来源'} {key} 的发布频率限制为 {rate}/s，"
+                  f"策略: {RateLimitPolicy(policy).value}")
+
+    def remove_rate_limit(self, scope: str, key: str) -> None:
+        self._rate_limiter.remove_limit(scope, key)
+
+    def configure_rate_limits(self, config: Optional[Dict[str, Any]]) -> None:
+        """
+        按配置替换全部发布频率限制，格式见 core.rate_limiter，可以直接注册为配置项的变更回调
+        """
+        try:
+            self._rate_limiter.configure(config)
+        except (KeyError, TypeError, ValueError) as e:
+            log.error(f"发布频率限制配置无效: {e}")
+            return
+        if config:
+            log.info(f"已应用发布频率限制配置: {config}")
+
+    def get_rate_limit_stats(self) -> Dict[str, Dict[str, Any]]:
+        """获取各个限制的令牌数以及放行、延迟、丢弃、拒绝的计数"""
+        return self._rate_limiter.stats()
+
+    async def _admit(self, event: Event) -> bool:
+        """
+        按发布频率限制放行事件，必要时等待；事件应被丢弃时返回 False，应被拒绝时抛出 RateLimitExceeded
+        """
+        if event.origin in self._admitted_origins:
+            return True
+        wait = self._rate_limiter.check(event.name, event.source)
+        if wait is None:
+            log.debug("事件 %s（来源: %s）超出发布频率限制，已丢弃", event.name, event.source)
+            return False
+        if wait:
+            await asyncio.sleep(wait)
+        return True
+
+    def declare_state(self, event_name: str) -> None:
+        """
+        把事件声明为状态（如观众数、当前情绪、模块状态），只有最新值有意义：
+
+        - 总线记住最近一次发布的值，可以用 get_state() 读取；
+        - 精确订阅该事件且没有指定 queue_size 的订阅者使用容量为 1 的 DROP_OLDEST 队列，
+          处理较慢时中间的更新被合并，只会收到处理期间到达的最新值（已有的订阅者也会转换）；
+        - 新的订阅者（包括匹配它的通配订阅）在订阅后立即收到当前值。
+        """
+        self._state_topics.add(event_name)
+        for subscriber in self._subscribers.get(event_name, ()):
+            if subscriber['queue'] is None and subscriber['batch'] is None:
+                self._use_latest_value_queue(subscriber)
+        self._plans.clear()
+        log.debug(f"事件 {event_name} 已声明为状态")
+
+    def get_state(self, event_name: str, default: Any = None) -> Any:
+        """获取状态事件最近一次发布的数据，还没有发布过时返回 default"""
+        event = self._state_values.get(event_name)
+        return default if event is None else event.data
+
+    def clear_state(self, event_name: str) -> None:
+        """清除状态事件记住的当前值，之后的新订阅者不再收到它"""
+        event = self._state_values.pop(event_name, None)
+        if event is not None and type(event.data) is BufferPayload:
+            event.data.release()
+
+    def _use_latest_value_queue(self, subscriber: Dict) -> None:
+        subscriber['queue'] = SubscriberQueue(1, OverflowPolicy.DROP_OLDEST)
+        try:
+            self._start_consumer(subscriber, asyncio.get_running_loop())
+        except RuntimeError:
+            pass
+
+    def _remember_state(self, event: Event) -> None:
+        if event.need_response:
+            # 新订阅者收到的当前值只是普通事件，不参与原请求的响应
+            event = Event(name=event.name, data=event.data, source=event.source, origin=event.origin,
+                          priority=event.priority, trace_id=event.trace_id, span_id=event.span_id,
+                          parent_span_id=event.parent_span_id)
+        if type(event.data) is BufferPayload:
+            event.data.retain()
+        previous = self._state_values.get(event.name)
+        self._state_values[event.name] = event
+        if previous is not None and type(previous.data) is BufferPayload:
+            previous.data.release()
+
+    def _send_current_state(self, subscriber: Dict) -> None:
+        """
+        把新订阅者匹配的各个状态的当前值交给它。
+        在总线所属的事件循环中投递；没有绑定（或已经关闭）时使用当前运行的事件循环，两者都没有时不补发
+        """
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            loop = running
+        for event_name, event in list(self._state_values.items()):
+            if not any(matched is subscriber for matched in self._resolve(event_name)):
+                continue
+            if subscriber['filter'] and not subscriber['filter'](event):
+                continue
+            if loop is None:
+                log.warning(f"没有可用的事件循环，不向新订阅者补发状态 {event_name} 的当前值")
+                continue
+            if running is loop:
+                self._keep_task(loop.create_task(self._deliver_state(subscriber, event)))
+            else:
+                asyncio.run_coroutine_threadsafe(self._deliver_state(subscriber, event), loop)
+
+    async def _deliver_state(self, subscriber: Dict, event: Event) -> None:
+        # 订阅之后已经发布了新值时，新值已按正常方式送达，不再补发旧值
+        if self._state_values.get(event.name) is not event:
+            return
+        if type(event.data) is BufferPayload:
+            event.data.retain()
+        if subscriber['batch'] is not None:
+            self._add_to_batch(subscriber, event)
+        elif subscriber['queue'] is not None:
+            await self._enqueue(subscriber, event)
+        else:
+            await self._run_subscriber(subscriber, event)
+
+    def configure_priority_lanes(self,
+                                 max_inflight: Optional[int],
+                                 weights: Optional[Dict[Any, int]] = None,
+                                 budgets: Optional[Dict[Any, Optional[float]]] = None) -> None:
+        """
+        启用优先级通道：同时执行的订阅者调用最多 max_inflight 个，超出的调用按优先级排队，
+        名额按 weights 加权分配给各通道（默认 interactive:normal:background = 8:3:1）。
+        max_inflight 为 None 时不限制并发，只统计各通道的延迟；没有调用过本方法时既不调度也不统计。
+
+        应在发布事件之前调用，调用时已有的延迟统计会被清空。
+
+        :param budgets: 各通道的延迟预算（秒），超出的次数计入统计中的 over_budget
+        """
+        self._lanes = PriorityLanes(max_inflight, weights, budgets)
+        log.info(f"事件总线优先级通道: max_inflight={max_inflight}，"
+                 f"权重={ {p.name.lower(): w for p, w in self._lanes.weights.items()} }")
+
+    def set_module_executor(self, name: str, max_workers: int) -> None:
+        """
+        为模块（或任意名称）设置专属线程池，订阅时 executor=name 的同步订阅者在其中执行，
+        这样一个阻塞的模块只会占满自己的线程池，不会拖慢其他模块。已有同名线程池时会被替换
+
+        :param max_workers: 线程池的线程数量
+        """
+        old = self._executors.get(name)
+        self._executors[name] = ExecutorPool(name, max_workers)
+        if old is not None:
+            old.shutdown(wait=False)
+        log.debug(f"模块 {name} 使用专属线程池，线程数: {max_workers}")
+
+    def get_executor_stats(self) -> Dict[str, Any]:
+        """
+        获取各线程池的状态（执行中、排队中、饱和次数等），以及每个同步订阅者的执行方式与平均耗时（秒）
+        """
+        pools = {'default': self._executor.stats()}
+        for name, pool in self._executors.items():
+            pools[name] = pool.stats()
+
+        callbacks = []
+        for event_name, subscribers in self._subscribers.items():
+            for subscriber in subscribers:
+                if not subscriber['calls']:
+                    continue
+                callbacks.append({
+                    'event': event_name,
+                    'callback': _callback_name(subscriber['callback']),
+                    'executor': subscriber['executor'] if subscriber['executor'] in self._executors else 'default',
+                    'inline': self._should_inline(subscriber),
+                    'calls': subscriber['calls'],
+                    'cost_avg': subscriber['cost'],
+                })
+        return {'pools': pools, 'callbacks': callbacks}
+
+    def get_metrics(self, reader: Hashable = None) -> Dict[str, Any]:
+        """
+        汇总事件总线的指标：各事件的发布次数与速率、请求数与超时数、各模块的处理耗时分布与错误数，
+        各订阅模式的订阅者数量、尚未完成的响应数量，以及线程池和优先级通道的状态
+
+        :param reader: 读取方标识，发布速率按读取方分别计算，见 EventMetrics.snapshot
+        """
+        snapshot = self.metrics.snapshot(reader)
+        snapshot['subscribers'] = {pattern: len(subscribers) for pattern, subscribers in self._subscribers.items()}
+        snapshot['pending_responses'] = len(self._response_futures)
+        snapshot['executors'] = self.get_executor_stats()
+        snapshot['lanes'] = self.get_lane_stats()
+        if self._journal is not None:
+            snapshot['journal'] = self._journal.stats()
+        snapshot['buffer_pools'] = get_pool_stats()
+        if self._rate_limiter.active:
+            snapshot['rate_limits'] = self._rate_limiter.stats()
+        return snapshot
+
+    def enable_tracing(self, path: Union[str, 'os.PathLike']) -> None:
+        """
+        启用链路追踪：每次订阅者处理都以 Chrome Trace Event 格式写入 path，
+        可以用 chrome://tracing 或 Perfetto 打开。已启用时会先关闭原来的文件
+        """
+        self.disable_tracing()
+        self._tracer = TraceWriter(path)
+        log.info(f"事件追踪已启用，写入 {path}")
+
+    def disable_tracing(self) -> None:
+        """停止链路追踪，追踪文件由后台线程写完；启用了结构化日志时事件仍然会携带 trace_id 等信息"""
+        tracer, self._tracer = self._tracer, None
+        if tracer is not None:
+            tracer.close()
+
+    def enable_journal(self, directory: Union[str, 'os.PathLike'],
+                       segment_size: int = DEFAULT_SEGMENT_SIZE,
+                       fsync: bool = False) -> None:
+        """
+        启用事件日志：之后发布的每个事件都会追加写入 directory 下的分段日志，
+        写入由后台线程批量完成，不会阻塞发布。已启用时会先关闭原来的日志
+
+        :param segment_size: 单个段文件的大小上限（字节）
+        :param fsync: 每批写入后是否调用 fsync，开启后更耐崩溃但吞吐更低
+        """
+        self.disable_journal()
+        self._journal = EventJournal(directory, segment_size, fsync)
+        log.info(f"事件日志已启用，写入 {self._journal.current_segment}")
+
+    def disable_journal(self) -> None:
+        """停止记录事件日志，并写完尚未写入的记录"""
+        journal, self._journal = self._journal, None
+        if journal is not None:
+            journal.close()
+
+    async def replay_journal(self, path: Union[str, 'os.PathLike'],
+                             speed: Optional[float] = 1.0,
+                             filter_func: Optional[Callable[[str], bool]] = None) -> int:
+        """
+        把事件日志（段文件或整个日志目录）重新发布到事件总线，返回重放的事件数量
+
+        :param speed: 相对原始节奏的倍速，None 表示尽快重放
+        :param filter_func: 接受事件名，返回 False 的事件不重放
+        """
+        return await replay(self, path, speed, filter_func)
+
+    def get_lane_stats(self) -> Dict[str, Any]:
+        """获取各优先级通道的排队情况与延迟统计（秒），没有启用优先级通道时返回空字典"""
+        if self._lanes is None:
+            return {}
+        return self._lanes.stats()
 
     def subscribe(self,
                   event_name: str,
                   callback: Callable,
-                  filter_func: Optional[Callable[[Event], bool]] = None) -> None:
+                  filter_func: Optional[Callable[[Event], bool]] = None,
+                  timeout: Optional[float] = None,
+                  queue_size: Optional[int] = None,
+                  overflow: Union[OverflowPolicy, str] = OverflowPolicy.BLOCK,
+                  coalesce_key: Optional[Callable[[Event], Hashable]] = None,
+                  executor: Optional[str] = None,
+                  inline: Optional[bool] = None) -> None:
         """
         订阅指定名称的事件
+
+        :param event_name: 事件名称或通配模式，按 "." 分段，"*" 匹配一个分段，"#" 匹配零个或多个分段
+        :param timeout: 该订阅者处理单个事件的时限（秒），超时后不再等待其结果；
+                        为 None 时使用 default_handler_timeout
+        :param queue_size: 设置后该订阅者拥有一个容量为 queue_size 的专属队列和消费任务，
+                           发布者只负责入队，不再等待该订阅者处理完成
+        :param overflow: 队列已满时的策略，见 OverflowPolicy
+        :param coalesce_key: COALESCE 策略下用于判断两个事件是否可以合并的键函数
+        :param executor: 同步回调使用的线程池名称（见 set_module_executor），没有该线程池时使用默认线程池
+        :param inline: 仅对同步回调有效。True 表示直接在事件循环中调用（只适合很快且不阻塞的回调），
+                       False 表示总在线程池中执行，None 表示按 auto_inline_threshold 根据实测耗时决定
         """
+        self._bind_running_loop()
         if event_name not in self._subscribers:
             self._subscribers[event_name] = []
+        if queue_size is None and event_name in self._state_topics:
+            # 状态事件只需要最新值
+            queue_size, overflow = 1, OverflowPolicy.DROP_OLDEST
 
         subscriber = {
             'callback': callback,
-            'filter': filter_func
+            'filter': filter_func,
+            'timeout': timeout,
+            'seq': next(self._subscription_seq),
+            'queue': None,
+            'consumer': None,
+            'batch': None,
+            'executor': executor,
+            'kind': _callback_kind(callback),
+            # 指标和追踪中使用的名称：模块名，没有时使用回调名
+            'module': executor or _callback_name(callback),
+            'inline': inline,
+            # 同步回调的调用次数与耗时（秒）的指数移动平均
+            'calls': 0,
+            'cost': None,
+            # 回调在线程中调用过 *_threadsafe 方法，不能内联
+            'pinned': False
         }
 
-        self._subscribers[event_name].append(subscriber)
+        if queue_size is not None:
+            subscriber['queue'] = SubscriberQueue(queue_size, OverflowPolicy(overflow), coalesce_key)
+            try:
+                self._start_consumer(subscriber, asyncio.get_running_loop())
+            except RuntimeError:
+                # 当前没有运行中的事件循环，消费任务在第一次入队时再创建
+                pass
+
+        self._add_subscriber(event_name, subscriber)
         log.debug(f"事件 {event_name} 新增订阅者，当前总数: {len(self._subscribers[event_name])}")
+        if self._state_values:
+            self._send_current_state(subscriber)
+
+    def subscribe_batch(self,
+                        event_name: str,
+                        callback: Callable,
+                        max_items: int,
+                        max_delay: float,
+                        filter_func: Optional[Callable[[Event], bool]] = None,
+                        timeout: Optional[float] = None,
+                        executor: Optional[str] = None) -> None:
+        """
+        以批次的方式订阅事件：事件先在总线中缓存，数量达到 max_items 或第一个事件
+        已等待 max_delay 秒时，以 List[Event] 的形式一次性交付给 callback。
+
+        callback 的返回值如果是与批次等长的列表，则按位置作为各事件的响应结果，
+        否则批次中需要响应的事件得到空结果。
+
+        :param max_items: 每批最多包含的事件数量
+        :param max_delay: 批次中第一个事件最多等待的时间（秒）
+        :param executor: 同步回调使用的线程池名称
+        """
+        self._bind_running_loop()
+        if event_name not in self._subscribers:
+            self._subscribers[event_name] = []
+
+        subscriber = {
+            'callback': callback,
+            'filter': filter_func,
+            'timeout': timeout,
+            'seq': next(self._subscription_seq),
+            'queue': None,
+            'consumer': None,
+            'batch': EventBatcher(max_items, max_delay),
+            'executor': executor,
+            'kind': _callback_kind(callback),
+            'module': executor or _callback_name(callback),
+            'inline': False,
+            'calls': 0,
+            'cost': None,
+            'pinned': False
+        }
+
+        self._add_subscriber(event_name, subscriber)
+        log.debug(f"事件 {event_name} 新增批量订阅者（max_items={max_items}, max_delay={max_delay}），"
+                  f"当前总数: {len(self._subscribers[event_name])}")
+        if self._state_values:
+            self._send_current_state(subscriber)
+
+    def _add_subscriber(self, event_name: str, subscriber: Dict) -> None:
+        self._subscribers[event_name].append(subscriber)
+        if is_pattern(event_name):
+            self._pattern_trie.add(event_name)
+        self._plans.clear()
+        if self._transport is not None:
+            self._transport.on_subscribe(event_name, subscriber['callback'])
+
+    def attach_transport(self, transport) -> None:
+        """
+        挂接跨进程传输，之后每次订阅/取消订阅都会调用
+        transport.on_subscribe(event_name, callback) / transport.on_unsubscribe(event_name, callback)
+        """
+        self._transport = transport
 
     def unsubscribe(self, event_name: str, callback: Callable) -> None:
         """
@@ -92,146 +807,649 @@ class EventBus:
                 # 如果当前订阅者的回调函数不是要解绑的回调函数，则保留
                 if subscriber['callback'] != callback:
                     remaining_subscribers.append(subscriber)
+                else:
+                    self._stop_consumer(subscriber)
             self._subscribers[event_name] = remaining_subscribers
             log.debug(f"事件 {event_name} 移除订阅者，剩余总数: {len(self._subscribers[event_name])}")
 
+            if not remaining_subscribers:
+                del self._subscribers[event_name]
+                self._pattern_trie.remove(event_name)
+            self._plans.clear()
+            if self._transport is not None:
+                self._transport.on_unsubscribe(event_name, callback)
+
+    def _resolve(self, event_name: str) -> List[Dict]:
+        """
+        查找与事件名匹配的全部订阅者（包括通配订阅），按订阅顺序排列
+        """
+        return self._plan(event_name).subscribers
+
+    def _plan(self, event_name: str) -> _DispatchPlan:
+        plan = self._plans.get(event_name)
+        if plan is not None:
+            return plan
+
+        subscribers = list(self._subscribers.get(event_name, ()))
+        if len(self._pattern_trie):
+            patterns = self._pattern_trie.match(event_name)
+            for pattern in patterns:
+                if pattern != event_name:
+                    subscribers.extend(self._subscribers.get(pattern, ()))
+            if patterns:
+                subscribers.sort(key=lambda subscriber: subscriber['seq'])
+
+        plan = _DispatchPlan(subscribers, self._dispatch_modes.get(event_name),
+                             self._priorities.get(event_name, EventPriority.NORMAL),
+                             event_name in self._state_topics, self.metrics.topic(event_name),
+                             {id(subscriber): self.metrics.handler(event_name, subscriber['module'])
+                              for subscriber in subscribers})
+        if len(self._plans) >= _MATCH_CACHE_LIMIT:
+            self._plans.clear()
+        self._plans[event_name] = plan
+        return plan
+
     async def publish(self, event: Event) -> List[Any]:
         """
         发布事件（异步）
         """
+        if self._rate_limiter.active and not await self._admit(event):
+            return []
+        return await self._dispatch(event)
+
+    async def _dispatch(self, event: Event,
+                        mode: Optional[DispatchMode] = None) -> List[Any]:
+        """
+        把事件分发给所有匹配的订阅者，mode 为 None 时使用事件自身的分发方式。
+
+        需要响应的事件，每个接收到它的订阅者都会向响应通道恰好触发一次结果（可能为 None）
+        """
         results = []
+        plan = self._plan(event.name)
+        plan.topic.published += 1
+        if spans_enabled():
+            assign_span(event)
+        journal = self._journal
+        if journal is not None and event.origin != JOURNAL_ORIGIN:
+            journal.append(event)
+        if event.priority is None:
+            event.priority = plan.priority
+        if plan.state:
+            self._remember_state(event)
 
-        if event.name not in self._subscribers:
-            log.debug(f"事件 {event.name} 没有订阅者，直接返回")
-            # 如果事件需要响应但没有订阅者，触发响应处理器
+        subscribers = plan.subscribers
+        if not subscribers:
+            log.debug("事件 %s 没有订阅者，直接返回", event.name)
+            # 如果事件需要响应但没有订阅者，通知等待方不会再有响应
             if event.need_response and event.response_channel:
-                self._trigger_response(event.response_channel, None)
+                self._expect_responses(event.response_channel, [])
             return results
 
-        log.debug(f"发布事件 {event.name}，订阅者数量: {len(self._subscribers[event.name])}")
+        log.debug("发布事件 %s，订阅者数量: %d", event.name, len(subscribers))
 
-        for subscriber in self._subscribers[event.name]:
-            # 检查过滤器，如果是 True 那么就说明这条消息是订阅者需要的，继续进行接下来的环节
-            # 如果是 False 那么就说明这条消息不是订阅者需要的，直接跳过
-            if subscriber['filter'] and not subscriber['filter'](event):
-                log.debug(f"事件 {event.name} 被过滤器跳过")
-                continue
+        if plan.filtered:
+            targets = []
+            for subscriber in subscribers:
+                # 检查过滤器，如果是 True 那么就说明这条消息是订阅者需要的，继续进行接下来的环节
+                # 如果是 False 那么就说明这条消息不是订阅者需要的，直接跳过
+                if subscriber['filter'] and not subscriber['filter'](event):
+                    log.debug("事件 %s 被过滤器跳过", event.name)
+                    continue
+                targets.append(subscriber)
+        else:
+            targets = subscribers
 
-            try:
-                callback = subscriber['callback']
+        need_response = event.need_response
+        if need_response and event.response_channel:
+            self._expect_responses(event.response_channel, targets)
+
+        if targets and type(event.data) is BufferPayload:
+            # 每个收到事件的订阅者持有载荷的一个引用，处理完成或事件被丢弃时释放
+            event.data.retain(len(targets))
 
-                # 判断是否是异步函数
-                if inspect.iscoroutinefunction(callback):
-                    result = await callback(event)
+        # 拥有专属队列的订阅者只入队，由各自的消费任务异步处理；批量订阅者只加入当前批次
+        if plan.buffered:
+            direct = []
+            for subscriber in targets:
+                if subscriber['batch'] is not None:
+                    self._add_to_batch(subscriber, event)
+                elif subscriber['queue'] is None:
+                    direct.append(subscriber)
                 else:
-                    # 同步函数在线程池中执行
-                    result = await asyncio.get_event_loop().run_in_executor(
-                        self._executor, callback, event
-                    )
+                    await self._enqueue(subscriber, event)
+            targets = direct
+
+        handlers = plan.handlers
+        if len(targets) == 1:
+            subscriber = targets[0]
+            outcomes = [await self._run_subscriber(subscriber, event, handlers[id(subscriber)])]
+        else:
+            if mode is None:
+                mode = plan.mode or self.default_dispatch_mode
+            if mode is DispatchMode.CONCURRENT:
+                # 并发分发：结果仍按订阅顺序收集
+                outcomes = await asyncio.gather(
+                    *(self._run_subscriber(subscriber, event, handlers[id(subscriber)]) for subscriber in targets)
+                )
+            else:
+                outcomes = []
+                for subscriber in targets:
+                    outcomes.append(await self._run_subscriber(subscriber, event, handlers[id(subscriber)]))
+
+        if need_response:
+            results = [result for result in outcomes if result is not None]
+
+        return results
+
+    async def _invoke(self, subscriber: Dict, event: Event) -> Any:
+        """调用单个订阅者，超过其时限时抛出 asyncio.TimeoutError"""
+        callback = subscriber['callback']
+
+        # 回调的类型在订阅时已经判断好
+        kind = subscriber['kind']
+        if kind is _ASYNC:
+            awaitable = callback(event)
+        elif kind is _ASYNC_GEN:
+            # 异步生成器在非流式的发布中把全部分片收集为列表作为结果
+            awaitable = self._collect_chunks(callback(event))
+        elif self._should_inline(subscriber):
+            # 足够快的同步函数直接在事件循环中调用，省去线程切换
+            return self._call_sync(subscriber, callback, event)
+        else:
+            # 同步函数在线程池中执行，并带上当前的上下文变量，
+            # 使它在处理过程中发布的事件沿用当前持有的优先级通道名额
+            executor = self._executors.get(subscriber['executor'], self._executor)
+            awaitable = asyncio.get_running_loop().run_in_executor(
+                executor, contextvars.copy_context().run, self._call_sync, subscriber, callback, event
+            )
+
+        timeout = subscriber['timeout']
+        if timeout is None:
+            timeout = self.default_handler_timeout
+        if timeout is None:
+            return await awaitable
+        return await asyncio.wait_for(awaitable, timeout=timeout)
+
+    def _should_inline(self, subscriber: Dict) -> bool:
+        inline = subscriber['inline']
+        if inline is not None:
+            return inline
+        threshold = self.auto_inline_threshold
+        return (threshold is not None and not subscriber['pinned']
+                and subscriber['calls'] >= _AUTO_INLINE_SAMPLES and subscriber['cost'] < threshold)
+
+    @staticmethod
+    def _call_sync(subscriber: Dict, callback: Callable, event: Any) -> Any:
+        """调用同步回调并记录耗时"""
+        take_threadsafe_mark()
+        started = time.perf_counter()
+        try:
+            return callback(event)
+        finally:
+            elapsed = time.perf_counter() - started
+            cost = subscriber['cost']
+            subscriber['cost'] = elapsed if cost is None else cost + _COST_EWMA_ALPHA * (elapsed - cost)
+            subscriber['calls'] += 1
+            if take_threadsafe_mark():
+                subscriber['pinned'] = True
+
+    @staticmethod
+    async def _collect_chunks(chunks) -> List[Any]:
+        return [chunk async for chunk in chunks]
 
-                if event.need_response and result is not None:
-                    results.append(result)
-                    # 触发响应处理器
-                    if event.response_channel:
-                        self._trigger_response(event.response_channel, result)
+    async def _run_subscriber(self, subscriber: Dict, event: Event,
+                              handler: Optional[HandlerMetrics] = None) -> Any:
+        """
+        执行单个订阅者并处理其结果，订阅者的异常和超时在这里被隔离，
+        不会影响同一事件的其他订阅者
+
+        :param handler: 分发计划中该订阅者的处理指标，不传时按事件名和模块名查找
+        """
+        module = subscriber['module']
+        if handler is None:
+            handler = self.metrics.handler(event.name, module)
+        started_ns = None
+        outcome = 'ok'
+        # 处理期间该事件是当前上下文中的事件，订阅者发布的新事件会成为它的子 span；
+        # 没有启用追踪（事件没有 span）时不需要设置
+        token = None if event.span_id is None else activate(event)
+        try:
+            lanes = self._lanes
+            if lanes is None or lanes.max_inflight is None:
+                # 不限制并发时不需要进入通道，省去上下文管理器的开销
+                wait = 0.0
+                started_ns = time.monotonic_ns()
+                result = await self._invoke(subscriber, event)
+            else:
+                async with lanes.slot(event.priority) as wait:
+                    started_ns = time.monotonic_ns()
+                    result = await self._invoke(subscriber, event)
+            finished_ns = time.monotonic_ns()
+            handler.latency.observe((finished_ns - started_ns) / 1_000_000_000)
+            if lanes is not None:
+                lanes.record(event.priority, wait, (finished_ns - event.timestamp_ns) / 1_000_000_000)
+
+            if event.need_response and event.response_channel:
+                # 触发响应处理器
+                self._trigger_response(event.response_channel, result, subscriber)
+            return result
+
+        except asyncio.CancelledError:
+            outcome = 'cancelled'
+            handler.cancelled += 1
+            raise
+        except asyncio.TimeoutError:
+            outcome = 'timeout'
+            handler.timeouts += 1
+            log.warning(f"处理事件 {event.name} 超时，订阅者: {_callback_name(subscriber['callback'])}")
+        except Exception as e:
+            outcome = 'error'
+            handler.errors += 1
+            log.error(f"处理事件 {event.name} 时出错: {e}", exc_info=True)
+        finally:
+            if type(event.data) is BufferPayload:
+                event.data.release()
+            if token is not None:
+                deactivate(token)
+            if self._tracer is not None and started_ns is not None:
+                self._tracer.record_handler(event, module, started_ns, time.monotonic_ns(), outcome)
+
+        # 如果事件需要响应，传递错误
+        if event.need_response and event.response_channel:
+            self._trigger_response(event.response_channel, None, subscriber)
+        return None
+
+    def _start_consumer(self, subscriber: Dict, loop: asyncio.AbstractEventLoop) -> None:
+        """为拥有专属队列的订阅者启动消费任务"""
+        queue = subscriber['queue']
+        queue.loop = loop
+        subscriber['consumer'] = loop.create_task(
+            self._consume(subscriber),
+            name=f"EventBus-consumer-{_callback_name(subscriber['callback'])}"
+        )
+
+    def _stop_consumer(self, subscriber: Dict) -> None:
+        """停止消费任务，并让队列或批次中仍在等待响应的事件得到空结果"""
+        consumer = subscriber['consumer']
+        if consumer is not None and not consumer.done():
+            consumer.cancel()
+        subscriber['consumer'] = None
+
+        pending = []
+        if subscriber['queue'] is not None:
+            pending.extend(subscriber['queue'].drain())
+        if subscriber['batch'] is not None:
+            pending.extend(subscriber['batch'].drain())
+        for event in pending:
+            if type(event.data) is BufferPayload:
+                event.data.release()
+            if event.need_response and event.response_channel:
+                self._trigger_response(event.response_channel, None, subscriber)
 
+    async def _consume(self, subscriber: Dict) -> None:
+        """消费任务：按顺序处理订阅者队列中的事件"""
+        queue = subscriber['queue']
+        while True:
+            event = await queue.get()
+            try:
+                await self._run_subscriber(subscriber, event)
+            finally:
+                queue.task_done()
+
+    async def _enqueue(self, subscriber: Dict, event: Event) -> bool:
+        """
+        将事件放入订阅者的专属队列，返回事件是否被接收
+        """
+        queue = subscriber['queue']
+        loop = asyncio.get_running_loop()
+        if subscriber['consumer'] is None:
+            self._start_consumer(subscriber, loop)
+
+        if queue.loop is loop:
+            displaced = await queue.put(event)
+        else:
+            # 队列只能在创建它的事件循环中操作
+            displaced = await asyncio.wrap_future(
+                asyncio.run_coroutine_threadsafe(queue.put(event), queue.loop)
+            )
+
+        if displaced is not None:
+            log.debug("订阅者 %s 的队列已满，事件 %s 被丢弃或合并", _callback_name(subscriber['callback']), displaced.name)
+            if type(displaced.data) is BufferPayload:
+                displaced.data.release()
+            if displaced.need_response and displaced.response_channel:
+                self._trigger_response(displaced.response_channel, None, subscriber)
+        return displaced is not event
+
+    def _add_to_batch(self, subscriber: Dict, event: Event) -> None:
+        """将事件加入批量订阅者的当前批次，批次已满时立即交付"""
+        batcher = subscriber['batch']
+        loop = asyncio.get_running_loop()
+        if batcher.loop is None:
+            batcher.loop = loop
+        elif batcher.loop is not loop:
+            # 批次只能在创建它的事件循环中操作
+            batcher.loop.call_soon_threadsafe(self._add_to_batch_on_loop, subscriber, event)
+            return
+        self._add_to_batch_on_loop(subscriber, event)
+
+    def _add_to_batch_on_loop(self, subscriber: Dict, event: Event) -> None:
+        batch = subscriber['batch'].add(event, lambda: self._flush_batch(subscriber))
+        if batch:
+            self._keep_task(subscriber['batch'].loop.create_task(self._deliver_batch(subscriber, batch)))
+
+    def _flush_batch(self, subscriber: Dict) -> None:
+        """批次等待超时，交付当前已缓存的事件"""
+        batch = subscriber['batch'].take()
+        if batch:
+            self._keep_task(subscriber['batch'].loop.create_task(self._deliver_batch(subscriber, batch)))
+
+    async def _deliver_batch(self, subscriber: Dict, batch: List[Event]) -> None:
+        """把一个批次交给订阅者处理，并按位置分发响应结果"""
+        async with subscriber['batch'].delivery_lock:
+            results = None
+            handler = self.metrics.handler(batch[0].name, subscriber['module'])
+            try:
+                started_ns = time.monotonic_ns()
+                results = await self._invoke(subscriber, batch)
+                handler.latency.observe((time.monotonic_ns() - started_ns) / 1_000_000_000)
+            except asyncio.TimeoutError:
+                handler.timeouts += 1
+                log.warning(f"批量处理事件 {batch[0].name} 等 {len(batch)} 个事件超时，"
+                            f"订阅者: {_callback_name(subscriber['callback'])}")
             except Exception as e:
-                log.error(f"处理事件 {event.name} 时出错: {e}", exc_info=True)
-                # 如果事件需要响应，传递错误
-                if event.need_response and event.response_channel:
-                    self._trigger_response(event.response_channel, None)
+                handler.errors += 1
+                log.error(f"批量处理事件 {batch[0].name} 等 {len(batch)} 个事件时出错: {e}", exc_info=True)
 
-        # 如果事件需要响应但没有得到任何结果，触发响应处理器
-        if event.need_response and not results and event.response_channel:
-            log.debug(f"事件 {event.name} 需要响应但没有得到结果")
-            self._trigger_response(event.response_channel, None)
+            if not isinstance(results, list) or len(results) != len(batch):
+                results = [None] * len(batch)
+            for event, result in zip(batch, results):
+                if type(event.data) is BufferPayload:
+                    event.data.release()
+                if event.need_response and event.response_channel:
+                    self._trigger_response(event.response_channel, result, subscriber)
 
-        return results
+    def get_queue_stats(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        获取所有拥有专属队列或批次缓存的订阅者的状态（深度、丢弃数量、批次数量等）
+        """
+        stats = {}
+        for event_name, subscribers in self._subscribers.items():
+            for subscriber in subscribers:
+                buffer = subscriber['queue'] if subscriber['queue'] is not None else subscriber['batch']
+                if buffer is not None:
+                    stats.setdefault(event_name, []).append({
+                        'callback': _callback_name(subscriber['callback']),
+                        **buffer.stats()
+                    })
+        return stats
 
-    def _trigger_response(self, response_channel: str, result: Any):
-        """触发响应处理器"""
-        if response_channel in self._response_handlers:
+    def _trigger_response(self, response_channel: str, result: Any, subscriber: Optional[Dict] = None):
+        """触发响应处理器，subscriber 为给出结果的订阅者"""
+        collector = self._response_collectors.get(response_channel)
+        if collector is not None:
+            collector.feed(result, subscriber)
+        elif response_channel in self._response_handlers:
             try:
                 self._response_handlers[response_channel](result)
             except Exception as e:
                 log.error(f"触发响应处理器 {response_channel} 时出错: {e}")
-        elif response_channel in self._response_futures:
-            future = self._response_futures[response_channel]
-            if not future.done():
-                if result is not None:
-                    future.set_result(result)
-                else:
-                    # 如果结果是None，设置一个默认的空结果，避免future永远等待
-                    future.set_result({"no_response": True})
+
+    def _expect_responses(self, response_channel: str, subscribers: List[Dict]) -> None:
+        """告知请求方本次事件会由哪些订阅者（按订阅顺序）给出响应"""
+        collector = self._response_collectors.get(response_channel)
+        if collector is not None:
+            collector.expect(subscribers)
+
+    def _request_mode(self, response_channel: Optional[str]) -> Optional[Tuple[RequestMode, int]]:
+        """response_channel 对应的 request() 的等待方式和 quorum，不是由 request() 发起时返回 None"""
+        collector = self._response_collectors.get(response_channel)
+        if collector is None:
+            return None
+        return collector.mode, collector.quorum
+
+    def _keep_task(self, task: asyncio.Task) -> asyncio.Task:
+        """保留后台任务的引用直到它结束，任务的异常会被记录"""
+        self._background_tasks.add(task)
+        task.add_done_callback(self._task_done)
+        return task
+
+    def _task_done(self, task: asyncio.Task) -> None:
+        self._background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log.error(f"后台任务 {task.get_name()} 出错: {task.exception()!r}")
+
+    def _new_response_channel(self) -> str:
+        return f"response_{os.getpid()}_{next(self._request_ids)}"
+
+    def publish_threadsafe(self, event: Event) -> Future:
+        """
+        在任意线程中发布事件：事件会交给事件总线所属的事件循环处理，
+        返回一个 concurrent.futures.Future，其结果与 publish() 的返回值相同
+        """
+        mark_threadsafe_call()
+        return asyncio.run_coroutine_threadsafe(self.publish(event), self._owner_loop())
+
+    def request_threadsafe(self,
+                           event_name: str,
+                           data: Any,
+                           source: str,
+                           timeout: float = 10.0,
+                           mode: Union[RequestMode, str] = RequestMode.ORDERED,
+                           quorum: int = 1) -> Future:
+        """
+        在任意线程中发起请求，返回一个 concurrent.futures.Future，其结果与 request() 的返回值相同
+        """
+        mark_threadsafe_call()
+        return asyncio.run_coroutine_threadsafe(
+            self.request(event_name, data, source, timeout, mode, quorum), self._owner_loop()
+        )
 
     def publish_sync(self, event: Event) -> List[Any]:
         """
-        同步发布事件的方法
+        同步发布事件的方法，会阻塞当前线程直到所有订阅者处理完成。
+        不能在事件总线所属的事件循环线程中调用，否则会造成死锁。
         """
-        return asyncio.run(self.publish(event))
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            # 还没有主事件循环（例如在独立脚本中使用），临时创建一个
+            return asyncio.run(self.publish(event))
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            raise RuntimeError("不能在事件总线所属的事件循环中调用 publish_sync()，请使用 await publish()")
+
+        return self.publish_threadsafe(event).result()
 
     async def request(self,
                       event_name: str,
                       data: Any,
                       source: str,
-                      timeout: float = 10.0) -> Any:
+                      timeout: float = 10.0,
+                      mode: Union[RequestMode, str] = RequestMode.ORDERED,
+                      quorum: int = 1) -> Any:
         """
         请求-响应模式
-        让发布者发出请求，并等待结果
+        让发布者发出请求，并等待结果。
+
+        :param mode: 等待响应的方式，见 RequestMode：
+                     "ordered"（默认）按事件的分发方式运行所有订阅者直到完成，返回按订阅顺序的第一个非空结果，
+                     全部为空时返回 {"no_response": True}，超时返回 None，不取消任何订阅者；
+                     以下模式并发运行所有订阅者，请求结束时仍在运行的订阅者会被取消：
+                     "first" 返回最先得到的非空结果；"all" 返回所有非空结果的列表（超时返回部分结果）；
+                     "quorum" 收到 quorum 个非空结果后返回它们的列表
+        :param quorum: "quorum" 模式下需要的非空结果数量
         """
-        log.debug(f"请求事件 {event_name}，来源: {source}，数据: {data}")
+        mode = RequestMode(mode)
+        log.debug("请求事件 %s，来源: %s，数据: %s", event_name, source, data)
 
         # 检查是否有订阅者
-        if event_name not in self._subscribers or not self._subscribers[event_name]:
+        if not self._resolve(event_name):
             log.warning(f"事件 {event_name} 没有订阅者，直接返回None")
             return None
 
-        response_channel = f"response_{id(data)}_{datetime.now().timestamp()}_{event_name}"
         event = Event(
             name=event_name,
             data=data,
             source=source,
-            timestamp=datetime.now(),
-            need_response=True,
-            response_channel=response_channel
+            need_response=True
         )
+        return await self._request_event(event, timeout, mode, quorum)
+
+    async def _request_event(self, event: Event,
+                             timeout: Optional[float],
+                             mode: RequestMode = RequestMode.ORDERED,
+                             quorum: int = 1,
+                             forwarded: bool = False) -> Any:
+        """
+        以请求的方式分发一个已经构造好的事件，并按 mode 等待响应
 
-        # 获取当前事件循环
-        loop = asyncio.get_event_loop()
+        :param forwarded: 为其他进程中的请求代为分发，此时返回收到的所有非空结果（_ResultList），
+                          由发起请求的进程按自己的 mode 汇总
+        """
+        if self._rate_limiter.active and not await self._admit(event):
+            return [] if mode is RequestMode.ALL and not forwarded else None
+        event_name = event.name
+        response_channel = self._new_response_channel()
+        event.need_response = True
+        event.response_channel = response_channel
 
-        # 创建Future等待响应
-        future = loop.create_future()
-        self._response_futures[response_channel] = future
+        loop = asyncio.get_running_loop()
+        collector = _ResponseCollector(mode, quorum, loop.create_future())
+        self._response_collectors[response_channel] = collector
+        self._response_futures[response_channel] = collector.future
 
         # 标记请求为待处理
         self._pending_requests.add(response_channel)
+        topic = self.metrics.topic(event_name)
+        topic.requests += 1
+        topic.requests_pending += 1
 
+        ordered = mode is RequestMode.ORDERED
+        dispatch = loop.create_task(self._dispatch(event, None if ordered else DispatchMode.CONCURRENT))
         try:
-            # 发布事件
-            await self.publish(event)
-
             # 等待响应
             try:
-                result = await asyncio.wait_for(future, timeout=timeout)
-                log.debug(f"请求事件 {event_name} 收到响应: {result}")
-                return result
+                await asyncio.wait_for(asyncio.shield(collector.future), timeout=timeout)
             except asyncio.TimeoutError:
-                log.warning(f"请求事件 {event_name} 超时 (timeout={timeout}s)")
+                topic.request_timeouts += 1
+                log.warning(f"请求事件 {event_name} 超时 (timeout={timeout}s)，"
+                            f"已收到 {collector.responded} 个响应")
                 # 检查是否有订阅者
-                if event_name in self._subscribers:
-                    log.warning(f"事件 {event_name} 的订阅者数量: {len(self._subscribers[event_name])}")
-                return None
+                log.warning(f"事件 {event_name} 的订阅者数量: {len(self._resolve(event_name))}")
+                if ordered:
+                    return None
+
+            result = collector.collected() if forwarded else collector.outcome()
+            log.debug("请求事件 %s 收到响应: %s", event_name, result)
+            return result
 
         except Exception as e:
             log.error(f"请求事件 {event_name} 时出错: {e}", exc_info=True)
             return None
         finally:
+            if not dispatch.done():
+                if ordered:
+                    # ORDERED 模式不取消订阅者，超时后让它们在后台运行完
+                    self._keep_task(dispatch)
+                else:
+                    # 取消仍在运行的订阅者，它们的结果已经不再需要
+                    dispatch.cancel()
+            elif not dispatch.cancelled() and dispatch.exception() is not None:
+                log.error(f"分发请求事件 {event_name} 时出错: {dispatch.exception()}")
             # 清理
-            await self._response_futures.pop(response_channel, None)
+            topic.requests_pending -= 1
+            self._response_collectors.pop(response_channel, None)
+            self._response_futures.pop(response_channel, None)
             self._pending_requests.discard(response_channel)
             # 同时清理_response_handlers中对应的项
             self._response_handlers.pop(response_channel, None)
 
+    def request_stream(self,
+                       event_name: str,
+                       data: Any,
+                       source: str,
+                       buffer_size: int = 16,
+                       timeout: Optional[float] = 10.0) -> EventStream:
+        """
+        流式请求：返回一个异步迭代器，逐个产出订阅者生成的分片（例如 LLM 的 token、TTS 的音频片段）。
+
+        由第一个匹配且通过过滤器的异步生成器订阅者（async def + yield）负责生产分片；
+        没有这样的订阅者时，使用第一个匹配的普通订阅者，其返回值作为唯一的分片。
+
+        :param buffer_size: 尚未被取走的分片最多缓存的数量，缓存满时生产者暂停
+        :param timeout: 等待下一个分片的最长时间（秒），超时会抛出 asyncio.TimeoutError 并取消生产者
+        """
+        event = Event(name=event_name, data=data, source=source, need_response=True)
+        if spans_enabled():
+            assign_span(event)
+        log.debug("流式请求事件 %s，来源: %s，数据: %s", event_name, source, data)
+
+        producer = None
+        for subscriber in self._resolve(event_name):
+            if subscriber['filter'] and not subscriber['filter'](event):
+                continue
+            if subscriber['kind'] is _ASYNC_GEN:
+                producer = subscriber
+                break
+            if producer is None:
+                producer = subscriber
+
+        stats = self._stream_stats.setdefault(event_name, {
+            'streams': 0, 'active': 0, 'chunks': 0,
+            'ttfc_last': None, 'ttfc_avg': None, 'ttfc_max': None, '_ttfc_count': 0
+        })
+        stats['streams'] += 1
+        stats['active'] += 1
+
+        def on_first_chunk(latency: float) -> None:
+            count = stats['_ttfc_count'] = stats['_ttfc_count'] + 1
+            stats['ttfc_last'] = latency
+            stats['ttfc_avg'] = latency if count == 1 else stats['ttfc_avg'] + (latency - stats['ttfc_avg']) / count
+            stats['ttfc_max'] = latency if stats['ttfc_max'] is None else max(stats['ttfc_max'], latency)
+
+        def on_close(stream: EventStream) -> None:
+            stats['active'] -= 1
+            stats['chunks'] += stream.chunks
+
+        if producer is None:
+            log.warning(f"事件 {event_name} 没有订阅者，流式请求直接结束")
+
+        async def produce(put: Callable) -> None:
+            if producer is not None:
+                await self._produce_stream(producer, event, put)
+
+        return EventStream(produce, buffer_size, timeout, on_first_chunk, on_close)
+
+    async def _produce_stream(self, subscriber: Dict, event: Event, put: Callable) -> None:
+        """运行流式请求的生产者，把分片逐个放入流的缓冲区"""
+        callback = subscriber['callback']
+        # 生产者任务在流被首次迭代时才创建，这里显式设置当前事件以保持链路
+        if event.span_id is not None:
+            activate(event)
+        if subscriber['kind'] is _ASYNC_GEN:
+            chunks = callback(event)
+            try:
+                async for chunk in chunks:
+                    await put(chunk)
+            finally:
+                # 消费者提前结束时生产者任务被取消，这里关闭异步生成器让订阅者得以清理
+                await chunks.aclose()
+        else:
+            result = await self._invoke(subscriber, event)
+            if result is not None:
+                await put(result)
+
+    def get_stream_stats(self) -> Dict[str, Dict[str, Any]]:
+        """获取各事件的流式请求统计，ttfc_* 为首个分片的延迟（秒）"""
+        return {
+            event_name: {key: value for key, value in stats.items() if not key.startswith('_')}
+            for event_name, stats in self._stream_stats.items()
+        }
+
     def shutdown(self):
         """关闭事件总线，清理所有资源"""
         # 完成所有待处理的future
@@ -239,5 +1457,13 @@ class EventBus:
             if not future.done():
                 future.set_result({"shutdown": True})
 
+        for subscribers in self._subscribers.values():
+            for subscriber in subscribers:
+                self._stop_consumer(subscriber)
+
         self._executor.shutdown(wait=True)
+        for executor in self._executors.values():
+            executor.shutdown(wait=True)
+        self.disable_tracing()
+        self.disable_journal()
         log.info("事件总线已关闭")
\ No newline at end of file
@@ -0,0 +1,292 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+事件日志：把事件总线上发布的每个事件追加写入分段的二进制日志，并可以按原始节奏重放。
+
+段文件格式（小端序）：
+    段头   : magic "SCEJ" | 版本 u16 | 保留 u16 | 创建时间 u64（墙上时钟纳秒）
+    每条记录: 长度 u32 | CRC32 u32 | 事件时间 u64（墙上时钟纳秒） | pickle 后的事件字段
+
+写入只追加，不修改已有内容；进程崩溃时最后一条记录可能不完整，读取时 CRC 或长度校验失败的尾部会被忽略。
+"""
+import os
+import time
+import mmap
+import zlib
+import queue
+import pickle
+import struct
+import asyncio
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+_MAGIC = b"SCEJ"
+_VERSION = 1
+_SEGMENT_HEADER = struct.Struct('<4sHHQ')
+_RECORD_HEADER = struct.Struct('<IIQ')
+
+# 单个段文件的默认大小上限，超过后新建下一个段
+DEFAULT_SEGMENT_SIZE = 64 * 1024 * 1024
+# 写入线程每批最多合并的记录数
+_WRITE_BATCH = 1024
+
+# 重放的事件带有这个 origin，日志不会再次记录它们
+JOURNAL_ORIGIN = "journal"
+
+_SEGMENT_PREFIX = "events-"
+_SEGMENT_SUFFIX = ".journal"
+
+
+def _event_fields(event) -> Tuple:
+    priority = None if event.priority is None else int(event.priority)
+    return (event.name, event.data, event.source, event.need_response, priority,
+            event.trace_id, event.span_id, event.parent_span_id)
+
+
+def list_segments(directory: Union[str, Path]) -> List[Path]:
+    """按写入顺序列出目录中的段文件"""
+    return sorted(Path(directory).glob(f"{_SEGMENT_PREFIX}*{_SEGMENT_SUFFIX}"))
+
+
+class EventJournal:
+    """
+    事件日志的写入端。append() 在事件循环中调用，只做序列化和入队；
+    后台线程把记录批量写入当前段文件，每批写完后 flush 一次（fsync=True 时还会落盘）
+    """
+    def __init__(self, directory: Union[str, Path],
+                 segment_size: int = DEFAULT_SEGMENT_SIZE,
+                 fsync: bool = False):
+        if segment_size <= _SEGMENT_HEADER.size:
+            raise ValueError("segment_size 太小")
+
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_size = segment_size
+        self.fsync = fsync
+        # 单调时钟到墙上时钟的换算，事件时间以墙上时钟记录以便跨进程、跨重启比较
+        self._wall_offset_ns = time.time_ns() - time.monotonic_ns()
+
+        existing = list_segments(self.directory)
+        self._segment_index = int(existing[-1].name[len(_SEGMENT_PREFIX):-len(_SEGMENT_SUFFIX)]) + 1 if existing else 0
+        self._file = None
+        self._segment_bytes = 0
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._closed = False
+
+        self.records = 0
+        self.bytes = 0
+        self.segments = 0
+        self.batches = 0
+        self.skipped = 0
+
+        self._open_segment()
+        self._thread = threading.Thread(target=self._write_loop, name="EventJournal", daemon=True)
+        self._thread.start()
+
+    @property
+    def current_segment(self) -> Path:
+        return self.directory / f"{_SEGMENT_PREFIX}{self._segment_index:06d}{_SEGMENT_SUFFIX}"
+
+    def _open_segment(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._segment_index += 1
+        self._file = open(self.current_segment, 'wb')
+        self._file.write(_SEGMENT_HEADER.pack(_MAGIC, _VERSION, 0, time.time_ns()))
+        self._segment_bytes = _SEGMENT_HEADER.size
+        self.segments += 1
+
+    def append(self, event) -> bool:
+        """
+        记录一个事件，返回是否成功。事件数据无法序列化时跳过该事件
+        """
+        if self._closed:
+            return False
+        try:
+            payload = pickle.dumps(_event_fields(event), protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            self.skipped += 1
+            log.debug(f"事件 {event.name} 无法写入日志: {e}")
+            return False
+        header = _RECORD_HEADER.pack(len(payload), zlib.crc32(payload),
+                                     event.timestamp_ns + self._wall_offset_ns)
+        self._queue.put(header + payload)
+        return True
+
+    def _write_loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < _WRITE_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = batch[-1] is None
+            if stop:
+                batch.pop()
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                log.error(f"写入事件日志失败: {e}")
+            if stop:
+                return
+
+    def _write_batch(self, batch: List[bytes]) -> None:
+        if not batch:
+            return
+        chunk: List[bytes] = []
+        chunk_bytes = 0
+        for record in batch:
+            used = self._segment_bytes + chunk_bytes
+            # 当前段已有记录且放不下这条记录时换到新段；超过段大小的单条记录独占一个段
+            if used + len(record) > self.segment_size and used > _SEGMENT_HEADER.size:
+                if chunk:
+                    self._file.write(b''.join(chunk))
+                    self._segment_bytes += chunk_bytes
+                self._open_segment()
+                chunk, chunk_bytes = [], 0
+            chunk.append(record)
+            chunk_bytes += len(record)
+        self._file.write(b''.join(chunk))
+        self._segment_bytes += chunk_bytes
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+        self.records += len(batch)
+        self.bytes += sum(len(record) for record in batch)
+        self.batches += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'directory': str(self.directory),
+            'segment': self.current_segment.name,
+            'records': self.records,
+            'bytes': self.bytes,
+            'segments': self.segments,
+            'batches': self.batches,
+            'skipped': self.skipped,
+            'pending': self._queue.qsize(),
+        }
+
+    def close(self) -> None:
+        """写完队列中剩余的记录并关闭段文件"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout=10)
+        self._file.close()
+        log.info(f"事件日志已关闭，共写入 {self.records} 条记录")
+
+
+class JournalReader:
+    """
+    以内存映射的方式读取一个段文件，按顺序产出 (事件时间纳秒, 事件字段)
+    """
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.truncated = False
+
+    def __iter__(self) -> Iterator[Tuple[int, Tuple]]:
+        with open(self.path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _SEGMENT_HEADER.size:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                magic, version, _, _ = _SEGMENT_HEADER.unpack_from(mm, 0)
+                if magic != _MAGIC or version != _VERSION:
+                    raise ValueError(f"{self.path} 不是事件日志段文件")
+
+                offset = _SEGMENT_HEADER.size
+                while offset + _RECORD_HEADER.size <= size:
+                    length, crc, timestamp_ns = _RECORD_HEADER.unpack_from(mm, offset)
+                    start = offset + _RECORD_HEADER.size
+                    end = start + length
+                    if end > size:
+                        self.truncated = True
+                        return
+                    payload = mm[start:end]
+                    if zlib.crc32(payload) != crc:
+                        self.truncated = True
+                        return
+                    yield timestamp_ns, pickle.loads(payload)
+                    offset = end
+                if offset != size:
+                    self.truncated = True
+
+
+def iter_journal(path: Union[str, Path]) -> Iterator[Tuple[int, Tuple]]:
+    """读取一个段文件，或按顺序读取目录中的全部段文件"""
+    path = Path(path)
+    segments = list_segments(path) if path.is_dir() else [path]
+    for segment in segments:
+        reader = JournalReader(segment)
+        yield from reader
+        if reader.truncated:
+            log.warning(f"事件日志 {segment} 末尾有不完整的记录，已忽略")
+
+
+async def replay(event_bus, path: Union[str, Path],
+                 speed: Optional[float] = 1.0,
+                 filter_func: Optional[Callable[[str], bool]] = None) -> int:
+    """
+    把日志中的事件重新发布到事件总线，返回重放的事件数量。
+
+    重放的事件以原来的 source 发布，origin 为 JOURNAL_ORIGIN，不会再次写入日志；
+    原来需要响应的请求作为普通事件发布。
+
+    :param path: 段文件或日志目录
+    :param speed: 相对原始节奏的倍速，1.0 为原速，2.0 为两倍速，None 表示不等待、尽快重放
+    :param filter_func: 接受事件名，返回 False 的事件不重放
+    """
+    # 在函数内导入，避免与 event_bus 循环导入
+    from core.event_bus import Event
+    from core.priority_lanes import EventPriority
+
+    if speed is not None and speed <= 0:
+        raise ValueError("speed 必须大于 0")
+
+    loop = asyncio.get_running_loop()
+    first_ns = None
+    started = loop.time()
+    count = 0
+    for timestamp_ns, fields in iter_journal(path):
+        name, data, source, _, priority, trace_id, span_id, parent_span_id = fields
+        if filter_func is not None and not filter_func(name):
+            continue
+
+        if speed is not None:
+            if first_ns is None:
+                first_ns = timestamp_ns
+            delay = started + (timestamp_ns - first_ns) / 1_000_000_000 / speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        await event_bus.publish(Event(
+            name=name, data=data, source=source, origin=JOURNAL_ORIGIN,
+            priority=None if priority is None else EventPriority(priority),
+            trace_id=trace_id, span_id=span_id, parent_span_id=parent_span_id
+        ))
+        count += 1
+
+    log.info(f"事件日志 {path} 重放完成，共 {count} 个事件")
+    return count
@@ -0,0 +1,275 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import time
+from bisect import bisect_left
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+# 处理耗时直方图的桶上界（秒），与 Prometheus 客户端默认桶相近，低端更细以区分亚毫秒级的回调
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# 指标名前缀
+_PREFIX = "swarmclone"
+
+
+class LatencyHistogram:
+    """固定分桶的耗时直方图，记录一次观测只需一次二分查找"""
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        # 最后一个桶对应 +Inf
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, fraction: float) -> Optional[float]:
+        """按桶内线性插值估算分位数，落在 +Inf 桶时返回观测到的最大值"""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                if index == len(LATENCY_BUCKETS):
+                    return self.max
+                lower = LATENCY_BUCKETS[index - 1] if index else 0.0
+                upper = min(LATENCY_BUCKETS[index], self.max)
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'avg': self.total / self.count if self.count else None,
+            'p50': self.quantile(0.5),
+            'p99': self.quantile(0.99),
+            'max': self.max,
+        }
+
+
+class TopicMetrics:
+    """单个事件名的发布与请求计数"""
+    __slots__ = ('published', 'requests', 'requests_pending', 'request_timeouts')
+
+    def __init__(self):
+        self.published = 0
+        self.requests = 0
+        self.requests_pending = 0
+        self.request_timeouts = 0
+
+
+class HandlerMetrics:
+    """某个模块处理某个事件名的耗时与结果计数"""
+    __slots__ = ('latency', 'errors', 'timeouts', 'cancelled')
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.errors = 0
+        self.timeouts = 0
+        # 请求已经得到结果后被取消的处理次数
+        self.cancelled = 0
+
+
+class RouteMetrics:
+    """某条 HTTP 路由的处理耗时与异常计数"""
+    __slots__ = ('latency', 'errors')
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.errors = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**self.latency.snapshot(), 'errors': self.errors}
+
+
+class EventMetrics:
+    """
+    事件总线的指标。计数在事件循环线程中更新，不加锁；
+    汇总时（snapshot）才计算分位数和速率，热路径上只有字典查找和整数加法。
+    计数只增不减，发布速率按读取方分别计算，一个读取方（如 Prometheus 抓取）不会影响另一个读取方看到的速率
+    """
+    def __init__(self):
+        self.started = time.monotonic()
+        self.topics: Dict[str, TopicMetrics] = {}
+        # (事件名, 模块名) -> 处理指标
+        self.handlers: Dict[Tuple[str, str], HandlerMetrics] = {}
+        # 读取方 -> 该读取方上一次汇总的时间和各事件的发布次数
+        self._rate_marks: Dict[Hashable, Tuple[float, Dict[str, int]]] = {}
+
+    def topic(self, name: str) -> TopicMetrics:
+        metrics = self.topics.get(name)
+        if metrics is None:
+            metrics = self.topics[name] = TopicMetrics()
+        return metrics
+
+    def handler(self, topic: str, module: str) -> HandlerMetrics:
+        key = (topic, module)
+        metrics = self.handlers.get(key)
+        if metrics is None:
+            metrics = self.handlers[key] = HandlerMetrics()
+        return metrics
+
+    def snapshot(self, reader: Hashable = None) -> Dict[str, Any]:
+        """
+        :param reader: 读取方标识，publish_rate 是自该读取方上一次汇总以来的发布速率（次/秒），
+                       第一次汇总时是自创建以来的平均速率
+        """
+        now = time.monotonic()
+        since, last_published = self._rate_marks.get(reader, (self.started, {}))
+        elapsed = now - since
+        published = {}
+        topics = {}
+        for name, metrics in self.topics.items():
+            published[name] = metrics.published
+            delta = metrics.published - last_published.get(name, 0)
+            topics[name] = {
+                'published': metrics.published,
+                'publish_rate': delta / elapsed if elapsed > 0 else 0.0,
+                'requests': metrics.requests,
+                'requests_pending': metrics.requests_pending,
+                'request_timeouts': metrics.request_timeouts,
+            }
+        handlers = []
+        for (topic, module), metrics in self.handlers.items():
+            handlers.append({
+                'topic': topic,
+                'module': module,
+                'errors': metrics.errors,
+                'timeouts': metrics.timeouts,
+                'cancelled': metrics.cancelled,
+                'latency': metrics.latency.snapshot(),
+            })
+        self._rate_marks[reader] = (now, published)
+        return {'uptime': now - self.started, 'topics': topics, 'handlers': handlers}
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels: Any) -> str:
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def render_prometheus(metrics: EventMetrics, snapshot: Dict[str, Any],
+                      routes: Optional[Dict[str, RouteMetrics]] = None) -> str:
+    """
+    把 EventBus.get_metrics() 的结果渲染为 Prometheus 文本格式（0.0.4）。
+    直方图的桶直接从 metrics 和 routes（APIServer.route_metrics）中读取，其余数值取自 snapshot
+    """
+    lines: List[str] = []
+
+    def family(name: str, kind: str, help_text: str) -> str:
+        full_name = f"{_PREFIX}_{name}"
+        lines.append(f"# HELP {full_name} {help_text}")
+        lines.append(f"# TYPE {full_name} {kind}")
+        return full_name
+
+    topics = snapshot['topics']
+    name = family("event_published_total", "counter", "Events published per topic")
+    for topic, values in topics.items():
+        lines.append(f"{name}{_labels(topic=topic)} {values['published']}")
+    name = family("event_requests_total", "counter", "Requests issued per topic")
+    for topic, values in topics.items():
+        lines.append(f"{name}{_labels(topic=topic)} {values['requests']}")
+    name = family("event_request_timeouts_total", "counter", "Requests that timed out per topic")
+    for topic, values in topics.items():
+        lines.append(f"{name}{_labels(topic=topic)} {values['request_timeouts']}")
+    name = family("event_requests_pending", "gauge", "Requests waiting for responses per topic")
+    for topic, values in topics.items():
+        lines.append(f"{name}{_labels(topic=topic)} {values['requests_pending']}")
+
+    name = family("event_subscribers", "gauge", "Subscribers per subscription pattern")
+    for pattern, count in snapshot['subscribers'].items():
+        lines.append(f"{name}{_labels(pattern=pattern)} {count}")
+    name = family("event_pending_responses", "gauge", "Response futures not yet resolved")
+    lines.append(f"{name} {snapshot['pending_responses']}")
+
+    name = family("event_handler_seconds", "histogram", "Subscriber handling time per topic and module")
+    for (topic, module), handler in metrics.handlers.items():
+        histogram = handler.latency
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, histogram.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(topic=topic, module=module, le=bound)} {cumulative}")
+        lines.append(f"{name}_bucket{_labels(topic=topic, module=module, le='+Inf')} {histogram.count}")
+        lines.append(f"{name}_sum{_labels(topic=topic, module=module)} {histogram.total}")
+        lines.append(f"{name}_count{_labels(topic=topic, module=module)} {histogram.count}")
+    name = family("event_handler_seconds_max", "gauge", "Longest subscriber handling time per topic and module")
+    for (topic, module), handler in metrics.handlers.items():
+        lines.append(f"{name}{_labels(topic=topic, module=module)} {handler.latency.max}")
+    name = family("event_handler_errors_total", "counter", "Subscriber exceptions per topic and module")
+    for (topic, module), handler in metrics.handlers.items():
+        lines.append(f"{name}{_labels(topic=topic, module=module)} {handler.errors}")
+    name = family("event_handler_timeouts_total", "counter", "Subscriber timeouts per topic and module")
+    for (topic, module), handler in metrics.handlers.items():
+        lines.append(f"{name}{_labels(topic=topic, module=module)} {handler.timeouts}")
+    name = family("event_handler_cancelled_total", "counter",
+                  "Subscriber runs cancelled after the request was answered")
+    for (topic, module), handler in metrics.handlers.items():
+        lines.append(f"{name}{_labels(topic=topic, module=module)} {handler.cancelled}")
+
+    pools = dict(snapshot['executors']['pools'])
+    if 'http' in snapshot:
+        pools['api_server'] = snapshot['http']['executor']
+    for key, kind, help_text in (
+        ('active', 'gauge', 'Executor threads running a callback'),
+        ('queued', 'gauge', 'Callbacks waiting for an executor thread'),
+        ('saturated', 'counter', 'Submissions made while every executor thread was busy'),
+    ):
+        name = family(f"executor_{key}" + ("_total" if kind == 'counter' else ""), kind, help_text)
+        for pool, values in pools.items():
+            lines.append(f"{name}{_labels(pool=pool)} {values[key]}")
+
+    rate_limits = snapshot.get('rate_limits')
+    if rate_limits:
+        name = family("event_rate_limited_total", "counter", "Publishes delayed, dropped or rejected by rate limits")
+        for scope, section in (('topic', 'topics'), ('source', 'sources')):
+            for key, values in rate_limits[section].items():
+                for action in ('delayed', 'dropped', 'rejected'):
+                    lines.append(f"{name}{_labels(scope=scope, key=key, action=action)} {values[action]}")
+
+    if routes:
+        name = family("http_request_seconds", "histogram", "HTTP handler time per route")
+        for route, route_metrics in routes.items():
+            histogram = route_metrics.latency
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, histogram.counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(route=route, le=bound)} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(route=route, le='+Inf')} {histogram.count}")
+            lines.append(f"{name}_sum{_labels(route=route)} {histogram.total}")
+            lines.append(f"{name}_count{_labels(route=route)} {histogram.count}")
+        name = family("http_request_seconds_max", "gauge", "Longest HTTP handler time per route")
+        for route, route_metrics in routes.items():
+            lines.append(f"{name}{_labels(route=route)} {route_metrics.latency.max}")
+        name = family("http_handler_errors_total", "counter", "HTTP handler exceptions per route")
+        for route, route_metrics in routes.items():
+            lines.append(f"{name}{_labels(route=route)} {route_metrics.errors}")
+
+    return '\n'.join(lines) + '\n'
+
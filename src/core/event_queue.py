@@ -0,0 +1,207 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import itertools
+from enum import Enum
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class OverflowPolicy(Enum):
+    """订阅者队列已满时的处理策略"""
+    # 发布者等待，直到队列有空位
+    BLOCK = "block"
+    # 丢弃队列中最旧的事件，为新事件腾出位置
+    DROP_OLDEST = "drop_oldest"
+    # 丢弃新到达的事件
+    DROP_NEWEST = "drop_newest"
+    # 队列中已有相同键的事件时用新事件替换它（保持原来的排队位置），
+    # 没有相同键且队列已满时按 DROP_OLDEST 处理
+    COALESCE = "coalesce"
+
+
+class SubscriberQueue:
+    """
+    订阅者专属的有界事件队列，由一个独立的消费任务按顺序取出并处理。
+    只能在创建它的事件循环中使用。
+    """
+    def __init__(self, maxsize: int,
+                 policy: OverflowPolicy = OverflowPolicy.BLOCK,
+                 coalesce_key: Optional[Callable[[Any], Hashable]] = None):
+        if maxsize <= 0:
+            raise ValueError("maxsize 必须大于 0")
+        if policy is OverflowPolicy.COALESCE and coalesce_key is None:
+            raise ValueError("COALESCE 策略需要提供 coalesce_key")
+
+        self.maxsize = maxsize
+        self.policy = policy
+        self.coalesce_key = coalesce_key
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # 非合并策略下键是自增序号，合并策略下键是 coalesce_key(event)
+        self._items: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._seq = itertools.count()
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+
+        self.enqueued = 0
+        self.processed = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.blocked = 0
+        self.max_depth = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    async def put(self, event: Any) -> Optional[Any]:
+        """
+        放入一个事件，返回因此被丢弃或被替换的事件（没有则返回 None）
+        """
+        if self.policy is OverflowPolicy.COALESCE:
+            key = self.coalesce_key(event)
+            if key in self._items:
+                replaced = self._items[key]
+                self._items[key] = event
+                self.coalesced += 1
+                return replaced
+        else:
+            key = next(self._seq)
+
+        displaced = None
+        if len(self._items) >= self.maxsize:
+            if self.policy is OverflowPolicy.BLOCK:
+                self.blocked += 1
+                while len(self._items) >= self.maxsize:
+                    self._not_full.clear()
+                    await self._not_full.wait()
+            elif self.policy is OverflowPolicy.DROP_NEWEST:
+                self.dropped += 1
+                return event
+            else:
+                _, displaced = self._items.popitem(last=False)
+                self.dropped += 1
+
+        self._items[key] = event
+        self.enqueued += 1
+        if len(self._items) > self.max_depth:
+            self.max_depth = len(self._items)
+        self._not_empty.set()
+        return displaced
+
+    async def get(self) -> Any:
+        """取出最早的事件，队列为空时等待"""
+        while not self._items:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        _, event = self._items.popitem(last=False)
+        self._not_full.set()
+        return event
+
+    def task_done(self) -> None:
+        """消费任务处理完一个事件后调用"""
+        self.processed += 1
+
+    def drain(self) -> list:
+        """清空队列并返回其中尚未处理的事件"""
+        events = list(self._items.values())
+        self._items.clear()
+        self._not_full.set()
+        return events
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'policy': self.policy.value,
+            'maxsize': self.maxsize,
+            'depth': len(self._items),
+            'max_depth': self.max_depth,
+            'enqueued': self.enqueued,
+            'processed': self.processed,
+            'dropped': self.dropped,
+            'coalesced': self.coalesced,
+            'blocked': self.blocked,
+        }
+
+
+class EventBatcher:
+    """
+    把同一订阅者的事件攒成批次：事件数达到 max_items，
+    或距离批次中第一个事件到达已经过去 max_delay 秒时，整批交付给订阅者。
+    只能在创建它的事件循环中使用。
+    """
+    def __init__(self, max_items: int, max_delay: float):
+        if max_items <= 0:
+            raise ValueError("max_items 必须大于 0")
+        if max_delay < 0:
+            raise ValueError("max_delay 不能小于 0")
+
+        self.max_items = max_items
+        self.max_delay = max_delay
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        # 保证批次按产生的顺序依次交付
+        self.delivery_lock = asyncio.Lock()
+
+        self._pending: list = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        self.events = 0
+        self.batches = 0
+        self.max_batch = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, event: Any, on_timeout: Callable[[], None]) -> Optional[list]:
+        """
+        加入一个事件。批次已满时返回整批事件，否则返回 None；
+        批次中的第一个事件会启动一个 max_delay 秒后调用 on_timeout 的定时器
+        """
+        self._pending.append(event)
+        self.events += 1
+        if len(self._pending) >= self.max_items:
+            return self.take()
+        if self._timer is None:
+            self._timer = self.loop.call_later(self.max_delay, on_timeout)
+        return None
+
+    def take(self) -> list:
+        """取出当前的全部事件作为一个批次"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            self.batches += 1
+            if len(batch) > self.max_batch:
+                self.max_batch = len(batch)
+        return batch
+
+    def drain(self) -> list:
+        """丢弃尚未交付的事件并返回它们"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        events, self._pending = self._pending, []
+        return events
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'max_items': self.max_items,
+            'max_delay': self.max_delay,
+            'pending': len(self._pending),
+            'events': self.events,
+            'batches': self.batches,
+            'max_batch': self.max_batch,
+        }
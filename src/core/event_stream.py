@@ -0,0 +1,158 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Optional, Set
+
+
+class _StreamEnd:
+    """生产者正常结束的标记"""
+
+
+class _StreamError:
+    """生产者抛出异常的标记，消费者取到它时重新抛出异常"""
+    __slots__ = ('error',)
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+# 运行中的生产者任务，保留引用直到结束。任务不引用 EventStream 本身，
+# 这样流被丢弃时会立即被回收（见 EventStream.__del__），而不是和仍在等待的任务一起成为循环垃圾
+_producer_tasks: Set[asyncio.Task] = set()
+
+
+async def _produce(producer: Callable[[Callable[[Any], Awaitable[None]]], Awaitable[None]],
+                   buffer: asyncio.Queue) -> None:
+    try:
+        await producer(buffer.put)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        await buffer.put(_StreamError(e))
+        return
+    await buffer.put(_StreamEnd())
+
+
+class EventStream:
+    """
+    流式请求的结果，是一个异步迭代器。
+
+    生产者（订阅者的异步生成器）在独立任务中运行，产出的分片放入容量为 buffer_size 的缓冲区，
+    缓冲区满时生产者会暂停，直到消费者取走分片。消费者提前结束（aclose() 或退出 async with）、
+    等待超时或者流对象被丢弃时，生产者任务会被取消，异步生成器随之关闭。
+
+    用法：
+        async with bus.request_stream("llm.generate", prompt, "sample01") as stream:
+            async for token in stream:
+                ...
+    """
+    def __init__(self, producer: Callable[[Callable[[Any], Awaitable[None]]], Awaitable[None]],
+                 buffer_size: int = 16,
+                 timeout: Optional[float] = None,
+                 on_first_chunk: Optional[Callable[[float], None]] = None,
+                 on_close: Optional[Callable[['EventStream'], None]] = None):
+        """
+        :param producer: 接受一个 put 协程函数的协程函数，负责把分片逐个 put 进来
+        :param buffer_size: 缓冲区能容纳的分片数量
+        :param timeout: 等待下一个分片的最长时间（秒），None 表示不限时
+        :param on_first_chunk: 收到第一个分片时调用，参数为首个分片的延迟（秒）
+        :param on_close: 流结束时调用
+        """
+        self._producer = producer
+        self._buffer: asyncio.Queue = asyncio.Queue(maxsize=max(1, buffer_size))
+        self._timeout = timeout
+        self._on_first_chunk = on_first_chunk
+        self._on_close = on_close
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+        self.started_ns = time.monotonic_ns()
+        # 首个分片的延迟（秒），收到第一个分片之前为 None
+        self.time_to_first_chunk: Optional[float] = None
+        self.chunks = 0
+
+    def _start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(_produce(self._producer, self._buffer))
+            _producer_tasks.add(self._task)
+            self._task.add_done_callback(_producer_tasks.discard)
+
+    def __aiter__(self) -> 'EventStream':
+        return self
+
+    async def __anext__(self) -> Any:
+        if self._closed:
+            raise StopAsyncIteration
+        self._start()
+
+        try:
+            if self._timeout is None:
+                item = await self._buffer.get()
+            else:
+                item = await asyncio.wait_for(self._buffer.get(), timeout=self._timeout)
+        except BaseException:
+            # 超时或消费者被取消：停止生产者
+            await self.aclose()
+            raise
+
+        if isinstance(item, _StreamEnd):
+            await self.aclose()
+            raise StopAsyncIteration
+        if isinstance(item, _StreamError):
+            await self.aclose()
+            raise item.error
+
+        if self.chunks == 0:
+            self.time_to_first_chunk = (time.monotonic_ns() - self.started_ns) / 1_000_000_000
+            if self._on_first_chunk is not None:
+                self._on_first_chunk(self.time_to_first_chunk)
+        self.chunks += 1
+        return item
+
+    async def aclose(self) -> None:
+        """结束流，取消仍在运行的生产者"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._on_close is not None:
+            self._on_close(self)
+
+    def __del__(self) -> None:
+        # 没有迭代完也没有关闭就被丢弃的流：取消生产者并调用 on_close，否则统计中的活跃流数量不会减少
+        if self._closed:
+            return
+        self._closed = True
+        if self._task is not None and not self._task.done():
+            try:
+                self._task.cancel()
+            except RuntimeError:
+                # 事件循环已经关闭
+                pass
+        if self._on_close is not None:
+            self._on_close(self)
+
+    async def __aenter__(self) -> 'EventStream':
+        self._start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
@@ -0,0 +1,94 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+# 在线程中调用 *_threadsafe 方法的标记。同步订阅者如果在处理中这样做（通常随后会阻塞等待结果），
+# 就绝不能直接在事件循环中运行，否则会死锁
+_thread_state = threading.local()
+
+
+def mark_threadsafe_call() -> None:
+    """由 EventBus 的 *_threadsafe 方法调用，记录当前线程把任务交给了事件循环"""
+    _thread_state.threadsafe_call = True
+
+
+def take_threadsafe_mark() -> bool:
+    """返回并清除当前线程的标记"""
+    used = getattr(_thread_state, 'threadsafe_call', False)
+    _thread_state.threadsafe_call = False
+    return used
+
+
+class ExecutorPool(ThreadPoolExecutor):
+    """
+    带统计的线程池：记录提交、执行中、排队中的任务数量，以及提交时所有线程都在忙的次数（饱和次数）
+    """
+    def __init__(self, name: str, max_workers: int, prefix: str = "EventBus"):
+        super().__init__(max_workers=max_workers, thread_name_prefix=f"{prefix}-{name}")
+        self.name = name
+        self.max_workers = max_workers
+        self._stats_lock = threading.Lock()
+
+        self.submitted = 0
+        self.completed = 0
+        self.active = 0
+        self.max_active = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.saturated = 0
+        self.busy_time = 0.0
+
+    def submit(self, fn: Callable, /, *args: Any, **kwargs: Any) -> Future:
+        with self._stats_lock:
+            self.submitted += 1
+            if self.active + self.queued >= self.max_workers:
+                self.saturated += 1
+            self.queued += 1
+            if self.queued > self.max_queued:
+                self.max_queued = self.queued
+        return super().submit(self._run, fn, args, kwargs)
+
+    def _run(self, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        with self._stats_lock:
+            self.queued -= 1
+            self.active += 1
+            if self.active > self.max_active:
+                self.max_active = self.active
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._stats_lock:
+                self.active -= 1
+                self.completed += 1
+                self.busy_time += elapsed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                'max_workers': self.max_workers,
+                'active': self.active,
+                'queued': self.queued,
+                'max_active': self.max_active,
+                'max_queued': self.max_queued,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'saturated': self.saturated,
+                'busy_time': self.busy_time,
+            }
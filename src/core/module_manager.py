@@ -19,11 +19,14 @@ from pathlib import Path
 from dataclasses import dataclass
 from typing import Dict, List, Any, Optional, Type
 
-from utils.logger import log
+from utils.logger import get_logger
 from core.event_bus import EventBus
 from core.api_server import APIServer
 from core.base_module import BaseModule
 from core.config_manager import ConfigManager
+from core.process_transport import ProcessTransport
+
+log = get_logger(__name__)
 
 
 class ModuleState(Enum):
@@ -62,6 +65,8 @@ class ModuleManager:
 
         self.modules: Dict[str, ModuleInfo] = {}
         self.module_configs = {}
+        # 在独立工作进程中运行的模块，由 ProcessTransport 管理
+        self.transport: Optional[ProcessTransport] = None
 
         # 加载模块配置
         self._load_module_configs()
@@ -82,7 +87,13 @@ class ModuleManager:
 
         default_configs = {
             "enabled_modules": [],
-            "module_settings": {}
+            "module_settings": {},
+            # 工作进程名 -> 在该进程中运行的模块列表，如 {"cpu-1": ["agent.dummy02"]}
+            # 适合 ASR、TTS 后处理等 CPU 密集的模块，避免与主进程争抢 GIL
+            "process_workers": {},
+            # 模块完整名称 -> 该模块同步事件回调专属线程池的线程数，如 {"agent.dummy01": 4}
+            # 未配置的模块共用事件总线的默认线程池
+            "module_executors": {}
         }
 
         # 合并配置
@@ -90,6 +101,19 @@ class ModuleManager:
             if key not in self.module_configs:
                 self.module_configs[key] = value
 
+    def _worker_assignments(self) -> Dict[str, str]:
+        """模块完整名称 -> 运行它的工作进程名"""
+        assignments = {}
+        for worker_name, module_names in self.module_configs.get("process_workers", {}).items():
+            for module_name in module_names:
+                assignments[module_name] = worker_name
+        return assignments
+
+    def _local_enabled_modules(self) -> List[str]:
+        """在主进程中运行的已启用模块"""
+        assignments = self._worker_assignments()
+        return [m for m in self.module_configs.get("enabled_modules", []) if m not in assignments]
+
     def discover_modules(self):
         """
         每个模块的目录中需要包含一个 manifest.json，其内容为：
@@ -231,11 +255,15 @@ class ModuleManager:
             for key, value in module_settings[module_info.full_name].items():
                 module_info.instance.set_config(key, value)
 
+        max_workers = self.module_configs.get("module_executors", {}).get(module_info.full_name)
+        if max_workers:
+            module_info.instance.set_executor(max_workers)
+
     async def initialize_all_enabled(self) -> bool:
-        """初始化所有启用的模块"""
-        enabled_modules = self.module_configs.get("enabled_modules", [])
+        """初始化所有启用的模块（在工作进程中运行的模块由工作进程自己初始化）"""
+        enabled_modules = self._local_enabled_modules()
 
-        if not enabled_modules:
+        if not enabled_modules and not self._worker_assignments():
             log.warning("没有启用的模块")
             return False
 
@@ -309,10 +337,10 @@ class ModuleManager:
             return False
 
     async def start_all_enabled(self):
-        """启动所有启用的模块"""
-        enabled_modules = self.module_configs.get("enabled_modules", [])
+        """启动所有启用的模块，以及运行其余模块的工作进程"""
+        enabled_modules = self._local_enabled_modules()
 
-        if not enabled_modules:
+        if not enabled_modules and not self._worker_assignments():
             log.warning("没有启用的模块")
             return
 
@@ -333,6 +361,28 @@ class ModuleManager:
             else:
                 log.warning(f"启用的模块 {module_name} 未发现，跳过")
 
+        await self._start_workers()
+
+    async def _start_workers(self):
+        """启动配置中的工作进程，每个工作进程加载并启动分配给它的已启用模块"""
+        enabled = set(self.module_configs.get("enabled_modules", []))
+        workers = {
+            worker_name: [m for m in module_names if m in enabled]
+            for worker_name, module_names in self.module_configs.get("process_workers", {}).items()
+        }
+        workers = {worker_name: modules for worker_name, modules in workers.items() if modules}
+        if not workers:
+            return
+
+        if self.transport is None:
+            self.transport = ProcessTransport(self.event_bus, self.config_manager.config_file)
+        for worker_name, module_names in workers.items():
+            states = await self.transport.start_worker(worker_name, module_names)
+            for module_name in module_names:
+                if module_name in self.modules:
+                    state = states.get(module_name)
+                    self.modules[module_name].state = ModuleState(state) if state else ModuleState.ERROR
+
     def _get_startup_order(self, enabled_modules: List[str]) -> List[str]:
         """获取启动顺序：sample01最后启动"""
         if "core.sample01" in enabled_modules:
@@ -366,7 +416,14 @@ class ModuleManager:
 
     async def stop_all(self):
         """停止所有模块"""
-        enabled_modules = self.module_configs.get("enabled_modules", [])
+        if self.transport is not None:
+            await self.transport.stop()
+            self.transport = None
+            for module_name in self._worker_assignments():
+                if module_name in self.modules:
+                    self.modules[module_name].state = ModuleState.STOPPED
+
+        enabled_modules = self._local_enabled_modules()
         if enabled_modules:
             # 按照启动顺序的逆序停止
             startup_order = self._get_startup_order(enabled_modules)
@@ -0,0 +1,233 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import time
+import asyncio
+import contextvars
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from collections import deque
+from typing import Any, AsyncIterator, Dict, Optional, Union
+
+
+class EventPriority(IntEnum):
+    """事件的优先级（延迟等级），数值越小越优先"""
+    # 直接影响观众体验的事件，例如弹幕回复链路
+    INTERACTIVE = 0
+    # 默认等级
+    NORMAL = 1
+    # 周期性消息、日志等可以等待的事件
+    BACKGROUND = 2
+
+
+# 各通道的默认权重：所有通道都有事件排队时，每 12 个执行名额中分别获得 8 / 3 / 1 个
+DEFAULT_LANE_WEIGHTS = {
+    EventPriority.INTERACTIVE: 8,
+    EventPriority.NORMAL: 3,
+    EventPriority.BACKGROUND: 1,
+}
+
+# 各通道的默认延迟预算（秒），从事件创建到订阅者处理完成，超出的次数计入 over_budget
+DEFAULT_LANE_BUDGETS = {
+    EventPriority.INTERACTIVE: 0.05,
+    EventPriority.NORMAL: 0.5,
+    EventPriority.BACKGROUND: None,
+}
+
+# 计算分位数时保留的最近样本数量
+_SAMPLE_WINDOW = 1024
+
+# 当前任务是否已经持有执行名额。订阅者在处理过程中再发布事件时沿用这个名额，
+# 否则名额全部被等待子事件的父订阅者占满时会发生死锁
+_holding_slot: contextvars.ContextVar[bool] = contextvars.ContextVar('_holding_slot', default=False)
+
+
+def to_priority(value: Union[EventPriority, int, str]) -> EventPriority:
+    """把 EventPriority、整数或名称（"interactive" 等）转换为 EventPriority"""
+    if isinstance(value, str):
+        return EventPriority[value.upper()]
+    return EventPriority(value)
+
+
+class LaneStats:
+    """单个通道的延迟统计"""
+    def __init__(self, budget: Optional[float]):
+        self.budget = budget
+        self.events = 0
+        self.over_budget = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self._latencies: deque = deque(maxlen=_SAMPLE_WINDOW)
+
+    def record(self, wait: float, latency: float) -> None:
+        """
+        :param wait: 在通道中等待执行名额的时间（秒）
+        :param latency: 从事件创建到订阅者处理完成的时间（秒）
+        """
+        self.events += 1
+        self.wait_total += wait
+        if wait > self.wait_max:
+            self.wait_max = wait
+        self.latency_total += latency
+        if latency > self.latency_max:
+            self.latency_max = latency
+        self._latencies.append(latency)
+        if self.budget is not None and latency > self.budget:
+            self.over_budget += 1
+
+    def _percentile(self, fraction: float) -> Optional[float]:
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'events': self.events,
+            'budget': self.budget,
+            'over_budget': self.over_budget,
+            'wait_avg': self.wait_total / self.events if self.events else None,
+            'wait_max': self.wait_max,
+            'latency_avg': self.latency_total / self.events if self.events else None,
+            'latency_p50': self._percentile(0.5),
+            'latency_p99': self._percentile(0.99),
+            'latency_max': self.latency_max,
+        }
+
+
+class PriorityLanes:
+    """
+    按优先级分通道调度订阅者的执行，并按通道统计延迟。
+
+    设置了 max_inflight 时，同时处于执行中的订阅者调用最多 max_inflight 个（包括线程池中的同步订阅者），
+    名额不足时调用在各自优先级的通道中排队。名额空出时按平滑加权轮询从有排队的通道中挑选下一个，
+    因此高优先级通道能得到不低于其权重占比的执行份额，低优先级通道也不会被完全饿死。
+    max_inflight 为 None 时不限制并发，只统计延迟。
+    只能在创建它的事件循环中使用。
+    """
+    def __init__(self, max_inflight: Optional[int] = None,
+                 weights: Optional[Dict[Any, int]] = None,
+                 budgets: Optional[Dict[Any, Optional[float]]] = None):
+        if max_inflight is not None and max_inflight <= 0:
+            raise ValueError("max_inflight 必须大于 0")
+
+        self.max_inflight = max_inflight
+        self.weights = dict(DEFAULT_LANE_WEIGHTS)
+        for priority, weight in (weights or {}).items():
+            if weight <= 0:
+                raise ValueError("通道权重必须大于 0")
+            self.weights[to_priority(priority)] = weight
+        budget_map = dict(DEFAULT_LANE_BUDGETS)
+        for priority, budget in (budgets or {}).items():
+            budget_map[to_priority(priority)] = budget
+
+        self.inflight = 0
+        self.max_inflight_seen = 0
+        self._waiters: Dict[EventPriority, deque] = {priority: deque() for priority in EventPriority}
+        # 平滑加权轮询的当前值
+        self._credit: Dict[EventPriority, int] = {priority: 0 for priority in EventPriority}
+        self.lane_stats: Dict[EventPriority, LaneStats] = {
+            priority: LaneStats(budget_map[priority]) for priority in EventPriority
+        }
+
+    @asynccontextmanager
+    async def slot(self, priority: EventPriority) -> AsyncIterator[float]:
+        """
+        在执行名额内运行一段代码，as 得到的是排队等待的时间（秒）。
+        已经持有名额的任务（订阅者在处理中再次发布事件）直接沿用原来的名额
+        """
+        if self.max_inflight is None or _holding_slot.get():
+            yield 0.0
+            return
+
+        started_ns = time.monotonic_ns()
+        await self._acquire(priority)
+        token = _holding_slot.set(True)
+        try:
+            yield (time.monotonic_ns() - started_ns) / 1_000_000_000
+        finally:
+            _holding_slot.reset(token)
+            self._release()
+
+    async def _acquire(self, priority: EventPriority) -> None:
+        if self.inflight < self.max_inflight and not any(self._waiters.values()):
+            self._occupy()
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[priority].append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # 名额已经分配给我们但任务被取消了，转交给下一个等待者
+                self._release()
+            else:
+                self._waiters[priority].remove(waiter)
+            raise
+
+    def _occupy(self) -> None:
+        self.inflight += 1
+        if self.inflight > self.max_inflight_seen:
+            self.max_inflight_seen = self.inflight
+
+    def _release(self) -> None:
+        """归还执行名额，并按权重唤醒下一个等待者"""
+        self.inflight -= 1
+        while self.inflight < self.max_inflight:
+            priority = self._next_lane()
+            if priority is None:
+                return
+            waiter = self._waiters[priority].popleft()
+            if waiter.done():
+                continue
+            self._occupy()
+            waiter.set_result(None)
+
+    def _next_lane(self) -> Optional[EventPriority]:
+        """平滑加权轮询：只在有排队的通道之间分配"""
+        busy = [priority for priority in EventPriority if self._waiters[priority]]
+        if not busy:
+            return None
+        if len(busy) == 1:
+            return busy[0]
+        total = 0
+        chosen = None
+        for priority in busy:
+            self._credit[priority] += self.weights[priority]
+            total += self.weights[priority]
+            if chosen is None or self._credit[priority] > self._credit[chosen]:
+                chosen = priority
+        self._credit[chosen] -= total
+        return chosen
+
+    def record(self, priority: EventPriority, wait: float, latency: float) -> None:
+        self.lane_stats[priority].record(wait, latency)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'max_inflight': self.max_inflight,
+            'inflight': self.inflight,
+            'max_inflight_seen': self.max_inflight_seen,
+            'lanes': {
+                priority.name.lower(): {
+                    'weight': self.weights[priority],
+                    'waiting': len(self._waiters[priority]),
+                    **self.lane_stats[priority].stats()
+                }
+                for priority in EventPriority
+            }
+        }
@@ -0,0 +1,614 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+跨进程的事件总线传输。
+
+主进程是中心节点，每个工作进程通过一条管道与它相连，运行自己的事件循环、EventBus 和模块实例，
+模块照常使用 subscribe / publish / request：
+
+- 工作进程中的订阅会同步到主进程，主进程为其注册一个代理订阅者，把匹配的事件转发给工作进程；
+- 工作进程中产生的事件会上传到主进程，由主进程分发给本地模块和其他工作进程（不会发回来源进程）；
+- 需要响应的事件会等待远端的结果，远端按请求方的 RequestMode 等待并把所有结果交回请求方汇总，
+  请求方放弃等待时远端的处理也会被取消；
+- 事件数据中体积较大的 bytes / bytearray / memoryview / BufferPayload 通过共享内存传递，管道中只传递共享内存的名称；
+  BufferPayload 在接收方直接以共享内存为底层内存，不再复制，所有订阅者处理完成后共享内存被释放。
+  接收方打开共享内存后向发送方确认，连接断开或工作进程停止时发送方删除对方没有确认的共享内存；
+- 工作进程读取同一份 event_bus.rate_limits 配置，对本进程产生的事件先按同样的规则限流，
+  本进程的订阅者只收到放行的事件，REJECT 策略的异常在发布它的模块中抛出；上传后主进程再按自己的令牌桶
+  限流，因此事件名上的限制对所有进程合计生效。主进程转发给工作进程的事件已经过限流，工作进程不再限制；
+- 事件日志只由主进程记录：工作进程产生的事件在上传到主进程时被记录，工作进程忽略 journal_dir。
+
+HTTP 路由仍然只由主进程提供，工作进程中注册的路由不会对外服务。
+"""
+import sys
+import signal
+import abc
+import pickle
+import asyncio
+import threading
+import itertools
+import multiprocessing
+from pathlib import Path
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from utils.logger import get_logger, shutdown_logging
+from core.event_bus import EventBus, Event, RequestMode, _ResultList
+from core.buffer_pool import BufferPayload, payload_from_shared_memory, release_payloads
+from core.rate_limiter import RateLimitExceeded
+from core.priority_lanes import EventPriority
+
+log = get_logger(__name__)
+
+# 主进程在 Event.origin 中使用的名称
+MAIN_PROCESS = "main"
+# 大于等于该字节数的二进制数据通过共享内存传递
+DEFAULT_SHM_THRESHOLD = 64 * 1024
+
+
+class _SharedBlock:
+    """事件数据中被移到共享内存里的一段二进制数据的占位符"""
+    __slots__ = ('name', 'size', 'kind', 'meta')
+
+    def __init__(self, name: str, size: int, kind: type, meta: Any = None):
+        self.name = name
+        self.size = size
+        self.kind = kind
+        # BufferPayload 的元数据
+        self.meta = meta
+
+    def __reduce__(self):
+        return _SharedBlock, (self.name, self.size, self.kind, self.meta)
+
+
+def _untrack(shm: SharedMemory) -> None:
+    """
+    共享内存的生命周期由接收方负责（读取后立即 unlink），
+    不让 resource_tracker 在进程退出时重复清理或报告泄漏
+    """
+    if sys.platform != "win32":
+        try:
+            resource_tracker.unregister(shm._name, "shared_memory")  # noqa
+        except Exception:
+            pass
+
+
+def _unlink(name: str) -> None:
+    """删除一段共享内存，已经被删除时忽略"""
+    try:
+        shm = SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    shm.close()
+    try:
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _externalize(obj: Any, threshold: int, blocks: List[str]) -> Any:
+    """
+    把 obj 中较大的二进制数据复制到共享内存，返回替换为占位符后的对象。
+    创建的共享内存名称立即记入 blocks，之后的步骤失败时由调用方删除
+    """
+    kind = type(obj)
+    if kind in (bytes, bytearray, memoryview, BufferPayload):
+        size = obj.nbytes if kind is memoryview or kind is BufferPayload else len(obj)
+        if size < threshold:
+            return obj
+        shm = SharedMemory(create=True, size=size)
+        _untrack(shm)
+        blocks.append(shm.name)
+        try:
+            if kind is BufferPayload:
+                shm.buf[:size] = obj.view
+                return _SharedBlock(shm.name, size, kind, obj.meta)
+            shm.buf[:size] = obj
+            return _SharedBlock(shm.name, size, bytes if kind is memoryview else kind)
+        finally:
+            shm.close()
+    if kind is dict:
+        return {key: _externalize(value, threshold, blocks) for key, value in obj.items()}
+    if kind is list:
+        return [_externalize(value, threshold, blocks) for value in obj]
+    if kind is tuple:
+        return tuple(_externalize(value, threshold, blocks) for value in obj)
+    return obj
+
+
+def _internalize(obj: Any) -> Any:
+    """_externalize 的逆操作：从共享内存读出数据并释放共享内存"""
+    kind = type(obj)
+    if kind is _SharedBlock:
+        # 打开时向 resource_tracker 的登记由 unlink() 注销，这里不需要 _untrack
+        shm = SharedMemory(name=obj.name)
+        if obj.kind is BufferPayload:
+            # 不复制，共享内存随载荷的引用计数归零而释放
+            return payload_from_shared_memory(shm, obj.size, obj.meta)
+        try:
+            return obj.kind(shm.buf[:obj.size])
+        finally:
+            shm.close()
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                # 连接断开时发送方已经删除了它
+                pass
+    if kind is dict:
+        return {key: _internalize(value) for key, value in obj.items()}
+    if kind is list:
+        return [_internalize(value) for value in obj]
+    if kind is tuple:
+        return tuple(_internalize(value) for value in obj)
+    return obj
+
+
+def _encode(message: Tuple, threshold: int) -> Tuple[bytes, List[str]]:
+    """编码一条消息，同时返回其中用到的共享内存名称；编码失败时删除已经创建的共享内存"""
+    blocks: List[str] = []
+    try:
+        payload = _externalize(message, threshold, blocks)
+        return pickle.dumps((blocks, payload), protocol=pickle.HIGHEST_PROTOCOL), blocks
+    except BaseException:
+        for name in blocks:
+            _unlink(name)
+        raise
+
+
+def _decode(data: bytes) -> Tuple[Tuple, List[str]]:
+    """解码一条消息，同时返回已经打开（此后由本端负责删除）的共享内存名称"""
+    blocks, payload = pickle.loads(data)
+    return (_internalize(payload) if blocks else payload), blocks
+
+
+def _event_state(event: Event) -> Tuple:
+    """跨进程传递事件时需要保留的字段"""
+    priority = None if event.priority is None else int(event.priority)
+    return (event.name, event.data, event.source, event.need_response, priority,
+            event.trace_id, event.span_id, event.parent_span_id)
+
+
+def _event_from_state(state: Tuple, origin: str) -> Event:
+    name, data, source, need_response, priority, trace_id, span_id, parent_span_id = state
+    return Event(name=name, data=data, source=source, need_response=need_response, origin=origin,
+                 priority=None if priority is None else EventPriority(priority),
+                 trace_id=trace_id, span_id=span_id, parent_span_id=parent_span_id)
+
+
+class _Channel(abc.ABC):
+    """
+    管道的一端：后台线程负责接收并解码消息，再交给事件循环处理；
+    提供带请求编号的调用（call）与应答（serve），并支持取消对方正在处理的请求
+    """
+    def __init__(self, name: str, conn, loop: asyncio.AbstractEventLoop, event_bus: EventBus,
+                 shm_threshold: int = DEFAULT_SHM_THRESHOLD):
+        self.name = name
+        self.conn = conn
+        self.loop = loop
+        self.event_bus = event_bus
+        self.shm_threshold = shm_threshold
+        self.closed = False
+
+        self._send_lock = threading.Lock()
+        self._call_ids = itertools.count()
+        # 本端发出、等待对方结果的请求
+        self._pending: Dict[int, asyncio.Future] = {}
+        # 对方发来、本端正在处理的请求
+        self._serving: Dict[int, asyncio.Task] = {}
+        # 不需要回复的处理任务，保留引用防止被垃圾回收
+        self._background: Set[asyncio.Task] = set()
+        # 已经发出、对方还没有确认打开的共享内存，受 _send_lock 保护
+        self._unacked: Set[str] = set()
+        self._reader: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._reader = threading.Thread(target=self._read_loop, name=f"EventBus-channel-{self.name}",
+                                        daemon=True)
+        self._reader.start()
+
+    def send(self, message: Tuple) -> None:
+        if self.closed:
+            return
+        data, blocks = _encode(message, self.shm_threshold)
+        try:
+            with self._send_lock:
+                self._unacked.update(blocks)
+                self.conn.send_bytes(data)
+        except (OSError, ValueError) as e:
+            log.warning(f"向 {self.name} 发送消息失败: {e}")
+            with self._send_lock:
+                self._unacked.difference_update(blocks)
+            for name in blocks:
+                _unlink(name)
+
+    def release_blocks(self) -> None:
+        """删除已经发出但对方没有确认打开的共享内存，在对方退出或连接断开后调用"""
+        with self._send_lock:
+            blocks, self._unacked = self._unacked, set()
+        for name in blocks:
+            _unlink(name)
+        if blocks:
+            log.warning(f"{self.name} 没有接收 {len(blocks)} 段共享内存，已删除")
+
+    async def call(self, kind: str, *payload: Any) -> Any:
+        """发送一条需要结果的消息并等待结果，被取消时通知对方取消处理"""
+        call_id = next(self._call_ids)
+        future = self.loop.create_future()
+        self._pending[call_id] = future
+        self.send((kind, *payload, call_id))
+        try:
+            return await future
+        except asyncio.CancelledError:
+            self.send(('cancel', call_id))
+            raise
+        finally:
+            self._pending.pop(call_id, None)
+
+    def serve(self, call_id: Optional[int], coro) -> None:
+        """在事件循环中处理对方发来的消息，call_id 不为 None 时把结果发回对方"""
+        task = self.loop.create_task(coro)
+        if call_id is None:
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+            return
+        self._serving[call_id] = task
+
+        def reply(done: asyncio.Task) -> None:
+            self._serving.pop(call_id, None)
+            if done.cancelled():
+                return
+            error = done.exception()
+            if error is not None:
+                log.error(f"处理来自 {self.name} 的请求时出错: {error}")
+            self.send(('result', call_id, None if error is not None else done.result()))
+
+        task.add_done_callback(reply)
+
+    async def forward(self, kind: str, event: Event) -> Any:
+        """
+        把事件发给对方。需要响应时按发起请求的 RequestMode 在对方分发，
+        返回对方收到的所有非空结果（_ResultList），由本端的请求汇总
+        """
+        state = _event_state(event)
+        if not event.need_response:
+            self.send((kind, state, None, None))
+            return None
+        request = self.event_bus._request_mode(event.response_channel)
+        if request is None:
+            # 不是由 request() 发起的（例如带响应处理器的 publish），只需要第一个结果
+            results = await self.call(kind, state, (RequestMode.ORDERED.value, 1))
+            return results[0] if results else None
+        mode, quorum = request
+        return await self.call(kind, state, (mode.value, quorum))
+
+    def publish_received(self, event: Event, request: Optional[Tuple[str, int]],
+                         call_id: Optional[int]) -> None:
+        """
+        把对方发来的事件发布到本端的事件总线，call_id 不为 None 时按 request 中的等待方式和 quorum
+        分发，并把收到的所有结果发回对方
+        """
+        if call_id is None:
+            self.serve(None, self._publish_received(event, self.event_bus.publish(event)))
+        else:
+            mode, quorum = request
+            self.serve(call_id, self._publish_received(
+                event, self.event_bus._request_event(event, None, RequestMode(mode), quorum, forwarded=True)
+            ))
+
+    @staticmethod
+    async def _publish_received(event: Event, coro) -> Any:
+        try:
+            return await coro
+        except RateLimitExceeded as e:
+            log.warning(str(e))
+            return None
+        finally:
+            # 解码时创建的 BufferPayload 由本端持有第一个引用，总线分发完毕后释放
+            release_payloads(event.data)
+
+    def _read_loop(self) -> None:
+        # 对方关闭了连接（而不是本端关闭）时，对方不会再打开本端发出的共享内存
+        peer_closed = False
+        while True:
+            try:
+                data = self.conn.recv_bytes()
+                message, blocks = _decode(data)
+            except EOFError:
+                peer_closed = True
+                break
+            except OSError:
+                break
+            except Exception as e:
+                log.error(f"解码来自 {self.name} 的消息失败: {e}")
+                continue
+            if blocks:
+                self.send(('ack', blocks))
+            try:
+                self.loop.call_soon_threadsafe(self._dispatch, message)
+            except RuntimeError:
+                # 事件循环已经关闭
+                return
+        try:
+            self.loop.call_soon_threadsafe(self._close, peer_closed)
+        except RuntimeError:
+            pass
+
+    def _dispatch(self, message: Tuple) -> None:
+        kind = message[0]
+        if kind == 'result':
+            future = self._pending.get(message[1])
+            if future is not None and not future.done():
+                future.set_result(message[2])
+        elif kind == 'cancel':
+            task = self._serving.pop(message[1], None)
+            if task is not None:
+                task.cancel()
+        elif kind == 'ack':
+            with self._send_lock:
+                self._unacked.difference_update(message[1])
+        else:
+            self.on_message(message)
+
+    def _close(self, peer_closed: bool = False) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        if peer_closed:
+            self.release_blocks()
+        for future in self._pending.values():
+            if not future.done():
+                future.set_result(None)
+        for task in self._serving.values():
+            task.cancel()
+        self._serving.clear()
+        self.on_closed()
+
+    @abc.abstractmethod
+    def on_message(self, message: Tuple) -> None:
+        """处理对方发来的、不属于调用应答的消息"""
+        pass
+
+    def on_closed(self) -> None:
+        pass
+
+
+class WorkerHandle(_Channel):
+    """主进程中代表一个工作进程的连接"""
+    def __init__(self, name: str, process, conn, event_bus: EventBus,
+                 loop: asyncio.AbstractEventLoop, shm_threshold: int):
+        super().__init__(name, conn, loop, event_bus, shm_threshold)
+        self.process = process
+        self.ready: asyncio.Future = loop.create_future()
+        self.stopped: asyncio.Future = loop.create_future()
+        # 工作进程订阅的模式 -> 在主进程总线上注册的代理订阅者
+        self._proxies: Dict[str, Callable] = {}
+
+    def on_message(self, message: Tuple) -> None:
+        kind = message[0]
+        if kind == 'subscribe':
+            self._subscribe(message[1])
+        elif kind == 'unsubscribe':
+            proxy = self._proxies.pop(message[1], None)
+            if proxy is not None:
+                self.event_bus.unsubscribe(message[1], proxy)
+        elif kind == 'publish':
+            _, state, request, call_id = message
+            self.publish_received(_event_from_state(state, self.name), request, call_id)
+        elif kind == 'ready':
+            if not self.ready.done():
+                self.ready.set_result(message[1])
+        elif kind == 'stopped':
+            if not self.stopped.done():
+                self.stopped.set_result(True)
+
+    def _subscribe(self, pattern: str) -> None:
+        if pattern in self._proxies:
+            return
+
+        async def forward(event: Event) -> Any:
+            return await self.forward('deliver', event)
+
+        forward.__qualname__ = f"worker[{self.name}]"
+        self._proxies[pattern] = forward
+        # 不把事件转发回产生它的工作进程
+        self.event_bus.subscribe(pattern, forward, filter_func=lambda event: event.origin != self.name)
+
+    def on_closed(self) -> None:
+        for pattern, proxy in list(self._proxies.items()):
+            self.event_bus.unsubscribe(pattern, proxy)
+        self._proxies.clear()
+        if not self.ready.done():
+            self.ready.set_result(None)
+        if not self.stopped.done():
+            self.stopped.set_result(True)
+        log.info(f"工作进程 {self.name} 的连接已关闭")
+
+
+class ProcessTransport:
+    """
+    主进程一侧的跨进程传输，负责启动、连接和停止工作进程
+    """
+    def __init__(self, event_bus: EventBus,
+                 config_file: Path = Path("config.json"),
+                 shm_threshold: int = DEFAULT_SHM_THRESHOLD):
+        self.event_bus = event_bus
+        self.config_file = config_file
+        self.shm_threshold = shm_threshold
+        self.workers: Dict[str, WorkerHandle] = {}
+        # 使用 spawn 启动，保证各平台行为一致，且子进程不会继承主进程的线程和事件循环
+        self._context = multiprocessing.get_context("spawn")
+
+    async def start_worker(self, worker_name: str, module_names: List[str],
+                           timeout: float = 30.0) -> Dict[str, str]:
+        """
+        启动一个工作进程并在其中加载、启动指定的模块
+
+        :param worker_name: 工作进程名称，会出现在 Event.origin 中
+        :param module_names: 模块完整名称列表，如 ["agent.dummy02"]
+        :return: 模块完整名称 -> 模块状态（ModuleState 的值）
+        """
+        if worker_name in self.workers:
+            raise ValueError(f"工作进程 {worker_name} 已存在")
+
+        loop = asyncio.get_running_loop()
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(worker_name, module_names, child_conn, str(self.config_file), self.shm_threshold),
+            name=f"SwarmClone-{worker_name}",
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+
+        handle = WorkerHandle(worker_name, process, parent_conn, self.event_bus, loop, self.shm_threshold)
+        handle.start()
+        self.workers[worker_name] = handle
+
+        try:
+            states = await asyncio.wait_for(asyncio.shield(handle.ready), timeout=timeout)
+        except asyncio.TimeoutError:
+            log.error(f"工作进程 {worker_name} 启动超时")
+            states = None
+        if states is None:
+            log.error(f"工作进程 {worker_name} 启动失败")
+            return {}
+
+        log.info(f"工作进程 {worker_name} (pid={process.pid}) 已启动，模块: {states}")
+        return states
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """通知所有工作进程停止模块并退出"""
+        for name, handle in list(self.workers.items()):
+            handle.send(('stop',))
+            try:
+                await asyncio.wait_for(asyncio.shield(handle.stopped), timeout=timeout)
+            except asyncio.TimeoutError:
+                log.warning(f"工作进程 {name} 停止超时，强制结束")
+            await asyncio.to_thread(handle.process.join, timeout)
+            if handle.process.is_alive():
+                handle.process.terminate()
+            # 工作进程已经退出，它没有打开的共享内存不会再有人删除
+            handle.release_blocks()
+            handle.conn.close()
+            del self.workers[name]
+            log.info(f"工作进程 {name} 已停止")
+
+
+class WorkerLink(_Channel):
+    """工作进程一侧与主进程的连接，作为工作进程中 EventBus 的传输挂接"""
+    def __init__(self, name: str, conn, event_bus: EventBus,
+                 loop: asyncio.AbstractEventLoop, shm_threshold: int):
+        super().__init__(MAIN_PROCESS, conn, loop, event_bus, shm_threshold)
+        self.worker_name = name
+        self.stop_requested: asyncio.Future = loop.create_future()
+        self._pattern_counts: Dict[str, int] = {}
+
+        # 本进程产生的事件全部上传给主进程，由主进程决定转发给谁
+        event_bus.subscribe("#", self._uplink, filter_func=lambda event: event.origin is None)
+        event_bus.attach_transport(self)
+        # 主进程转发来的事件已经由主进程限流
+        event_bus._admitted_origins.add(MAIN_PROCESS)
+
+    async def _uplink(self, event: Event) -> Any:
+        return await self.forward('publish', event)
+
+    def on_subscribe(self, event_name: str, callback: Callable) -> None:
+        count = self._pattern_counts.get(event_name, 0)
+        self._pattern_counts[event_name] = count + 1
+        if count == 0:
+            self.send(('subscribe', event_name))
+
+    def on_unsubscribe(self, event_name: str, callback: Callable) -> None:
+        count = self._pattern_counts.get(event_name, 0) - 1
+        if count > 0:
+            self._pattern_counts[event_name] = count
+            return
+        if self._pattern_counts.pop(event_name, None) is not None:
+            self.send(('unsubscribe', event_name))
+
+    def on_message(self, message: Tuple) -> None:
+        kind = message[0]
+        if kind == 'deliver':
+            _, state, request, call_id = message
+            self.publish_received(_event_from_state(state, MAIN_PROCESS), request, call_id)
+        elif kind == 'stop':
+            if not self.stop_requested.done():
+                self.stop_requested.set_result(True)
+
+    def on_closed(self) -> None:
+        # 主进程已经退出
+        if not self.stop_requested.done():
+            self.stop_requested.set_result(True)
+
+
+def _worker_main(worker_name: str, module_names: List[str], conn,
+                 config_file: str, shm_threshold: int) -> None:
+    """工作进程入口"""
+    # 终端的 Ctrl+C 会发给整个进程组，工作进程忽略它，等主进程发来 stop 后再有序退出，
+    # 以便停止模块并写完追踪文件等
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        asyncio.run(_worker_async_main(worker_name, module_names, conn, config_file, shm_threshold))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # multiprocessing 的子进程退出时不执行 atexit，需要手动写完后台日志队列
+        shutdown_logging()
+
+
+async def _worker_async_main(worker_name: str, module_names: List[str], conn,
+                             config_file: str, shm_threshold: int) -> None:
+    # 在函数内导入，避免与 module_manager 循环导入
+    from core.api_server import APIServer
+    from core.config_manager import ConfigManager
+    from core.module_manager import ModuleManager
+
+    loop = asyncio.get_running_loop()
+    event_bus = EventBus()
+    event_bus.bind_loop(loop)
+    link = WorkerLink(worker_name, conn, event_bus, loop, shm_threshold)
+    link.start()
+
+    config_manager = ConfigManager(Path(config_file))
+    trace_file = config_manager.get("event_bus", "trace_file")
+    if trace_file:
+        # 每个工作进程写自己的追踪文件，trace_id 在进程之间保持一致
+        trace_path = Path(trace_file)
+        event_bus.enable_tracing(trace_path.with_name(f"{trace_path.stem}.{worker_name}{trace_path.suffix}"))
+    # 与主进程使用同样的发布频率限制，运行中修改配置同样立即生效
+    config_manager.register("event_bus", "rate_limits", {}, event_bus.configure_rate_limits)
+    event_bus.configure_rate_limits(config_manager.get("event_bus", "rate_limits"))
+    # 工作进程不启动 HTTP 服务，模块注册的路由不会对外提供
+    api_server = APIServer(port=0)
+    module_manager = ModuleManager(config_manager, api_server, event_bus)
+    module_manager.discover_modules()
+
+    states = {}
+    for module_name in module_names:
+        if await module_manager.load_and_initialize_module(module_name):
+            await module_manager.start_module(module_name)
+        states[module_name] = module_manager.get_module_state(module_name).value
+    log.info(f"工作进程 {worker_name} 已就绪，模块: {states}")
+    link.send(('ready', states))
+
+    await link.stop_requested
+
+    for module_name in reversed(module_names):
+        await module_manager.stop_module(module_name)
+    event_bus.shutdown()
+    link.send(('stopped',))
+    conn.close()
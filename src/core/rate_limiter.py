@@ -0,0 +1,222 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+事件总线的发布限流：按事件名（可以是通配模式）和按事件来源（Event.source）设置令牌桶。
+
+配置格式（config.json 中的 event_bus.rate_limits，也可以直接传给 EventBus.configure_rate_limits）：
+
+    {
+        "topics":  {"dummy01.message": {"rate": 2, "burst": 5, "policy": "drop"}},
+        "sources": {"agent.dummy01":   {"rate": 20, "policy": "delay"}}
+    }
+
+rate 为每秒补充的令牌数，burst 为桶容量（默认取 rate 与 1 中较大者），
+policy 为超出限制时的策略，见 RateLimitPolicy。
+DELAY 策略下排队等待的发布者最多预支 burst 个令牌（即最长等待 burst / rate 秒），超出后的事件被丢弃，
+避免持续超速的发布者积累无限长的等待。
+"""
+import time
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from core.topic_trie import TopicTrie, is_pattern
+
+
+class RateLimitPolicy(Enum):
+    """超出限制时的处理策略"""
+    # 发布者等待到有令牌为止（对发布者形成背压）；预支的令牌达到 burst 后丢弃事件
+    DELAY = "delay"
+    # 丢弃事件，发布者不会察觉
+    DROP = "drop"
+    # 丢弃事件并抛出 RateLimitExceeded
+    REJECT = "reject"
+
+
+class RateLimitExceeded(Exception):
+    """事件因超出 REJECT 策略的限制而被拒绝"""
+    def __init__(self, event_name: str, scope: str, key: str):
+        super().__init__(f"事件 {event_name} 超出{'事件' if scope == 'topic' else '来源'} {key} 的发布频率限制")
+        self.event_name = event_name
+        self.scope = scope
+        self.key = key
+
+
+class TokenBucket:
+    """令牌桶，以及经过它的事件的计数"""
+    __slots__ = ('rate', 'burst', 'policy', 'tokens', 'updated',
+                 'allowed', 'delayed', 'dropped', 'rejected', 'delay_total')
+
+    def __init__(self, rate: float, burst: Optional[float] = None,
+                 policy: Union[RateLimitPolicy, str] = RateLimitPolicy.DELAY):
+        if rate <= 0:
+            raise ValueError("rate 必须大于 0")
+        self.rate = float(rate)
+        self.burst = float(burst) if burst else max(1.0, self.rate)
+        self.policy = RateLimitPolicy(policy)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+        self.allowed = 0
+        self.delayed = 0
+        self.dropped = 0
+        self.rejected = 0
+        # DELAY 策略下累计让发布者等待的时间（秒）
+        self.delay_total = 0.0
+
+    def refill(self, now: float) -> None:
+        tokens = self.tokens + (now - self.updated) * self.rate
+        self.tokens = tokens if tokens < self.burst else self.burst
+        self.updated = now
+
+    def take(self) -> float:
+        """
+        取走一个令牌，返回取得令牌前需要等待的秒数。
+        令牌不足时令牌数可以为负（最低为 -burst，由 RateLimiter.check 保证），后来的发布者排在其后等待
+        """
+        self.tokens -= 1
+        self.allowed += 1
+        if self.tokens >= 0:
+            return 0.0
+        wait = -self.tokens / self.rate
+        self.delayed += 1
+        self.delay_total += wait
+        return wait
+
+    def exhausted(self) -> bool:
+        """取走一个令牌是否会超出限制：DROP/REJECT 需要一个完整的令牌，DELAY 最多预支 burst 个"""
+        if self.policy is RateLimitPolicy.DELAY:
+            return self.tokens - 1 < -self.burst
+        return self.tokens < 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'rate': self.rate,
+            'burst': self.burst,
+            'policy': self.policy.value,
+            'tokens': min(self.burst, self.tokens + (time.monotonic() - self.updated) * self.rate),
+            'allowed': self.allowed,
+            'delayed': self.delayed,
+            'dropped': self.dropped,
+            'rejected': self.rejected,
+            'delay_total': self.delay_total,
+        }
+
+
+class RateLimiter:
+    """
+    事件名与来源两个维度的令牌桶集合。一个事件同时受匹配的事件名限制和来源限制约束，
+    只要有一个 DROP/REJECT 桶没有令牌，或一个 DELAY 桶的预支达到上限，事件就会被丢弃或拒绝，
+    此时不消耗其他桶的令牌。
+    只在事件总线所属的事件循环中使用，不加锁
+    """
+    def __init__(self):
+        self._topics: Dict[str, TokenBucket] = {}
+        self._sources: Dict[str, TokenBucket] = {}
+        # 只包含带通配符的事件名限制
+        self._pattern_trie = TopicTrie()
+        # 事件名 -> 适用的 (事件名或模式, 令牌桶)，在限制变化时失效
+        self._topic_cache: Dict[str, List[Tuple[str, TokenBucket]]] = {}
+
+    @property
+    def active(self) -> bool:
+        return bool(self._topics or self._sources)
+
+    def set_limit(self, scope: str, key: str, rate: float,
+                  burst: Optional[float] = None,
+                  policy: Union[RateLimitPolicy, str] = RateLimitPolicy.DELAY) -> None:
+        """
+        设置一个限制
+
+        :param scope: "topic"（key 为事件名或通配模式）或 "source"（key 为 Event.source）
+        """
+        bucket = TokenBucket(rate, burst, policy)
+        if scope == "topic":
+            self._topics[key] = bucket
+            if is_pattern(key):
+                self._pattern_trie.add(key)
+            self._topic_cache.clear()
+        elif scope == "source":
+            self._sources[key] = bucket
+        else:
+            raise ValueError(f"未知的限流范围: {scope}")
+
+    def remove_limit(self, scope: str, key: str) -> None:
+        if scope == "topic":
+            if self._topics.pop(key, None) is not None and is_pattern(key):
+                self._pattern_trie.remove(key)
+            self._topic_cache.clear()
+        elif scope == "source":
+            self._sources.pop(key, None)
+
+    def configure(self, config: Optional[Dict[str, Any]]) -> None:
+        """按配置替换全部限制，格式见模块说明。配置无效时抛出异常，原有的限制保持不变"""
+        limiter = RateLimiter()
+        for scope, section in (("topic", "topics"), ("source", "sources")):
+            for key, limit in ((config or {}).get(section) or {}).items():
+                limiter.set_limit(scope, key, limit['rate'], limit.get('burst'),
+                                  limit.get('policy', RateLimitPolicy.DELAY.value))
+        self._topics = limiter._topics
+        self._sources = limiter._sources
+        self._pattern_trie = limiter._pattern_trie
+        self._topic_cache.clear()
+
+    def _topic_buckets(self, event_name: str) -> List[Tuple[str, TokenBucket]]:
+        buckets = self._topic_cache.get(event_name)
+        if buckets is None:
+            buckets = []
+            bucket = self._topics.get(event_name)
+            if bucket is not None:
+                buckets.append((event_name, bucket))
+            if len(self._pattern_trie):
+                for pattern in self._pattern_trie.match(event_name):
+                    if pattern != event_name:
+                        buckets.append((pattern, self._topics[pattern]))
+            self._topic_cache[event_name] = buckets
+        return buckets
+
+    def check(self, event_name: str, source: str) -> Optional[float]:
+        """
+        为一次发布取令牌。返回发布前需要等待的秒数；事件应被丢弃时返回 None；
+        应被拒绝时抛出 RateLimitExceeded
+        """
+        buckets = [('topic', key, bucket) for key, bucket in self._topic_buckets(event_name)]
+        bucket = self._sources.get(source)
+        if bucket is not None:
+            buckets.append(('source', source, bucket))
+        if not buckets:
+            return 0.0
+
+        now = time.monotonic()
+        for scope, key, bucket in buckets:
+            bucket.refill(now)
+            if bucket.exhausted():
+                if bucket.policy is not RateLimitPolicy.REJECT:
+                    bucket.dropped += 1
+                    return None
+                bucket.rejected += 1
+                raise RateLimitExceeded(event_name, scope, key)
+
+        wait = 0.0
+        for _, _, bucket in buckets:
+            bucket_wait = bucket.take()
+            if bucket_wait > wait:
+                wait = bucket_wait
+        return wait
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            'topics': {key: bucket.stats() for key, bucket in self._topics.items()},
+            'sources': {key: bucket.stats() for key, bucket in self._sources.items()},
+        }
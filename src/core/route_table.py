@@ -0,0 +1,141 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+APIServer 的路由表。
+
+路由路径按 "/" 分段，"{name}" 形式的分段是路径参数，匹配任意一个非空分段，例如
+"/agent/{module}/session/{id}" 匹配 "/agent/dummy01/session/42"，得到 {"module": "dummy01", "id": "42"}。
+同一位置上固定分段优先于路径参数。
+
+RouteTable 创建后不再修改：增删路由时构建新的路由表整体替换，处理请求时读取当前的路由表无需加锁。
+"""
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+SEPARATOR = "/"
+
+_PARAM = re.compile(r"^\{([A-Za-z_][A-Za-z0-9_]*)\}$")
+
+
+def route_params(path: str) -> List[str]:
+    """
+    返回路由路径中的参数名，没有参数时为空列表。
+    分段中含有花括号但不是合法的 "{name}" 形式，或者参数名重复时抛出 ValueError
+    """
+    names = []
+    for segment in path.split(SEPARATOR):
+        match = _PARAM.match(segment)
+        if match is None:
+            if '{' in segment or '}' in segment:
+                raise ValueError(f"路由 {path} 中的分段 {segment} 不是合法的路径参数")
+            continue
+        if match.group(1) in names:
+            raise ValueError(f"路由 {path} 中的路径参数 {match.group(1)} 重复")
+        names.append(match.group(1))
+    return names
+
+
+class _RouteNode:
+    __slots__ = ('children', 'param', 'route')
+
+    def __init__(self):
+        self.children: Dict[str, '_RouteNode'] = {}
+        # 路径参数分段对应的子节点，参数名记录在路由上，不同路由在同一位置可以使用不同的参数名
+        self.param: Optional['_RouteNode'] = None
+        # 以该节点结尾的路由信息，没有则为 None
+        self.route: Optional[Dict[str, Any]] = None
+
+
+class RouteTable:
+    """
+    不可变的路由表。不带参数的路由直接按路径查字典；带参数的路由放在按分段组织的前缀树中，
+    匹配耗时与路径深度相关，与路由数量无关。
+
+    :param routes: 路径 -> 路由信息，路由信息中的 'params' 为 route_params() 得到的参数名
+    """
+    __slots__ = ('routes', '_static', '_root')
+
+    def __init__(self, routes: Dict[str, Dict[str, Any]]):
+        self.routes = routes
+        self._static: Dict[str, Dict[str, Any]] = {}
+        self._root: Optional[_RouteNode] = None
+        for path, route in routes.items():
+            if route['params']:
+                self._insert(path, route)
+            else:
+                self._static[path] = route
+
+    def _insert(self, path: str, route: Dict[str, Any]) -> None:
+        if self._root is None:
+            self._root = _RouteNode()
+        node = self._root
+        for segment in path.split(SEPARATOR)[1:]:
+            if _PARAM.match(segment):
+                if node.param is None:
+                    node.param = _RouteNode()
+                node = node.param
+            else:
+                child = node.children.get(segment)
+                if child is None:
+                    child = node.children[segment] = _RouteNode()
+                node = child
+        if node.route is not None:
+            raise ValueError(f"路由 {path} 与 {node.route['path']} 冲突")
+        node.route = route
+
+    def with_route(self, path: str, route: Dict[str, Any]) -> 'RouteTable':
+        """返回添加（或替换）了一条路由的新路由表"""
+        # 与已有路由冲突时在构建新表的过程中抛出异常，当前路由表不受影响
+        routes = dict(self.routes)
+        routes[path] = route
+        return RouteTable(routes)
+
+    def without_route(self, path: str) -> 'RouteTable':
+        """返回移除了一条路由的新路由表"""
+        routes = dict(self.routes)
+        del routes[path]
+        return RouteTable(routes)
+
+    def match(self, path: str) -> Optional[Tuple[Dict[str, Any], Dict[str, str]]]:
+        """返回与请求路径匹配的 (路由信息, 路径参数)，没有匹配的路由时返回 None"""
+        route = self._static.get(path)
+        if route is not None:
+            return route, {}
+        if self._root is None or not path.startswith(SEPARATOR):
+            return None
+        values: List[str] = []
+        route = self._match(self._root, path.split(SEPARATOR)[1:], 0, values)
+        if route is None:
+            return None
+        return route, dict(zip(route['params'], values))
+
+    def _match(self, node: _RouteNode, segments: List[str], index: int,
+               values: List[str]) -> Optional[Dict[str, Any]]:
+        if index == len(segments):
+            return node.route
+        segment = segments[index]
+        child = node.children.get(segment)
+        if child is not None:
+            route = self._match(child, segments, index + 1, values)
+            if route is not None:
+                return route
+        # 固定分段没有匹配时再尝试路径参数
+        if node.param is not None and segment:
+            values.append(segment)
+            route = self._match(node.param, segments, index + 1, values)
+            if route is not None:
+                return route
+            values.pop()
+        return None
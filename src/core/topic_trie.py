@@ -0,0 +1,112 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from typing import Dict, List, Optional, Set
+
+# 主题按 "." 分段，例如 "dummy02.process" 分为 ["dummy02", "process"]
+SEPARATOR = "."
+# 匹配恰好一个分段，例如 "dummy02.*" 匹配 "dummy02.process"，但不匹配 "dummy02.a.b"
+SINGLE_WILDCARD = "*"
+# 匹配零个或多个分段，例如 "dummy02.#" 匹配 "dummy02"、"dummy02.process" 和 "dummy02.a.b"
+MULTI_WILDCARD = "#"
+
+
+def is_pattern(topic: str) -> bool:
+    """判断主题是否包含通配符分段"""
+    for segment in topic.split(SEPARATOR):
+        if segment == SINGLE_WILDCARD or segment == MULTI_WILDCARD:
+            return True
+    return False
+
+
+class _TrieNode:
+    __slots__ = ('children', 'pattern')
+
+    def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        # 以该节点结尾的订阅模式，没有则为 None
+        self.pattern: Optional[str] = None
+
+
+class TopicTrie:
+    """
+    订阅模式的前缀树，每个节点对应主题的一个分段。
+    匹配一个具体的主题时只需要沿着分段向下查找，耗时与主题深度相关，与模式数量无关。
+    """
+    def __init__(self):
+        self._root = _TrieNode()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, pattern: str) -> None:
+        """添加一个订阅模式，重复添加不会产生副作用"""
+        node = self._root
+        for segment in pattern.split(SEPARATOR):
+            child = node.children.get(segment)
+            if child is None:
+                child = node.children[segment] = _TrieNode()
+            node = child
+        if node.pattern is None:
+            node.pattern = pattern
+            self._size += 1
+
+    def remove(self, pattern: str) -> bool:
+        """移除一个订阅模式，并清理不再使用的节点。返回模式是否存在"""
+        path = [self._root]
+        for segment in pattern.split(SEPARATOR):
+            child = path[-1].children.get(segment)
+            if child is None:
+                return False
+            path.append(child)
+
+        if path[-1].pattern is None:
+            return False
+        path[-1].pattern = None
+        self._size -= 1
+
+        # 自底向上删除没有子节点也没有模式的节点
+        segments = pattern.split(SEPARATOR)
+        for index in range(len(segments), 0, -1):
+            node = path[index]
+            if node.children or node.pattern is not None:
+                break
+            del path[index - 1].children[segments[index - 1]]
+        return True
+
+    def match(self, topic: str) -> List[str]:
+        """返回所有与具体主题匹配的订阅模式"""
+        matched: Set[str] = set()
+        self._match(self._root, topic.split(SEPARATOR), 0, matched)
+        return list(matched)
+
+    def _match(self, node: _TrieNode, segments: List[str], index: int, matched: Set[str]) -> None:
+        multi = node.children.get(MULTI_WILDCARD)
+        if multi is not None:
+            # "#" 可以吞掉剩余的任意数量（包括零个）分段
+            for next_index in range(index, len(segments) + 1):
+                self._match(multi, segments, next_index, matched)
+
+        if index == len(segments):
+            if node.pattern is not None:
+                matched.add(node.pattern)
+            return
+
+        exact = node.children.get(segments[index])
+        if exact is not None:
+            self._match(exact, segments, index + 1, matched)
+        single = node.children.get(SINGLE_WILDCARD)
+        if single is not None:
+            self._match(single, segments, index + 1, matched)
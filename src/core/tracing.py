@@ -0,0 +1,232 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+事件链路追踪。
+
+启用追踪文件或结构化日志的事件字段（enable_log_context）之后，每个事件在分发时得到一个 span_id；
+如果它是在另一个事件的处理过程中发布的（包括线程池中的同步订阅者），则继承那个事件的 trace_id，
+并把那个事件的 span_id 记为 parent_span_id，否则开启一条新的 trace。
+当前正在处理的事件保存在上下文变量中，模块无需手动传递。两者都没有启用时事件不分配 span，
+也不设置当前事件，分发时没有额外开销（从其他进程收到的事件仍然保留原有的 trace）。
+启用 JSON lines 日志（utils.logger.enable_json_logs）并调用 enable_log_context() 后，
+处理事件期间写下的日志会带上事件名和 trace 字段。
+
+启用追踪后，每次订阅者处理都会以 Chrome Trace Event 格式（JSON 数组）写入文件，
+每个模块一条轨道，事件从发布者到处理者之间用流向箭头连接，可以直接用 chrome://tracing 或
+https://ui.perfetto.dev 离线打开。
+"""
+import os
+import json
+import time
+import queue
+import random
+import itertools
+import threading
+import contextvars
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional, Set, Tuple, Union
+
+from utils.logger import get_logger, add_log_context
+
+log = get_logger(__name__)
+
+# 当前正在处理的事件
+_current_event: contextvars.ContextVar[Optional[Any]] = contextvars.ContextVar('_current_event', default=None)
+
+# 需要事件携带 trace 信息的使用方（打开的 TraceWriter、结构化日志），为空时分发事件不分配 span
+_span_users: Set[Hashable] = set()
+
+# 写入线程每次最多合并写入的记录数
+_WRITE_BATCH = 512
+# 写入线程空闲时每隔这么多秒检查一次主线程是否已经结束
+_IDLE_CHECK = 0.5
+
+
+def new_id() -> int:
+    """生成一个 63 位的非零随机 ID"""
+    return random.getrandbits(63) or 1
+
+
+def format_id(value: Optional[int]) -> Optional[str]:
+    return None if value is None else f"{value:016x}"
+
+
+def current_span() -> Optional[Tuple[int, int]]:
+    """当前上下文中正在处理的事件的 (trace_id, span_id)，不在事件处理中时为 None"""
+    event = _current_event.get()
+    return None if event is None else (event.trace_id, event.span_id)
+
+
+def log_context() -> Optional[Dict[str, Any]]:
+    """结构化日志中的事件字段：日志是在处理哪个事件时写下的，以及它的 trace"""
+    event = _current_event.get()
+    if event is None:
+        return None
+    return {
+        'event': event.name,
+        'source': event.source,
+        'trace_id': format_id(event.trace_id),
+        'span_id': format_id(event.span_id),
+    }
+
+
+def enable_log_context() -> None:
+    """
+    让结构化日志带上正在处理的事件和它的 trace（见 log_context），同时开始为分发的事件分配 span。
+    由启用 JSON lines 日志的启动代码调用，重复调用没有副作用
+    """
+    if 'log_context' not in _span_users:
+        _span_users.add('log_context')
+        add_log_context(log_context)
+
+
+def spans_enabled() -> bool:
+    """分发事件时是否需要分配 span 并设置当前事件"""
+    return bool(_span_users)
+
+
+def assign_span(event) -> None:
+    """为即将分发的事件分配 span，并从当前上下文继承 trace（事件已经带有 trace 时保持不变）"""
+    if event.trace_id is None:
+        parent = _current_event.get()
+        if parent is None:
+            event.trace_id = new_id()
+        else:
+            event.trace_id, event.parent_span_id = parent.trace_id, parent.span_id
+    if event.span_id is None:
+        event.span_id = new_id()
+
+
+def activate(event) -> contextvars.Token:
+    """把事件设为当前上下文正在处理的事件，返回用于恢复的 token"""
+    return _current_event.set(event)
+
+
+def deactivate(token: contextvars.Token) -> None:
+    _current_event.reset(token)
+
+
+class TraceWriter:
+    """
+    把 span 以 Chrome Trace Event 格式写入文件。记录先放入队列，由后台线程批量写入，
+    事件循环中只有构造字典和入队的开销。
+
+    文件的结尾也由写入线程写出：close() 只通知写入线程，不等待它。写入线程不是守护线程，
+    解释器退出时会等它写完；没有调用 close() 时，它在主线程结束后自行写完文件
+    """
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._file.write('[')
+        self._first = True
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._pid = os.getpid()
+        # 轨道名 -> Chrome Trace 中的 tid
+        self._tracks: Dict[str, int] = {}
+        self._track_ids = itertools.count(1)
+        self._flow_ids = itertools.count(1)
+        self._closed = False
+        self.written = 0
+
+        self._thread = threading.Thread(target=self._write_loop, name="TraceWriter")
+        self._thread.start()
+        _span_users.add(self)
+        self._emit({'ph': 'M', 'name': 'process_name', 'pid': self._pid,
+                    'args': {'name': f"SwarmClone[{self._pid}]"}})
+
+    def _track(self, name: str) -> int:
+        tid = self._tracks.get(name)
+        if tid is None:
+            tid = self._tracks[name] = next(self._track_ids)
+            self._emit({'ph': 'M', 'name': 'thread_name', 'pid': self._pid, 'tid': tid,
+                        'args': {'name': name}})
+        return tid
+
+    def _emit(self, record: Dict[str, Any]) -> None:
+        if not self._closed:
+            self._queue.put(record)
+
+    def record_handler(self, event, track: str, started_ns: int, finished_ns: int, outcome: str) -> None:
+        """
+        记录一次订阅者处理：处理本身是一个完整事件（ph=X），
+        从事件创建（发布者轨道）到处理开始（处理者轨道）之间是一对流向事件（ph=s/f）
+        """
+        tid = self._track(track)
+        source_tid = self._track(event.source)
+        flow_id = next(self._flow_ids)
+        self._emit({'ph': 's', 'name': event.name, 'cat': 'publish', 'id': flow_id,
+                    'pid': self._pid, 'tid': source_tid, 'ts': event.timestamp_ns / 1000})
+        self._emit({'ph': 'f', 'bp': 'e', 'name': event.name, 'cat': 'publish', 'id': flow_id,
+                    'pid': self._pid, 'tid': tid, 'ts': started_ns / 1000})
+        self._emit({
+            'ph': 'X', 'name': event.name, 'cat': track,
+            'pid': self._pid, 'tid': tid,
+            'ts': started_ns / 1000, 'dur': (finished_ns - started_ns) / 1000,
+            'args': {
+                'trace_id': format_id(event.trace_id),
+                'span_id': format_id(event.span_id),
+                'parent_span_id': format_id(event.parent_span_id),
+                'source': event.source,
+                'outcome': outcome,
+                'queued_us': (started_ns - event.timestamp_ns) / 1000,
+            }
+        })
+
+    def _write_loop(self) -> None:
+        while True:
+            try:
+                record = self._queue.get(timeout=_IDLE_CHECK)
+            except queue.Empty:
+                if threading.main_thread().is_alive():
+                    continue
+                # 程序退出时没有调用 close()
+                record = None
+            batch = [record]
+            while len(batch) < _WRITE_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = False
+            chunks = []
+            for item in batch:
+                if item is None:
+                    stop = True
+                    break
+                chunks.append(('\n' if self._first else ',\n') + json.dumps(item, ensure_ascii=False))
+                self._first = False
+            if chunks:
+                self._file.write(''.join(chunks))
+                self.written += len(chunks)
+            if stop:
+                self._file.write('\n]\n')
+                self._file.close()
+                log.info(f"追踪数据已写入 {self.path}（{self.written} 条记录）")
+                return
+
+    def close(self) -> None:
+        """停止记录，写入线程写完队列中剩余的记录后关闭文件。不等待写入线程，见 join()"""
+        if self._closed:
+            return
+        self._closed = True
+        _span_users.discard(self)
+        self._queue.put(None)
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """等待 close() 之后写入线程写完文件，返回文件是否已经写完。会阻塞，不要在事件循环中调用"""
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
@@ -1,13 +1,14 @@
-import asyncio
 import time
 import threading
 
-from utils.logger import log
+from utils.logger import get_logger
 from core.event_bus import EventBus
 from core.api_server import APIServer
 from core.base_module import BaseModule
 from core.config_manager import ConfigManager
 
+log = get_logger(__name__)
+
 
 class Dummy01Module(BaseModule):
     """虚拟模块01 - 代理模块"""
@@ -56,12 +57,12 @@ class Dummy01Module(BaseModule):
                 time.sleep(2)
                 counter += 1
 
-                asyncio.run(self.publish("dummy01.message", {
+                self.publish_threadsafe("dummy01.message", {
                     "count": counter,
                     "message": f"定期消息 #{counter}",
                     "from": self.name,
                     "timestamp": time.time()
-                }))
+                }, priority="background").result()
 
                 self.message_count += 1
 
@@ -128,10 +129,10 @@ class Dummy01Module(BaseModule):
         data = event.data
         log.info(f"[{self.name}] 收到sample02处理结果: {data}")
 
-        # 转发给dummy02
-        asyncio.run(self.publish("dummy02.process", {
+        # 转发给dummy02（本处理器运行在线程池中，交给主事件循环发布）
+        self.publish_threadsafe("dummy02.process", {
             "source": self.name,
             "data": data
-        }))
+        }).result()
 
         return {"forwarded": True, "timestamp": time.time()}
\ No newline at end of file
@@ -1,8 +1,10 @@
 import time
 
-from utils.logger import log
+from utils.logger import get_logger
 from core.base_module import BaseModule
 
+log = get_logger(__name__)
+
 
 class Dummy02Module(BaseModule):
     """虚拟模块02 - 代理模块"""
@@ -1,9 +1,10 @@
 import time
-import asyncio
 import threading
 
 from core.base_module import BaseModule
-from utils.logger import log
+from utils.logger import get_logger
+
+log = get_logger(__name__)
 
 
 class Sample01Module(BaseModule):
@@ -26,7 +27,7 @@ class Sample01Module(BaseModule):
 
         # 订阅事件
         await self.subscribe("ping", self.handle_ping)
-        await self.subscribe("sample02.reply", self.handle_sample02_reply)
+        await self.subscribe("sample02.reply", self.handle_sample02_reply, inline=True)
         await self.subscribe("dummy01.message", self.handle_dummy01_message)
         await self.subscribe("dummy02.response", self.handle_dummy02_response)
 
@@ -48,10 +49,6 @@ class Sample01Module(BaseModule):
 
     def _communication_loop(self):
         """通信循环"""
-        # 为这个线程创建新的事件循环
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
         try:
             while self.running and self.counter < self.get_config("max_messages"):
                 self.counter += 1
@@ -59,11 +56,11 @@ class Sample01Module(BaseModule):
 
                 # 向sample02发送请求
                 try:
-                    response = loop.run_until_complete(self.request(
+                    response = self.request_threadsafe(
                         "sample02.process",
                         {"value": self.counter, "from": self.name},
                         timeout=5.0
-                    ))
+                    ).result()
                     if response:
                         log.info(f"[{self.name}] 收到sample02响应: {response}")
                     else:
@@ -72,17 +69,17 @@ class Sample01Module(BaseModule):
                     log.error(f"[{self.name}] 请求sample02失败: {e}")
 
                 # 向dummy01发送事件
-                loop.run_until_complete(self.publish("dummy01.task", {
+                self.publish_threadsafe("dummy01.task", {
                     "from": self.name,
                     "task_id": self.counter,
                     "data": f"任务 #{self.counter}"
-                }))
+                }).result()
 
                 # 向dummy02发送事件
-                loop.run_until_complete(self.publish("dummy02.transform", {
+                self.publish_threadsafe("dummy02.transform", {
                     "from": self.name,
                     "text": f"文本数据 {self.counter}"
-                }))
+                }).result()
 
                 # 等待
                 interval = self.get_config("interval")
@@ -91,10 +88,6 @@ class Sample01Module(BaseModule):
 
         except Exception as e:
             log.error(f"[{self.name}] 通信循环错误: {e}")
-        finally:
-            # 清理事件循环
-            if not loop.is_closed():
-                loop.close()
 
     async def stop(self):
         """停止模块"""
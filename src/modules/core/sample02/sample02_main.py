@@ -1,12 +1,14 @@
 import time
 import asyncio
 
-from utils.logger import log
+from utils.logger import get_logger
 from core.event_bus import EventBus
 from core.api_server import APIServer
 from core.base_module import BaseModule
 from core.config_manager import ConfigManager
 
+log = get_logger(__name__)
+
 
 class Sample02Module(BaseModule):
     """示例模块02 - 核心模块，处理请求"""
@@ -12,12 +12,21 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import atexit
 import datetime
+import functools
+import gzip
+import json
 import logging
+import os
+import shutil
 import sys
 import threading
+import time
+from collections import deque
+from enum import Enum
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Dict, List, Optional, Union
 
 
 class ColoredFormatter(logging.Formatter):
@@ -42,6 +51,625 @@ class ColoredFormatter(logging.Formatter):
             return formatted
 
 
+class LogOverflowPolicy(Enum):
+    """What to do when the log queue is full"""
+    # Discard the oldest queued record to make room (the newest context is kept)
+    DROP_OLDEST = "drop_oldest"
+    # Discard the record being logged
+    DROP_NEWEST = "drop_newest"
+    # Make the logging thread wait for the writer (never loses records, but may stall the event loop)
+    BLOCK = "block"
+
+
+_exc_formatter = logging.Formatter()
+
+# Callables returning extra fields (or None) for structured records, see add_log_context()
+_context_providers: List[Callable[[], Optional[Dict[str, Any]]]] = []
+
+
+def add_log_context(provider: Callable[[], Optional[Dict[str, Any]]]) -> None:
+    """
+    Register a callable that returns extra fields for the structured (JSON-lines) log, e.g. the
+    trace of the event being handled. It is called in the logging thread when a record is created,
+    so it sees that thread's context variables, and only while a JSON-lines sink is enabled.
+    """
+    _context_providers.append(provider)
+
+
+class JsonLinesHandler(logging.Handler):
+    """
+    Writes one JSON object per line to {date}.{index}.jsonl segments in a directory.
+
+    A new segment is started when the current one exceeds max_bytes or the date changes.
+    Finished segments are gzip-compressed on a background thread (to {date}.{index}.jsonl.gz),
+    so rotation never waits for compression. Segments left uncompressed by an earlier run
+    are compressed on startup.
+    """
+    def __init__(self, directory: Union[str, Path], max_bytes: int = 64 * 1024 * 1024,
+                 compress: bool = True):
+        super().__init__(logging.DEBUG)
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self._compressors: List[threading.Thread] = []
+        self._file = None
+        self._size = 0
+        self._date = ""
+        self._next_midnight = 0.0
+        self.segments = 0
+        self.written = 0
+
+        if compress:
+            for segment in sorted(self.directory.glob("*.jsonl")):
+                self._compress_later(segment)
+        self._open_segment(time.time())
+
+    @property
+    def current_segment(self) -> Optional[Path]:
+        return None if self._file is None else Path(self._file.name)
+
+    def _open_segment(self, created: float) -> None:
+        if self._file is not None:
+            finished = Path(self._file.name)
+            self._file.close()
+            if self.compress:
+                self._compress_later(finished)
+        day = datetime.date.fromtimestamp(created)
+        self._date = day.strftime('%Y-%m-%d')
+        self._next_midnight = datetime.datetime.combine(
+            day + datetime.timedelta(days=1), datetime.time()).timestamp()
+        # Continue after the segments already written today
+        indexes = [int(path.name.split('.')[1]) for path in self.directory.glob(f"{self._date}.*.jsonl*")]
+        index = max(indexes, default=-1) + 1
+        self._file = open(self.directory / f"{self._date}.{index:03d}.jsonl", 'a', encoding='utf-8')
+        self._size = 0
+        self.segments += 1
+
+    def _compress_later(self, segment: Path) -> None:
+        self._compressors = [thread for thread in self._compressors if thread.is_alive()]
+        thread = threading.Thread(target=_compress_segment, args=(segment,),
+                                  name="LogCompressor", daemon=True)
+        thread.start()
+        self._compressors.append(thread)
+
+    def to_json(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'module': record.name,
+            'msg': record.getMessage(),
+        }
+        context = getattr(record, 'context', None)
+        if context:
+            entry.update(context)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+    def write_batch(self, batch: List[logging.LogRecord]) -> None:
+        """Write a batch of records, starting new segments as needed"""
+        self.acquire()
+        try:
+            if self._file is None:
+                return
+            lines = []
+            for record in batch:
+                if record.levelno < self.level or not self.filter(record):
+                    continue
+                if record.created >= self._next_midnight:
+                    self._flush_lines(lines)
+                    self._open_segment(record.created)
+                try:
+                    line = self.to_json(record) + '\n'
+                except Exception:
+                    self.handleError(record)
+                    continue
+                lines.append(line)
+                self._size += len(line)
+                if self._size >= self.max_bytes:
+                    self._flush_lines(lines)
+                    self._open_segment(record.created)
+            self._flush_lines(lines)
+        except Exception:
+            self.handleError(batch[-1])
+        finally:
+            self.release()
+
+    def _flush_lines(self, lines: List[str]) -> None:
+        if lines:
+            self._file.write(''.join(lines))
+            self._file.flush()
+            self.written += len(lines)
+            lines.clear()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.write_batch([record])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'segment': self._file and self.current_segment.name,
+            'segment_bytes': self._size,
+            'segments': self.segments,
+            'written': self.written,
+            'compressing': sum(thread.is_alive() for thread in self._compressors),
+        }
+
+    def close(self) -> None:
+        """Close the current segment and wait for pending compressions"""
+        self.acquire()
+        try:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        finally:
+            self.release()
+        for thread in self._compressors:
+            thread.join(timeout=30)
+        super().close()
+
+
+def _compress_segment(segment: Path) -> None:
+    compressed = segment.with_name(segment.name + '.gz')
+    partial = segment.with_name(segment.name + '.gz.tmp')
+    try:
+        with open(segment, 'rb') as source, gzip.open(partial, 'wb') as target:
+            shutil.copyfileobj(source, target, 1024 * 1024)
+        os.replace(partial, compressed)
+        segment.unlink()
+    except OSError as e:
+        sys.stderr.write(f"Failed to compress log segment {segment}: {e}\n")
+
+
+class AsyncLogHandler(logging.Handler):
+    """
+    Queues log records and writes them from a background thread, so that logging on the
+    asyncio loop thread never waits for console or disk I/O.
+
+    The writer drains the queue in batches: each target stream handler gets one write and
+    one flush per batch instead of one per record. Dropped records are counted and reported
+    with a warning once the writer catches up. While the queue is empty the writer calls the
+    idle callback (see set_idle_callback) at a fixed interval, e.g. to report suppressed floods.
+    """
+    def __init__(self, targets: List[logging.Handler], capacity: int = 10000,
+                 policy: LogOverflowPolicy = LogOverflowPolicy.DROP_OLDEST,
+                 batch_size: int = 256):
+        super().__init__(logging.NOTSET)
+        self.capacity = capacity
+        self.policy = LogOverflowPolicy(policy)
+        self.batch_size = batch_size
+        self._targets = list(targets)
+        # Held while writing a batch and while swapping targets (date rotation)
+        self._targets_lock = threading.Lock()
+        self._queue: deque = deque()
+        self._cond = threading.Condition(threading.Lock())
+        # Number of records taken by the writer but not yet written, used by flush()
+        self._in_flight = 0
+        self._closed = False
+        # Call the context providers only while some target records the context
+        self.capture_context = False
+        self.dropped = 0
+        self._dropped_reported = 0
+        self.written = 0
+        self._on_idle: Optional[Callable[[], None]] = None
+        self._idle_interval = 1.0
+
+        self._thread = threading.Thread(target=self._write_loop, name="AsyncLogWriter", daemon=True)
+        self._thread.start()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if record.args:
+            # Freeze the message now: the arguments may be mutated after this call returns
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            # Render the traceback now so that the frames are not kept alive in the queue
+            if not record.exc_text:
+                record.exc_text = _exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        if self.capture_context:
+            context = None
+            for provider in _context_providers:
+                fields = provider()
+                if fields:
+                    context = dict(context, **fields) if context else fields
+            record.context = context
+        with self._cond:
+            if self._closed:
+                # The writer is gone (interpreter shutdown): write synchronously
+                self._write_batch([record])
+                return
+            if len(self._queue) >= self.capacity:
+                if self.policy is LogOverflowPolicy.DROP_NEWEST:
+                    self.dropped += 1
+                    return
+                if self.policy is LogOverflowPolicy.DROP_OLDEST:
+                    self._queue.popleft()
+                    self.dropped += 1
+                else:
+                    while len(self._queue) >= self.capacity and not self._closed:
+                        self._cond.wait()
+            self._queue.append(record)
+            if len(self._queue) == 1:
+                self._cond.notify_all()
+
+    def set_idle_callback(self, callback: Optional[Callable[[], None]], interval: float = 1.0) -> None:
+        """Call callback on the writer thread every interval seconds while the queue is empty; None removes it"""
+        with self._cond:
+            self._on_idle = callback
+            self._idle_interval = interval
+            self._cond.notify_all()
+
+    def _write_loop(self) -> None:
+        while True:
+            with self._cond:
+                if not self._queue and not self._closed:
+                    self._cond.wait(None if self._on_idle is None else self._idle_interval)
+                if not self._queue:
+                    if self._closed:
+                        self._cond.notify_all()
+                        return
+                    idle = self._on_idle
+                    batch = None
+                else:
+                    batch = self._take_batch()
+                    dropped = self.dropped - self._dropped_reported
+                    self._dropped_reported = self.dropped
+            if batch is None:
+                # Timed out (or woken without records): records the callback emits are written next round
+                if idle is not None:
+                    try:
+                        idle()
+                    except Exception as e:
+                        sys.stderr.write(f"Log writer idle callback failed: {e}\n")
+                continue
+            if dropped:
+                batch.append(logging.LogRecord(
+                    __name__, logging.WARNING, __file__, 0,
+                    f"Log queue overflowed, {dropped} records were dropped", None, None
+                ))
+            self._write_batch(batch)
+            with self._cond:
+                self._in_flight = 0
+                self.written += len(batch)
+                self._cond.notify_all()
+
+    def _take_batch(self) -> List[logging.LogRecord]:
+        # Called with self._cond held
+        count = min(len(self._queue), self.batch_size)
+        batch = [self._queue.popleft() for _ in range(count)]
+        self._in_flight = count
+        # Wake producers blocked by the BLOCK policy
+        self._cond.notify_all()
+        return batch
+
+    def _write_batch(self, batch: List[logging.LogRecord]) -> None:
+        with self._targets_lock:
+            for target in self._targets:
+                if isinstance(target, logging.StreamHandler):
+                    self._write_stream(target, batch)
+                elif isinstance(target, JsonLinesHandler):
+                    target.write_batch(batch)
+                else:
+                    for record in batch:
+                        if record.levelno >= target.level:
+                            target.handle(record)
+
+    @staticmethod
+    def _write_stream(target: logging.StreamHandler, batch: List[logging.LogRecord]) -> None:
+        chunks = []
+        for record in batch:
+            if record.levelno < target.level or not target.filter(record):
+                continue
+            try:
+                chunks.append(target.format(record) + target.terminator)
+            except Exception:
+                target.handleError(record)
+        if not chunks:
+            return
+        target.acquire()
+        try:
+            target.stream.write(''.join(chunks))
+            target.flush()
+        except Exception:
+            target.handleError(batch[-1])
+        finally:
+            target.release()
+
+    def replace_target(self, old: Optional[logging.Handler], new: Optional[logging.Handler]) -> None:
+        """Swap, add (old is None) or remove (new is None) a target handler between batches; the old handler is closed"""
+        with self._targets_lock:
+            if old in self._targets:
+                if new is None:
+                    self._targets.remove(old)
+                else:
+                    self._targets[self._targets.index(old)] = new
+            elif new is not None:
+                self._targets.append(new)
+            self.capture_context = any(isinstance(target, JsonLinesHandler) for target in self._targets)
+        if old is not None:
+            old.close()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until every queued record has been written, returns False on timeout"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while (self._queue or self._in_flight) and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                'queued': len(self._queue),
+                'capacity': self.capacity,
+                'policy': self.policy.value,
+                'written': self.written,
+                'dropped': self.dropped,
+            }
+
+    def close(self) -> None:
+        """Write the remaining records and stop the writer thread"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout=5)
+        # Anything the writer did not get to is written synchronously
+        with self._cond:
+            remaining = list(self._queue)
+            self._queue.clear()
+        if remaining:
+            self._write_batch(remaining)
+        with self._targets_lock:
+            for target in self._targets:
+                try:
+                    target.flush()
+                except (OSError, ValueError):
+                    # The stream was already closed (e.g. a replaced sys.stderr at exit), as in logging.shutdown
+                    pass
+        super().close()
+
+
+class _LoggerBudget:
+    """Rate limit (token bucket) and sampling ratio for one logger and its children"""
+    __slots__ = ('rate', 'burst', 'tokens', 'updated', 'ratio', 'credit', 'dropped')
+
+    def __init__(self):
+        self.rate: Optional[float] = None
+        self.burst = 0.0
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+        self.ratio: Optional[float] = None
+        self.credit = 0.0
+        self.dropped = 0
+
+    def admit(self, now: float) -> bool:
+        if self.ratio is not None:
+            # Deterministic sampling: keep one record each time the credit reaches 1
+            self.credit += self.ratio
+            # The tolerance keeps e.g. ten additions of 0.1 from falling just short of 1
+            if self.credit < 1 - 1e-9:
+                self.dropped += 1
+                return False
+            self.credit -= 1
+        if self.rate is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                self.dropped += 1
+                return False
+            self.tokens -= 1
+        return True
+
+
+class LogFloodFilter(logging.Filter):
+    """
+    Keeps log floods from saturating the log writer. All settings can be changed at runtime.
+
+    - Deduplication: within each window, a call site (logger, source file and line) passes at most
+      max_repeats records; the rest are counted and reported in one summary record, quoting the last
+      message, when the window ends. Keying on the call site rather than the message also collapses
+      floods logged with f-strings, whose text differs on every call.
+    - Per-logger rate limits (records per second) and sampling ratios (keep this fraction of
+      records). A setting for a logger also applies to its children, e.g. "modules.agent".
+
+    Records at exempt_level (WARNING) or above always pass: they are never deduplicated, rate
+    limited or sampled.
+
+    Configuration format (also accepted by configure_log_flood_control):
+
+        {
+            "dedup_window": 1.0, "dedup_max_repeats": 5,
+            "rate_limits": {"modules.agent.dummy02": {"rate": 10, "burst": 20}},
+            "sampling": {"modules.agent": 0.1}
+        }
+
+    Summaries are produced by the next record after a window ends, by tick() (called by the log
+    writer while it is idle, so a flood that simply stops is still reported), and on flush() at shutdown.
+    """
+    # Upper bound on tracked messages; beyond it the table is reset
+    MAX_KEYS = 10000
+
+    def __init__(self, emit: Callable[[logging.LogRecord], None]):
+        super().__init__()
+        # Writes summary records without passing them through this filter again
+        self._emit = emit
+        self._lock = threading.Lock()
+        self.dedup_window = 0.0
+        self.dedup_max_repeats = 5
+        self.exempt_level = logging.WARNING
+        # key -> [window start, records seen, last record]
+        self._sites: Dict[tuple, list] = {}
+        self._budgets: Dict[str, _LoggerBudget] = {}
+        # Logger name -> budget that applies to it (or None), rebuilt when budgets change
+        self._resolved: Dict[str, Optional[_LoggerBudget]] = {}
+        self._next_sweep = 0.0
+        self.suppressed = 0
+
+    @property
+    def active(self) -> bool:
+        return self.dedup_window > 0 or bool(self._budgets)
+
+    def set_dedup(self, window: float, max_repeats: int = 5) -> None:
+        """Collapse repeats of a message beyond max_repeats per window (seconds); 0 disables"""
+        with self._lock:
+            self.dedup_window = window
+            self.dedup_max_repeats = max_repeats
+            self._next_sweep = 0.0
+
+    def set_rate_limit(self, logger_name: str, rate: Optional[float], burst: Optional[float] = None) -> None:
+        """Allow at most rate records per second from a logger and its children; None removes the limit"""
+        with self._lock:
+            budget = self._budget(logger_name)
+            budget.rate = rate
+            budget.burst = float(burst) if burst else max(1.0, rate or 0)
+            budget.tokens = budget.burst
+            self._prune(logger_name)
+
+    def set_sampling(self, logger_name: str, ratio: Optional[float]) -> None:
+        """Keep only this fraction (0-1] of the records from a logger and its children; None removes it"""
+        with self._lock:
+            self._budget(logger_name).ratio = None if ratio is None or ratio >= 1 else ratio
+            self._prune(logger_name)
+
+    def configure(self, config: Optional[Dict[str, Any]]) -> None:
+        """Replace all settings with the given configuration, see the class docstring"""
+        config = config or {}
+        # Report what the old settings suppressed before they are replaced
+        self.flush()
+        with self._lock:
+            self._budgets.clear()
+            self._resolved.clear()
+        self.set_dedup(config.get('dedup_window', 0.0), config.get('dedup_max_repeats', 5))
+        for name, limit in (config.get('rate_limits') or {}).items():
+            self.set_rate_limit(name, limit['rate'], limit.get('burst'))
+        for name, ratio in (config.get('sampling') or {}).items():
+            self.set_sampling(name, ratio)
+
+    def _budget(self, logger_name: str) -> _LoggerBudget:
+        budget = self._budgets.get(logger_name)
+        if budget is None:
+            budget = self._budgets[logger_name] = _LoggerBudget()
+        self._resolved.clear()
+        return budget
+
+    def _prune(self, logger_name: str) -> None:
+        budget = self._budgets[logger_name]
+        if budget.rate is None and budget.ratio is None and not budget.dropped:
+            del self._budgets[logger_name]
+
+    def _resolve(self, logger_name: str) -> Optional[_LoggerBudget]:
+        try:
+            return self._resolved[logger_name]
+        except KeyError:
+            pass
+        name = logger_name
+        budget = None
+        while True:
+            budget = self._budgets.get(name)
+            if budget is not None or '.' not in name:
+                break
+            name = name.rsplit('.', 1)[0]
+        self._resolved[logger_name] = budget
+        return budget
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        now = time.monotonic()
+        summaries = None
+        with self._lock:
+            if now >= self._next_sweep:
+                summaries = self._sweep(now)
+            passed = self._admit(record, now)
+        if summaries:
+            for summary in summaries:
+                self._emit(summary)
+        return passed
+
+    def _admit(self, record: logging.LogRecord, now: float) -> bool:
+        if record.levelno >= self.exempt_level:
+            return True
+        if self.dedup_window > 0:
+            key = (record.name, record.pathname, record.lineno)
+            site = self._sites.get(key)
+            if site is None:
+                if len(self._sites) >= self.MAX_KEYS:
+                    self._sites.clear()
+                self._sites[key] = [now, 1, record]
+            else:
+                site[1] += 1
+                site[2] = record
+                if site[1] > self.dedup_max_repeats:
+                    self.suppressed += 1
+                    return False
+        if self._budgets:
+            budget = self._resolve(record.name)
+            if budget is not None and not budget.admit(now):
+                self.suppressed += 1
+                return False
+        return True
+
+    def _sweep(self, now: float, final: bool = False) -> List[logging.LogRecord]:
+        """Close finished dedup windows and collect summary records for everything suppressed"""
+        summaries = []
+        window = self.dedup_window
+        for key, (started, seen, last) in list(self._sites.items()):
+            if final or now - started >= window:
+                del self._sites[key]
+                if seen > self.dedup_max_repeats:
+                    summaries.append(_summary_record(
+                        last, f"{seen - self.dedup_max_repeats} repeated messages suppressed "
+                              f"in {now - started:.1f}s, last: {last.getMessage()}"))
+        for name, budget in list(self._budgets.items()):
+            if budget.dropped:
+                summaries.append(_summary_record(
+                    None, f"{budget.dropped} messages from {name} dropped by rate limit or sampling", name))
+                budget.dropped = 0
+                if budget.rate is None and budget.ratio is None:
+                    del self._budgets[name]
+        self._next_sweep = now + (window if window > 0 else 1.0)
+        return summaries
+
+    def tick(self) -> None:
+        """Emit summaries for windows that have ended, without waiting for another record"""
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_sweep:
+                return
+            summaries = self._sweep(now)
+        for summary in summaries:
+            self._emit(summary)
+
+    def flush(self) -> None:
+        """Emit summaries for everything suppressed so far"""
+        with self._lock:
+            summaries = self._sweep(time.monotonic(), final=True)
+        for summary in summaries:
+            self._emit(summary)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'suppressed': self.suppressed,
+                'dedup_window': self.dedup_window,
+                'dedup_max_repeats': self.dedup_max_repeats,
+                'rate_limits': {name: budget.rate for name, budget in self._budgets.items()
+                                if budget.rate is not None},
+                'sampling': {name: budget.ratio for name, budget in self._budgets.items()
+                             if budget.ratio is not None},
+            }
+
+
+def _summary_record(last: Optional[logging.LogRecord], msg: str, name: str = __name__) -> logging.LogRecord:
+    if last is None:
+        return logging.LogRecord(name, logging.WARNING, __file__, 0, msg, None, None)
+    return logging.LogRecord(last.name, last.levelno, last.pathname, last.lineno, msg, None, None)
+
+
 class LoggerManager:
     # The global logger manager that handles all module's logging
     _instance: Optional['LoggerManager'] = None
@@ -49,6 +677,10 @@ class LoggerManager:
     _loggers: dict = {}
     _current_date: str = ""
     _file_handler: Optional[logging.FileHandler] = None
+    _async_handler: Optional[AsyncLogHandler] = None
+    _rotation_timer: Optional[threading.Timer] = None
+    _json_handler: Optional[JsonLinesHandler] = None
+    _flood_filter: Optional[LogFloodFilter] = None
 
     def __new__(cls):
         with cls._lock:
@@ -60,6 +692,8 @@ class LoggerManager:
     def _initialize(self):
         self._setup_logger()
         self._setup_file_handler()
+        self._schedule_rotation()
+        atexit.register(self.shutdown)
 
     def _setup_logger(self):
         # Configure root logger
@@ -79,7 +713,11 @@ class LoggerManager:
             style='{'
         )
         console_handler.setFormatter(console_formatter)
-        self.root_logger.addHandler(console_handler)
+
+        # Console and file handlers are driven by a background writer, never by the logging thread
+        self._async_handler = AsyncLogHandler([console_handler])
+        self._flood_filter = LogFloodFilter(self._async_handler.emit)
+        self.root_logger.addHandler(self._async_handler)
 
     def _setup_file_handler(self):
         today = datetime.date.today().strftime('%Y-%m-%d')
@@ -89,10 +727,7 @@ class LoggerManager:
         log_dir.mkdir(parents=True, exist_ok=True)
         log_file = log_dir / f"{today}.log"
 
-        if self._file_handler:
-            self.root_logger.removeHandler(self._file_handler)
-            self._file_handler.close()
-
+        old_handler = self._file_handler
         self._file_handler = logging.FileHandler(log_file, mode='a', encoding='utf-8')
         self._file_handler.setLevel(logging.DEBUG)
 
@@ -102,7 +737,7 @@ class LoggerManager:
             style='{'
         )
         self._file_handler.setFormatter(file_formatter)
-        self.root_logger.addHandler(self._file_handler)
+        self._async_handler.replace_target(old_handler, self._file_handler)
 
     def _check_rotation(self):
         """Check if we need to rotate the log file due to date change"""
@@ -113,9 +748,84 @@ class LoggerManager:
                 if today != self._current_date:
                     self._setup_file_handler()
 
+    def _schedule_rotation(self):
+        """Rotate the log file shortly after the next midnight, instead of checking on every call"""
+        now = datetime.datetime.now()
+        midnight = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time())
+        self._rotation_timer = threading.Timer((midnight - now).total_seconds() + 1, self._rotate)
+        self._rotation_timer.daemon = True
+        self._rotation_timer.start()
+
+    def _rotate(self):
+        self._check_rotation()
+        self._schedule_rotation()
+
+    def configure_queue(self, capacity: Optional[int] = None,
+                        policy: Optional[LogOverflowPolicy] = None) -> None:
+        """Adjust the background writer's queue capacity and overflow policy"""
+        if capacity is not None:
+            self._async_handler.capacity = capacity
+        if policy is not None:
+            self._async_handler.policy = LogOverflowPolicy(policy)
+
+    def enable_json_logs(self, directory: Union[str, Path], max_bytes: int = 64 * 1024 * 1024,
+                         compress: bool = True) -> None:
+        """Also write every record as JSON lines to a directory, see JsonLinesHandler"""
+        with self._lock:
+            handler = JsonLinesHandler(directory, max_bytes, compress)
+            self._async_handler.replace_target(self._json_handler, handler)
+            self._json_handler = handler
+
+    def disable_json_logs(self) -> None:
+        with self._lock:
+            if self._json_handler is not None:
+                self._async_handler.replace_target(self._json_handler, None)
+                self._json_handler = None
+
+    def configure_flood_control(self, config: Optional[Dict[str, Any]]) -> None:
+        """Replace the deduplication, rate limit and sampling settings, see LogFloodFilter"""
+        with self._lock:
+            self._flood_filter.configure(config)
+            self._update_flood_filter()
+
+    def _update_flood_filter(self) -> None:
+        # The filter is only installed while it does something, so it costs nothing otherwise
+        if self._flood_filter.active:
+            self._async_handler.addFilter(self._flood_filter)
+            self._async_handler.set_idle_callback(self._flood_filter.tick)
+        else:
+            self._flood_filter.flush()
+            self._async_handler.removeFilter(self._flood_filter)
+            self._async_handler.set_idle_callback(None)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until all queued log records have been written"""
+        return self._async_handler.flush(timeout)
+
+    def get_stats(self) -> dict:
+        stats = self._async_handler.stats()
+        if self._json_handler is not None:
+            stats['json'] = self._json_handler.stats()
+        if self._flood_filter.active:
+            stats['flood_control'] = self._flood_filter.stats()
+        return stats
+
+    def shutdown(self) -> None:
+        """Flush and stop the background writer; later records are written synchronously"""
+        if self._rotation_timer is not None:
+            self._rotation_timer.cancel()
+        if self._flood_filter is not None and self._flood_filter.active:
+            self._flood_filter.flush()
+        if self._async_handler is not None:
+            self._async_handler.close()
+        if self._json_handler is not None:
+            self._json_handler.close()
+
     def get_logger(self, name: str) -> logging.Logger:
+        logger = self._loggers.get(name)
+        if logger is not None:
+            return logger
         with self._lock:
-            self._check_rotation()
             if name not in self._loggers:
                 self._loggers[name] = logging.getLogger(name)
             return self._loggers[name]
@@ -125,43 +835,166 @@ class LoggerManager:
 _logger_manager = LoggerManager()
 
 
-class GlobalLogger:
+def flush_logs(timeout: float = 5.0) -> bool:
+    """Wait until all queued log records have been written"""
+    return _logger_manager.flush(timeout)
+
+
+def enable_json_logs(directory: Union[str, Path] = "logs/json", max_bytes: int = 64 * 1024 * 1024,
+                     compress: bool = True) -> None:
+    """Write every record as JSON lines with size and date rotation, see JsonLinesHandler"""
+    _logger_manager.enable_json_logs(directory, max_bytes, compress)
+
+
+def disable_json_logs() -> None:
+    _logger_manager.disable_json_logs()
+
+
+def configure_log_flood_control(config: Optional[Dict[str, Any]]) -> None:
+    """Deduplicate, rate limit or sample flooding log messages, format see LogFloodFilter"""
+    _logger_manager.configure_flood_control(config)
+
+
+def shutdown_logging() -> None:
+    """Flush and stop the background log writer. Called automatically at interpreter exit"""
+    _logger_manager.shutdown()
+
+
+# Lowest level that any logger may emit. Calls below it return before anything else is done
+_min_level = logging.NOTSET
+
+
+def refresh_log_levels() -> None:
+    """
+    Recompute the threshold shared by get_logger() loggers and GlobalLogger from the current logger
+    levels and logging.disable(). Called automatically after Logger.setLevel() and logging.disable()
+    """
+    global _min_level
+    manager = logging.root.manager
+    levels = [logging.root.level]
+    levels.extend(logger.level for logger in list(manager.loggerDict.values())
+                  if isinstance(logger, logging.Logger) and logger.level)
+    _min_level = max(min(levels), manager.disable + 1)
+
+
+def _refresh_after(function: Callable) -> Callable:
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        function(*args, **kwargs)
+        refresh_log_levels()
+    return wrapper
+
+
+# Logger.setLevel (also used by logging.config) and logging.disable are the only ways levels change,
+# so they are wrapped here to keep the threshold current. Code that bound logging.disable before this
+# module was imported keeps the unwrapped function and has to call refresh_log_levels itself
+logging.Logger.setLevel = _refresh_after(logging.Logger.setLevel)
+logging.disable = _refresh_after(logging.disable)
+
+
+def set_log_level(level: Union[int, str], name: Optional[str] = None) -> None:
+    """Set the level of the named logger (the root logger by default)"""
+    logging.getLogger(name).setLevel(level)
+
+
+refresh_log_levels()
+
+
+class _GatedLogger:
+    """
+    Logging methods that return at once for levels below the lowest level any logger may emit.
+
+    Pass arguments separately (log.debug("event %s", name)) rather than as an f-string: the message
+    is only formatted if the record is emitted. The root logger is configured at DEBUG, so the gate
+    only saves work once levels are raised.
+    """
+    __slots__ = ()
+
+    def _log(self, level, msg, args, kwargs):
+        raise NotImplementedError
+
+    def isEnabledFor(self, level: int) -> bool:
+        """Whether a call at this level could be emitted by any logger"""
+        return level >= _min_level
+
+    @staticmethod
+    def set_level(level: Union[int, str], name: Optional[str] = None) -> None:
+        """See set_log_level"""
+        set_log_level(level, name)
 
     def debug(self, msg, *args, **kwargs):
-        caller_frame = sys._getframe(1)
-        module_name = caller_frame.f_globals.get('__name__', 'unknown')
-        logger = _logger_manager.get_logger(module_name)
-        logger.debug(msg, *args, **kwargs)
+        if _min_level <= logging.DEBUG:
+            self._log(logging.DEBUG, msg, args, kwargs)
 
     def info(self, msg, *args, **kwargs):
-        caller_frame = sys._getframe(1)
-        module_name = caller_frame.f_globals.get('__name__', 'unknown')
-        logger = _logger_manager.get_logger(module_name)
-        logger.info(msg, *args, **kwargs)
+        if _min_level <= logging.INFO:
+            self._log(logging.INFO, msg, args, kwargs)
 
     def warning(self, msg, *args, **kwargs):
-        caller_frame = sys._getframe(1)
-        module_name = caller_frame.f_globals.get('__name__', 'unknown')
-        logger = _logger_manager.get_logger(module_name)
-        logger.warning(msg, *args, **kwargs)
+        if _min_level <= logging.WARNING:
+            self._log(logging.WARNING, msg, args, kwargs)
 
     def error(self, msg, *args, **kwargs):
-        caller_frame = sys._getframe(1)
-        module_name = caller_frame.f_globals.get('__name__', 'unknown')
-        logger = _logger_manager.get_logger(module_name)
-        logger.error(msg, *args, **kwargs)
+        if _min_level <= logging.ERROR:
+            self._log(logging.ERROR, msg, args, kwargs)
 
     def critical(self, msg, *args, **kwargs):
-        caller_frame = sys._getframe(1)
-        module_name = caller_frame.f_globals.get('__name__', 'unknown')
-        logger = _logger_manager.get_logger(module_name)
-        logger.critical(msg, *args, **kwargs)
+        if _min_level <= logging.CRITICAL:
+            self._log(logging.CRITICAL, msg, args, kwargs)
+
+    def exception(self, msg, *args, exc_info=True, **kwargs):
+        if _min_level <= logging.ERROR:
+            self._log(logging.ERROR, msg, args, dict(kwargs, exc_info=exc_info))
+
+
+class ModuleLogger(_GatedLogger):
+    """Logs through one named logger, see get_logger"""
+    __slots__ = ('logger',)
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+
+    @property
+    def name(self) -> str:
+        return self.logger.name
+
+    def _log(self, level, msg, args, kwargs):
+        logger = self.logger
+        if logger.isEnabledFor(level):
+            # Frame 0 is _log, frame 1 the public method; attribute the record to the caller
+            kwargs['stacklevel'] = kwargs.get('stacklevel', 1) + 2
+            logger._log(level, msg, args, **kwargs)
+
+
+def get_logger(name: str) -> ModuleLogger:
+    """
+    The logger for a module, to be created once at import: log = get_logger(__name__).
+    Calls below the lowest enabled level return before the logger is consulted
+    """
+    return ModuleLogger(_logger_manager.get_logger(name))
+
+
+class GlobalLogger(_GatedLogger):
+    """
+    Logs through the logger named after the calling module, which is found from the caller's frame
+    and cached. Kept for code that imports the shared log; modules should use get_logger(__name__),
+    which skips the frame lookup
+    """
+    __slots__ = ('_loggers',)
+
+    def __init__(self):
+        self._loggers: dict = {}
 
-    def exception(self, msg, *args, **kwargs):
-        caller_frame = sys._getframe(1)
-        module_name = caller_frame.f_globals.get('__name__', 'unknown')
-        logger = _logger_manager.get_logger(module_name)
-        logger.exception(msg, *args, **kwargs)
+    def _log(self, level, msg, args, kwargs):
+        # Frame 0 is _log, frame 1 the public method, frame 2 the caller
+        module_name = sys._getframe(2).f_globals.get('__name__', 'unknown')
+        logger = self._loggers.get(module_name)
+        if logger is None:
+            logger = self._loggers[module_name] = _logger_manager.get_logger(module_name)
+        if logger.isEnabledFor(level):
+            # Attribute the record to the caller rather than to this wrapper
+            kwargs['stacklevel'] = kwargs.get('stacklevel', 1) + 2
+            logger._log(level, msg, args, **kwargs)
 
 
-log = GlobalLogger()
\ No newline at end of file
+log = GlobalLogger()
@@ -0,0 +1,40 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""各测试共用的 EventBus 辅助函数"""
+import asyncio
+
+from core.event_bus import EventBus, Event
+
+
+def new_bus() -> EventBus:
+    """EventBus 是单例，每个测试丢弃之前的实例"""
+    EventBus._instance = None
+    return EventBus()
+
+
+def run(test):
+    """在新的事件循环中用新的总线运行 test(bus)，结束后关闭总线"""
+    async def main():
+        bus = new_bus()
+        bus.bind_loop()
+        try:
+            return await test(bus)
+        finally:
+            bus.shutdown()
+    return asyncio.run(main())
+
+
+def publish(bus: EventBus, name: str, data=None, **kwargs):
+    return bus.publish(Event(name=name, data=data, source="test", **kwargs))
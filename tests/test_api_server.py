@@ -0,0 +1,136 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""APIServer 的同步处理函数卸载到线程池、线程池在 stop() 之后重建、返回值转换与路由指标"""
+import time
+import asyncio
+import threading
+
+import pytest
+from quart import Response, request
+
+from core.api_server import APIServer
+
+
+def _serve(test):
+    async def main():
+        server = APIServer(port=0, handler_workers=4)
+        try:
+            return await test(server, server.app.test_client())
+        finally:
+            await server.stop()
+    return asyncio.run(main())
+
+
+# === 同步处理函数 ===
+
+def test_sync_handlers_run_in_the_pool_with_the_request_context():
+    async def test(server, client):
+        def slow(request_arg):
+            time.sleep(0.2)
+            # 线程中仍然可以使用 Quart 的请求上下文
+            return {'thread': threading.current_thread().name, 'path': request.path}
+
+        await server.add_route("/slow", ["GET"], slow)
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(client.get("/slow") for _ in range(3)))
+        elapsed = time.perf_counter() - started
+        return [await response.get_json() for response in responses], elapsed
+
+    bodies, elapsed = _serve(test)
+    assert all(body['thread'].startswith("APIServer-handlers") for body in bodies)
+    assert all(body['path'] == "/slow" for body in bodies)
+    # 三个阻塞的处理函数并行执行，没有卡住事件循环
+    assert elapsed < 0.5
+
+
+def test_inline_handlers_run_on_the_loop_and_awaitables_are_awaited():
+    async def test(server, client):
+        loop_thread = threading.current_thread().name
+
+        def inline(request):
+            return {'on_loop': threading.current_thread().name == loop_thread}
+
+        async def later():
+            return {'awaited': True}
+
+        def returns_awaitable(request):
+            return later()
+
+        await server.add_route("/inline", ["GET"], inline, inline=True)
+        await server.add_route("/awaitable", ["GET"], returns_awaitable)
+        return (await (await client.get("/inline")).get_json(),
+                await (await client.get("/awaitable")).get_json())
+
+    assert _serve(test) == ({'on_loop': True}, {'awaited': True})
+
+
+def test_executor_is_recreated_after_stop():
+    async def test(server, client):
+        def handler(request):
+            return "ok"
+
+        await server.add_route("/sync", ["GET"], handler)
+        await server.start()
+        first = server.executor
+        await server.stop()
+        assert server.executor is None
+        with pytest.raises(RuntimeError):
+            first.submit(int)
+        # 停止之后的请求按需创建新的线程池
+        response = await client.get("/sync")
+        assert server.executor is not None and server.executor is not first
+        await server.start()
+        return response.status_code, await response.get_data(as_text=True)
+
+    assert _serve(test) == (200, "ok")
+
+
+# === 返回值与指标 ===
+
+def test_return_values_are_converted():
+    async def test(server, client):
+        async def custom(request):
+            return Response("a,b", content_type="text/csv")
+
+        async def html(request):
+            return "<p>hi</p>"
+
+        async def created(request):
+            return {'id': 1}, 201
+
+        for path, handler in (("/csv", custom), ("/html", html), ("/created", created)):
+            await server.add_route(path, ["GET", "POST"], handler)
+        csv = await client.get("/csv")
+        page = await client.get("/html")
+        made = await client.post("/created")
+        return (csv.content_type, page.mimetype, made.status_code, await made.get_json())
+
+    assert _serve(test) == ("text/csv", "text/html", 201, {'id': 1})
+
+
+def test_handler_errors_become_500_and_are_counted():
+    async def test(server, client):
+        def broken(request):
+            raise RuntimeError("boom")
+
+        await server.add_route("/broken", ["GET"], broken)
+        response = await client.get("/broken")
+        return response.status_code, await response.get_json(), server.get_metrics()
+
+    status, body, metrics = _serve(test)
+    assert (status, body) == (500, {'error': "boom"})
+    assert metrics['routes']['/broken']['errors'] == 1
+    assert metrics['routes']['/broken']['count'] == 1
+    assert metrics['executor']['completed'] == 1
@@ -0,0 +1,154 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""后台日志写入线程的批量写入、队列溢出策略、flush 与关闭"""
+import io
+import sys
+import logging
+import threading
+
+from utils.logger import AsyncLogHandler, LogOverflowPolicy
+
+
+class _GatedHandler(logging.Handler):
+    """收到第一条记录后阻塞写入线程，直到 gate 被设置"""
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+        self.entered = threading.Event()
+        self.messages = []
+
+    def handle(self, record):
+        self.entered.set()
+        self.gate.wait(5)
+        self.messages.append(record.getMessage())
+        return True
+
+
+def _record(msg, *args, level=logging.INFO, exc_info=None):
+    return logging.LogRecord("test", level, __file__, 1, msg, args, exc_info)
+
+
+def _stream():
+    stream = io.StringIO()
+    target = logging.StreamHandler(stream)
+    target.setFormatter(logging.Formatter('{levelname} {message}', style='{'))
+    return stream, target
+
+
+def _blocked(capacity, policy):
+    """返回写入线程已被阻塞在第一条记录上的处理器"""
+    target = _GatedHandler()
+    handler = AsyncLogHandler([target], capacity=capacity, policy=policy)
+    handler.emit(_record("first"))
+    assert target.entered.wait(5)
+    return handler, target
+
+
+# === 写入 ===
+
+def test_records_reach_stream_targets_in_order():
+    stream, target = _stream()
+    handler = AsyncLogHandler([target])
+    target.setLevel(logging.INFO)
+    for index in range(5):
+        handler.emit(_record("line %d", index))
+    handler.emit(_record("hidden", level=logging.DEBUG))
+    assert handler.flush()
+    handler.close()
+    assert stream.getvalue().splitlines() == [f"INFO line {index}" for index in range(5)]
+    assert handler.stats()['written'] == 6
+
+
+def test_arguments_and_tracebacks_are_frozen_at_emit():
+    stream, target = _stream()
+    handler = AsyncLogHandler([target])
+    data = ["before"]
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = _record("data: %s", data, exc_info=sys.exc_info())
+    handler.emit(record)
+    data[0] = "after"
+    assert record.exc_info is None and "ValueError: boom" in record.exc_text
+    handler.close()
+    assert "data: ['before']" in stream.getvalue()
+
+
+# === 队列溢出 ===
+
+def test_drop_newest_keeps_the_queued_records():
+    handler, target = _blocked(2, LogOverflowPolicy.DROP_NEWEST)
+    for index in range(4):
+        handler.emit(_record(f"r{index}"))
+    assert handler.stats()['dropped'] == 2
+    target.gate.set()
+    handler.close()
+    assert target.messages[:3] == ["first", "r0", "r1"]
+    # 写入线程追上之后报告丢弃的数量
+    assert target.messages[3] == "Log queue overflowed, 2 records were dropped"
+
+
+def test_drop_oldest_keeps_the_newest_records():
+    handler, target = _blocked(2, LogOverflowPolicy.DROP_OLDEST)
+    for index in range(4):
+        handler.emit(_record(f"r{index}"))
+    target.gate.set()
+    handler.close()
+    assert target.messages[:3] == ["first", "r2", "r3"]
+
+
+def test_block_policy_waits_for_the_writer():
+    handler, target = _blocked(1, LogOverflowPolicy.BLOCK)
+    handler.emit(_record("queued"))
+    producer = threading.Thread(target=handler.emit, args=(_record("waiting"),))
+    producer.start()
+    producer.join(0.1)
+    assert producer.is_alive()
+    target.gate.set()
+    producer.join(5)
+    handler.close()
+    assert target.messages == ["first", "queued", "waiting"]
+    assert handler.stats()['dropped'] == 0
+
+
+# === flush 与关闭 ===
+
+def test_flush_times_out_while_the_writer_is_stuck():
+    handler, target = _blocked(10, LogOverflowPolicy.DROP_OLDEST)
+    assert not handler.flush(timeout=0.05)
+    target.gate.set()
+    assert handler.flush()
+    handler.close()
+
+
+def test_records_after_close_are_written_synchronously():
+    stream, target = _stream()
+    handler = AsyncLogHandler([target])
+    handler.close()
+    handler.emit(_record("late"))
+    assert stream.getvalue() == "INFO late\n"
+
+
+def test_replace_target_swaps_and_closes_the_old_handler():
+    old_stream, old = _stream()
+    new_stream, new = _stream()
+    handler = AsyncLogHandler([old])
+    handler.emit(_record("one"))
+    handler.flush()
+    handler.replace_target(old, new)
+    handler.emit(_record("two"))
+    handler.close()
+    assert old_stream.getvalue() == "INFO one\n"
+    assert new_stream.getvalue() == "INFO two\n"
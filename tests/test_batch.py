@@ -0,0 +1,100 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""subscribe_batch 的批次划分与响应分发"""
+import asyncio
+
+import pytest
+
+from core.event_queue import EventBatcher
+
+from helpers import publish, run
+
+
+def test_full_batch_is_delivered_immediately():
+    async def test(bus):
+        batches = []
+
+        async def consumer(events):
+            batches.append([event.data for event in events])
+
+        bus.subscribe_batch("danmaku", consumer, max_items=3, max_delay=10)
+        for value in range(7):
+            await publish(bus, "danmaku", value)
+        await asyncio.sleep(0.01)
+        # 第 7 个事件还在等待凑满批次
+        return batches
+
+    assert run(test) == [[0, 1, 2], [3, 4, 5]]
+
+
+def test_partial_batch_is_delivered_after_max_delay():
+    async def test(bus):
+        batches = []
+        bus.subscribe_batch("danmaku", lambda events: batches.append(len(events)), max_items=10, max_delay=0.02)
+        await publish(bus, "danmaku", 1)
+        await publish(bus, "danmaku", 2)
+        await asyncio.sleep(0.005)
+        early = list(batches)
+        await asyncio.sleep(0.05)
+        return early, batches
+
+    assert run(test) == ([], [2])
+
+
+def test_batch_results_answer_requests_by_position():
+    async def test(bus):
+        bus.subscribe_batch("double", lambda events: [event.data * 2 for event in events],
+                            max_items=2, max_delay=0.01)
+        return await asyncio.gather(
+            bus.request("double", 1, "test", timeout=1),
+            bus.request("double", 2, "test", timeout=1),
+            bus.request("double", 3, "test", timeout=1),
+        )
+
+    assert run(test) == [2, 4, 6]
+
+
+def test_failing_batch_gives_empty_results():
+    async def test(bus):
+        def broken(events):
+            raise RuntimeError("boom")
+
+        bus.subscribe_batch("ask", broken, max_items=1, max_delay=0.01)
+        result = await bus.request("ask", None, "test", timeout=1)
+        stats = bus.get_queue_stats()["ask"][0]
+        return result, stats["batches"]
+
+    assert run(test) == ({"no_response": True}, 1)
+
+
+def test_unsubscribe_answers_pending_batch_requests():
+    async def test(bus):
+        def consumer(events):
+            return [event.data for event in events]
+
+        bus.subscribe_batch("ask", consumer, max_items=10, max_delay=10)
+        request = asyncio.ensure_future(bus.request("ask", 1, "test", timeout=1))
+        await asyncio.sleep(0.01)
+        bus.unsubscribe("ask", consumer)
+        return await request
+
+    assert run(test) == {"no_response": True}
+
+
+def test_invalid_batch_settings_are_rejected():
+    with pytest.raises(ValueError):
+        EventBatcher(0, 1)
+    with pytest.raises(ValueError):
+        EventBatcher(1, -1)
@@ -0,0 +1,184 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""缓冲池的块复用，以及事件总线在各条路径上对 BufferPayload 引用的持有与释放"""
+import asyncio
+import pickle
+
+import pytest
+
+from core.buffer_pool import BufferPayload, BufferPool, release_payloads
+from core.event_bus import DispatchMode
+
+from helpers import publish, run
+
+
+def _pool():
+    return BufferPool(block_size=16, blocks=2, name="test")
+
+
+# === 缓冲池 ===
+
+def test_blocks_return_to_the_pool_on_release():
+    pool = _pool()
+    with pool.wrap(b"abc") as payload:
+        assert payload.tobytes() == b"abc"
+        assert pool.stats()['in_use'] == 1
+    assert payload.released
+    assert pool.stats()['in_use'] == 0
+    assert pool.stats()['free'] == 2
+    with pytest.raises(ValueError):
+        payload.view
+
+
+def test_oversized_and_exhausted_requests_fall_back():
+    pool = _pool()
+    big = pool.acquire(32)
+    held = [pool.acquire(4), pool.acquire(4)]
+    extra = pool.acquire(4)
+    stats = pool.stats()
+    assert stats['fallback'] == 2
+    assert stats['in_use'] == 2
+    for payload in [big, extra, *held]:
+        payload.release()
+    assert pool.stats()['free'] == 2
+
+
+def test_release_payloads_walks_nested_containers():
+    pool = _pool()
+    first, second = pool.wrap(b"a"), pool.wrap(b"b")
+    release_payloads({'frames': [first, (second,)], 'other': 1})
+    assert first.released and second.released
+
+
+def test_pickled_payload_is_a_standalone_copy():
+    pool = _pool()
+    with pool.wrap(b"data") as payload:
+        payload.meta = {'rate': 24000}
+        copy = pickle.loads(pickle.dumps(payload))
+    assert copy.tobytes() == b"data"
+    assert copy.meta == {'rate': 24000}
+    assert not copy.released
+
+
+# === 事件总线中的引用 ===
+
+def test_subscribers_release_their_references_after_handling():
+    async def test(bus):
+        pool = _pool()
+        seen = []
+
+        async def reader(event):
+            seen.append(event.data.tobytes())
+
+        def failing(event):
+            raise RuntimeError("boom")
+
+        bus.subscribe("audio", reader)
+        bus.subscribe("audio", failing)
+        payload = pool.wrap(b"pcm")
+        await publish(bus, "audio", payload)
+        # 两个订阅者的引用都已释放（包括抛出异常的那个），只剩发布者的引用
+        assert payload.refcount == 1
+        payload.release()
+        return seen, pool.stats()['in_use']
+
+    assert run(test) == ([b"pcm"], 0)
+
+
+def test_retained_payload_outlives_the_callback():
+    async def test(bus):
+        pool = _pool()
+        kept = []
+
+        async def keeper(event):
+            kept.append(event.data.retain())
+
+        bus.subscribe("audio", keeper)
+        with pool.wrap(b"pcm") as payload:
+            await publish(bus, "audio", payload)
+        assert not kept[0].released
+        kept[0].release()
+        return pool.stats()['in_use']
+
+    assert run(test) == 0
+
+
+def test_batched_and_dropped_events_release_their_references():
+    async def test(bus):
+        pool = _pool()
+        release = asyncio.Event()
+
+        async def batch_handler(events):
+            return [None] * len(events)
+
+        async def slow(event):
+            await release.wait()
+
+        bus.subscribe_batch("batched", batch_handler, max_items=2, max_delay=1.0)
+        bus.set_dispatch_mode("queued", DispatchMode.CONCURRENT)
+        bus.subscribe("queued", slow, queue_size=1, overflow="drop_oldest")
+
+        payloads = [pool.wrap(b"a"), pool.wrap(b"b")]
+        for payload in payloads:
+            await publish(bus, "batched", payload)
+        await asyncio.sleep(0.01)
+        batched = [payload.refcount for payload in payloads]
+
+        queued = [BufferPayload.from_bytes(b"x") for _ in range(3)]
+        for payload in queued:
+            await publish(bus, "queued", payload)
+        await asyncio.sleep(0.01)
+        # 第一个事件在处理中，第二个被第三个挤出队列
+        dropped = queued[1].refcount
+        release.set()
+        await asyncio.sleep(0.01)
+        handled = [payload.refcount for payload in queued]
+        return batched, dropped, handled
+
+    batched, dropped, handled = run(test)
+    assert batched == [1, 1]
+    assert dropped == 1
+    assert handled == [1, 1, 1]
+
+
+def test_unsubscribe_releases_pending_batch():
+    async def test(bus):
+        async def batch_handler(events):
+            pass
+
+        bus.subscribe_batch("batched", batch_handler, max_items=10, max_delay=10.0)
+        payload = BufferPayload.from_bytes(b"a")
+        await publish(bus, "batched", payload)
+        assert payload.refcount == 2
+        bus.unsubscribe("batched", batch_handler)
+        return payload.refcount
+
+    assert run(test) == 1
+
+
+def test_state_keeps_a_reference_until_cleared():
+    async def test(bus):
+        bus.declare_state("frame")
+        first = BufferPayload.from_bytes(b"1")
+        second = BufferPayload.from_bytes(b"2")
+        await publish(bus, "frame", first)
+        assert first.refcount == 2
+        await publish(bus, "frame", second)
+        # 新值替换旧值时释放旧值的引用
+        assert first.refcount == 1 and second.refcount == 2
+        bus.clear_state("frame")
+        return second.refcount
+
+    assert run(test) == 1
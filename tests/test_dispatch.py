@@ -0,0 +1,110 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""EventBus 的分发方式与订阅者时限"""
+import asyncio
+
+from core.event_bus import DispatchMode
+
+from helpers import publish, run
+
+
+def test_sequential_dispatch_runs_subscribers_one_after_another():
+    async def test(bus):
+        calls = []
+
+        async def slow(event):
+            calls.append("slow start")
+            await asyncio.sleep(0.02)
+            calls.append("slow end")
+
+        async def fast(event):
+            calls.append("fast")
+
+        bus.subscribe("topic", slow)
+        bus.subscribe("topic", fast)
+        await publish(bus, "topic")
+        return calls
+
+    assert run(test) == ["slow start", "slow end", "fast"]
+
+
+def test_concurrent_dispatch_overlaps_subscribers():
+    async def test(bus):
+        calls = []
+
+        async def slow(event):
+            calls.append("slow start")
+            await asyncio.sleep(0.02)
+            calls.append("slow end")
+
+        async def fast(event):
+            calls.append("fast")
+
+        bus.set_dispatch_mode("topic", DispatchMode.CONCURRENT)
+        bus.subscribe("topic", slow)
+        bus.subscribe("topic", fast)
+        await publish(bus, "topic")
+        return calls
+
+    assert run(test) == ["slow start", "fast", "slow end"]
+
+
+def test_subscriber_error_does_not_stop_other_subscribers():
+    async def test(bus):
+        received = []
+
+        def broken(event):
+            raise RuntimeError("boom")
+
+        bus.subscribe("topic", broken, inline=True)
+        bus.subscribe("topic", lambda event: received.append(event.data), inline=True)
+        await publish(bus, "topic", 1)
+        return received
+
+    assert run(test) == [1]
+
+
+def test_handler_timeout_only_abandons_the_slow_subscriber():
+    async def test(bus):
+        received = []
+
+        async def slow(event):
+            await asyncio.sleep(1)
+            received.append("slow")
+
+        bus.subscribe("topic", slow, timeout=0.02)
+        bus.subscribe("topic", lambda event: received.append("fast"), inline=True)
+        await publish(bus, "topic")
+        handler = bus.metrics.handler("topic", slow.__qualname__)
+        return received, handler.timeouts
+
+    assert run(test) == (["fast"], 1)
+
+
+def test_default_handler_timeout_applies_to_subscribers_without_their_own():
+    async def test(bus):
+        results = []
+
+        async def slow(event):
+            await asyncio.sleep(1)
+            return "late"
+
+        bus.default_handler_timeout = 0.02
+        bus.subscribe("ask", slow)
+        bus.subscribe("ask", lambda event: "early", inline=True)
+        results.append(await bus.request("ask", None, "test", timeout=0.5))
+        return results
+
+    assert run(test) == ["early"]
@@ -0,0 +1,82 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Event 的构造、按需创建的附属字段与时间戳"""
+from datetime import datetime
+
+import pytest
+
+from core.event_bus import Event
+
+from helpers import publish, run
+
+
+def test_plain_event_has_no_context_object():
+    event = Event(name="chat.message", data="hi", source="chat")
+    assert event._context is None
+    assert (event.response_channel, event.origin, event.trace_id, event.span_id, event.parent_span_id) == \
+        (None, None, None, None, None)
+    # 写入 None 也不会创建附属对象
+    event.origin = None
+    assert event._context is None
+
+
+def test_context_fields_are_created_on_first_use():
+    event = Event(name="chat.message", data="hi", source="chat", origin="cpu-1")
+    assert event.origin == "cpu-1"
+    event.trace_id = 1
+    assert (event.origin, event.trace_id, event.span_id) == ("cpu-1", 1, None)
+
+    other = Event(name="chat.message", data="hi", source="chat")
+    other.response_channel = "response_1"
+    assert other.response_channel == "response_1"
+    assert other.origin is None
+
+
+def test_events_have_no_instance_dict():
+    event = Event(name="chat.message", data="hi", source="chat")
+    with pytest.raises(AttributeError):
+        event.unknown = 1
+
+
+def test_timestamp_is_created_lazily_and_can_be_set():
+    event = Event(name="chat.message", data=None, source="chat")
+    assert event._timestamp is None
+    assert abs((event.timestamp - datetime.now()).total_seconds()) < 1
+    moment = datetime(2026, 1, 1)
+    event.timestamp = moment
+    assert Event(name="a", data=None, source="b", timestamp=moment).timestamp == moment
+
+
+def test_equality_covers_the_dataclass_fields():
+    moment = datetime(2026, 1, 1)
+    first = Event(name="a", data=1, source="s", timestamp=moment, response_channel="c")
+    second = Event(name="a", data=1, source="s", timestamp=moment, response_channel="c", origin="cpu-1")
+    assert first == second
+    second.response_channel = "d"
+    assert first != second
+    assert "response_channel='c'" in repr(first)
+
+
+def test_requests_set_the_response_channel_only_for_request_events():
+    async def test(bus):
+        seen = []
+        bus.subscribe("ask", lambda event: seen.append(event.response_channel) or "ok", inline=True)
+        await publish(bus, "ask")
+        result = await bus.request("ask", None, "test")
+        return seen, result
+
+    seen, result = run(test)
+    assert seen[0] is None and seen[1] is not None
+    assert result == "ok"
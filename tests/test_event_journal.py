@@ -0,0 +1,133 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""事件日志的分段写入、CRC 校验、不完整尾部的恢复与重放"""
+import pytest
+
+from core.event_journal import JournalReader, iter_journal, list_segments
+
+from helpers import publish, run
+
+
+def _record(tmp_path, names, **journal_options):
+    """在日志启用期间依次发布 names 中的事件，返回日志目录"""
+    async def test(bus):
+        bus.enable_journal(tmp_path, **journal_options)
+        for index, name in enumerate(names):
+            await publish(bus, name, {'index': index})
+        bus.disable_journal()
+
+    run(test)
+    return tmp_path
+
+
+# === 写入与读取 ===
+
+def test_records_are_read_back_in_order(tmp_path):
+    _record(tmp_path, ["a", "b", "c"])
+    records = list(iter_journal(tmp_path))
+    assert [fields[0] for _, fields in records] == ["a", "b", "c"]
+    assert [fields[1] for _, fields in records] == [{'index': 0}, {'index': 1}, {'index': 2}]
+    timestamps = [timestamp_ns for timestamp_ns, _ in records]
+    assert timestamps == sorted(timestamps)
+
+
+def test_segments_roll_over_at_size_limit(tmp_path):
+    _record(tmp_path, [f"topic.{index}" for index in range(20)], segment_size=256)
+    assert len(list_segments(tmp_path)) > 1
+    assert [fields[0] for _, fields in iter_journal(tmp_path)] == [f"topic.{index}" for index in range(20)]
+
+
+def test_unpicklable_data_is_skipped(tmp_path):
+    async def test(bus):
+        bus.enable_journal(tmp_path)
+        await publish(bus, "ok")
+        await publish(bus, "lambda", lambda: None)
+        stats = bus.get_metrics()['journal']
+        bus.disable_journal()
+        return stats
+
+    assert run(test)['skipped'] == 1
+    assert [fields[0] for _, fields in iter_journal(tmp_path)] == ["ok"]
+
+
+# === 校验与恢复 ===
+
+def test_truncated_tail_is_ignored(tmp_path):
+    _record(tmp_path, ["a", "b"])
+    segment = list_segments(tmp_path)[0]
+    data = segment.read_bytes()
+    segment.write_bytes(data[:-3])
+    reader = JournalReader(segment)
+    assert [fields[0] for _, fields in reader] == ["a"]
+    assert reader.truncated
+
+
+def test_corrupted_record_stops_reading_at_crc_mismatch(tmp_path):
+    _record(tmp_path, ["a", "b"])
+    segment = list_segments(tmp_path)[0]
+    data = bytearray(segment.read_bytes())
+    data[-1] ^= 0xFF
+    segment.write_bytes(bytes(data))
+    reader = JournalReader(segment)
+    assert [fields[0] for _, fields in reader] == ["a"]
+    assert reader.truncated
+
+
+def test_foreign_file_is_rejected(tmp_path):
+    path = tmp_path / "events-000000.journal"
+    path.write_bytes(b"NOPE" + bytes(16))
+    with pytest.raises(ValueError):
+        list(JournalReader(path))
+
+
+def test_reopening_a_directory_starts_a_new_segment(tmp_path):
+    _record(tmp_path, ["first"])
+    _record(tmp_path, ["second"])
+    assert len(list_segments(tmp_path)) == 2
+    assert [fields[0] for _, fields in iter_journal(tmp_path)] == ["first", "second"]
+
+
+# === 重放 ===
+
+def test_replay_republishes_without_journaling_again(tmp_path):
+    _record(tmp_path / "source", ["x", "y", "x"])
+
+    async def test(bus):
+        received = []
+
+        async def handler(event):
+            received.append((event.name, event.data['index'], event.origin))
+
+        bus.subscribe("x", handler)
+        bus.subscribe("y", handler)
+        bus.enable_journal(tmp_path / "again")
+        count = await bus.replay_journal(tmp_path / "source", speed=None, filter_func=lambda name: name == "x")
+        bus.disable_journal()
+        return count, received
+
+    count, received = run(test)
+    assert count == 2
+    assert received == [("x", 0, "journal"), ("x", 2, "journal")]
+    assert list(iter_journal(tmp_path / "again")) == []
+
+
+def test_replay_rejects_non_positive_speed(tmp_path):
+    _record(tmp_path, ["a"])
+
+    async def test(bus):
+        with pytest.raises(ValueError):
+            await bus.replay_journal(tmp_path, speed=0)
+
+    run(test)
@@ -0,0 +1,132 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""事件指标的计数、分位数、按读取方计算的速率与 Prometheus 文本渲染"""
+import asyncio
+
+from core.event_metrics import (LATENCY_BUCKETS, EventMetrics, LatencyHistogram, RouteMetrics,
+                                render_prometheus)
+
+from helpers import publish, run
+
+
+def _samples(text):
+    """把 Prometheus 文本解析为 {带标签的指标名: 数值}，跳过注释行"""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = float(value)
+    return samples
+
+
+# === 直方图 ===
+
+def test_histogram_quantiles_and_overflow_bucket():
+    histogram = LatencyHistogram()
+    assert histogram.quantile(0.5) is None
+    for _ in range(99):
+        histogram.observe(0.0002)
+    histogram.observe(20.0)
+    snapshot = histogram.snapshot()
+    assert snapshot['count'] == 100
+    assert snapshot['max'] == 20.0
+    assert LATENCY_BUCKETS[0] <= snapshot['p50'] <= LATENCY_BUCKETS[1]
+    # 超出最大桶的观测落在 +Inf 桶，分位数取观测到的最大值
+    assert histogram.quantile(1.0) == 20.0
+    assert histogram.counts[-1] == 1
+
+
+def test_route_metrics_snapshot_includes_errors():
+    route = RouteMetrics()
+    route.latency.observe(0.01)
+    route.errors += 1
+    snapshot = route.snapshot()
+    assert snapshot['count'] == 1 and snapshot['errors'] == 1
+
+
+# === 计数与速率 ===
+
+def test_publish_and_handler_counts():
+    async def test(bus):
+        async def handler(event):
+            if event.data == "bad":
+                raise ValueError(event.data)
+
+        bus.subscribe("counted", handler, executor="mod")
+        await publish(bus, "counted", "good")
+        await publish(bus, "counted", "bad")
+        return bus.get_metrics()
+
+    snapshot = run(test)
+    assert snapshot['topics']['counted']['published'] == 2
+    assert snapshot['subscribers']['counted'] == 1
+    handler = next(entry for entry in snapshot['handlers'] if entry['topic'] == "counted")
+    assert handler['module'] == "mod"
+    assert handler['errors'] == 1
+    # 只有正常完成的处理计入耗时
+    assert handler['latency']['count'] == 1
+
+
+def test_publish_rate_is_tracked_per_reader():
+    metrics = EventMetrics()
+    metrics.topic("t").published = 10
+    first = metrics.snapshot("a")['topics']['t']['publish_rate']
+    assert first > 0
+    # 读取方 a 的基准已经前移，没有新发布时速率为 0；读取方 b 仍从创建时算起
+    assert metrics.snapshot("a")['topics']['t']['publish_rate'] == 0.0
+    assert metrics.snapshot("b")['topics']['t']['publish_rate'] > 0
+
+
+# === Prometheus 文本 ===
+
+def test_render_prometheus_cumulative_buckets_and_labels():
+    async def test(bus):
+        async def handler(event):
+            await asyncio.sleep(0)
+
+        bus.subscribe('say"hi"', handler, executor="mod")
+        for _ in range(3):
+            await publish(bus, 'say"hi"')
+        routes = {"/api": RouteMetrics()}
+        routes["/api"].latency.observe(0.002)
+        routes["/api"].errors += 1
+        return render_prometheus(bus.metrics, bus.get_metrics(reader="prometheus"), routes)
+
+    text = run(test)
+    assert "# TYPE swarmclone_event_handler_seconds histogram" in text
+    samples = _samples(text)
+    topic = 'topic="say\\"hi\\""'
+    assert samples[f'swarmclone_event_published_total{{{topic}}}'] == 3
+    assert samples[f'swarmclone_event_handler_seconds_count{{{topic},module="mod"}}'] == 3
+    assert samples[f'swarmclone_event_handler_seconds_bucket{{{topic},module="mod",le="+Inf"}}'] == 3
+    buckets = [samples[f'swarmclone_event_handler_seconds_bucket{{{topic},module="mod",le="{bound}"}}']
+               for bound in LATENCY_BUCKETS]
+    assert buckets == sorted(buckets)
+    assert samples['swarmclone_http_request_seconds_bucket{route="/api",le="0.0025"}'] == 1
+    assert samples['swarmclone_http_request_seconds_bucket{route="/api",le="0.001"}'] == 0
+    assert samples['swarmclone_http_handler_errors_total{route="/api"}'] == 1
+    assert samples['swarmclone_executor_active{pool="default"}'] == 0
+
+
+def test_render_prometheus_includes_rate_limit_counters():
+    async def test(bus):
+        bus.configure_rate_limits({'topics': {"spam": {'rate': 1, 'burst': 1, 'policy': "drop"}}})
+        bus.subscribe("spam", lambda event: None)
+        for _ in range(3):
+            await publish(bus, "spam")
+        return render_prometheus(bus.metrics, bus.get_metrics())
+
+    samples = _samples(run(test))
+    assert samples['swarmclone_event_rate_limited_total{scope="topic",key="spam",action="dropped"}'] == 2
@@ -0,0 +1,96 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""订阅者专属队列的溢出策略"""
+import asyncio
+
+import pytest
+
+from core.event_queue import OverflowPolicy, SubscriberQueue
+
+from helpers import publish, run
+
+
+async def _fill_queue(bus, policy, coalesce_key=None):
+    """订阅者阻塞在第一个事件上时再发布 4 个事件，返回它最终处理的数据"""
+    received = []
+    release = asyncio.Event()
+
+    async def consumer(event):
+        received.append(event.data)
+        await release.wait()
+
+    bus.subscribe("audio", consumer, queue_size=2, overflow=policy, coalesce_key=coalesce_key)
+    for value in range(5):
+        await publish(bus, "audio", value)
+        await asyncio.sleep(0)
+    release.set()
+    await asyncio.sleep(0.05)
+    return received
+
+
+def test_drop_oldest_keeps_the_latest_events():
+    async def test(bus):
+        return await _fill_queue(bus, OverflowPolicy.DROP_OLDEST)
+
+    assert run(test) == [0, 3, 4]
+
+
+def test_drop_newest_keeps_the_earliest_events():
+    async def test(bus):
+        return await _fill_queue(bus, OverflowPolicy.DROP_NEWEST)
+
+    assert run(test) == [0, 1, 2]
+
+
+def test_coalesce_replaces_events_with_the_same_key():
+    async def test(bus):
+        return await _fill_queue(bus, OverflowPolicy.COALESCE, coalesce_key=lambda event: event.data % 2)
+
+    assert run(test) == [0, 3, 4]
+
+
+def test_block_waits_for_space_and_loses_nothing():
+    async def test(bus):
+        received = []
+
+        async def consumer(event):
+            await asyncio.sleep(0.005)
+            received.append(event.data)
+
+        bus.subscribe("audio", consumer, queue_size=1, overflow="block")
+        for value in range(5):
+            await publish(bus, "audio", value)
+        await asyncio.sleep(0.05)
+        return received
+
+    assert run(test) == [0, 1, 2, 3, 4]
+
+
+def test_queue_stats_count_drops():
+    async def test(bus):
+        await _fill_queue(bus, OverflowPolicy.DROP_NEWEST)
+        return bus.get_queue_stats()["audio"][0]
+
+    stats = run(test)
+    assert stats["dropped"] == 2
+    assert stats["processed"] == 3
+    assert stats["depth"] == 0
+
+
+def test_invalid_queue_settings_are_rejected():
+    with pytest.raises(ValueError):
+        SubscriberQueue(0)
+    with pytest.raises(ValueError):
+        SubscriberQueue(2, OverflowPolicy.COALESCE)
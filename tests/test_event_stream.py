@@ -0,0 +1,112 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""request_stream 的分片传递、提前结束与统计"""
+import asyncio
+import gc
+
+import pytest
+
+from helpers import run
+
+
+def _tokens(count: int, closed: list):
+    async def generate(event):
+        try:
+            for index in range(count):
+                yield f"{event.data}-{index}"
+        finally:
+            closed.append(event.data)
+    return generate
+
+
+def test_stream_yields_every_chunk_and_updates_stats():
+    async def test(bus):
+        closed = []
+        bus.subscribe("llm.generate", _tokens(3, closed))
+        async with bus.request_stream("llm.generate", "t", "test") as stream:
+            chunks = [chunk async for chunk in stream]
+        return chunks, closed, bus.get_stream_stats()["llm.generate"]
+
+    chunks, closed, stats = run(test)
+    assert chunks == ["t-0", "t-1", "t-2"]
+    assert closed == ["t"]
+    assert (stats["streams"], stats["active"], stats["chunks"]) == (1, 0, 3)
+    assert stats["ttfc_last"] is not None
+
+
+def test_plain_subscriber_result_is_a_single_chunk():
+    async def test(bus):
+        bus.subscribe("tts", lambda event: b"audio", inline=True)
+        return [chunk async for chunk in bus.request_stream("tts", None, "test")]
+
+    assert run(test) == [b"audio"]
+
+
+def test_closing_early_stops_the_producer():
+    async def test(bus):
+        closed = []
+        bus.subscribe("llm.generate", _tokens(1000, closed))
+        async with bus.request_stream("llm.generate", "t", "test", buffer_size=2) as stream:
+            async for chunk in stream:
+                break
+        return closed, bus.get_stream_stats()["llm.generate"]["active"]
+
+    assert run(test) == (["t"], 0)
+
+
+def test_dropped_stream_is_no_longer_active():
+    async def test(bus):
+        closed = []
+        bus.subscribe("llm.generate", _tokens(1000, closed))
+        stream = bus.request_stream("llm.generate", "t", "test", buffer_size=2)
+        await stream.__anext__()
+        # 不迭代完也不关闭就丢弃
+        del stream
+        gc.collect()
+        await asyncio.sleep(0.01)
+        return closed, bus.get_stream_stats()["llm.generate"]["active"]
+
+    assert run(test) == (["t"], 0)
+
+
+def test_producer_error_is_raised_to_the_consumer():
+    async def test(bus):
+        async def broken(event):
+            yield 1
+            raise RuntimeError("boom")
+
+        bus.subscribe("llm.generate", broken)
+        received = []
+        with pytest.raises(RuntimeError):
+            async for chunk in bus.request_stream("llm.generate", None, "test"):
+                received.append(chunk)
+        return received, bus.get_stream_stats()["llm.generate"]["active"]
+
+    assert run(test) == ([1], 0)
+
+
+def test_waiting_for_a_chunk_times_out():
+    async def test(bus):
+        async def stalled(event):
+            await asyncio.sleep(1)
+            yield "late"
+
+        bus.subscribe("llm.generate", stalled)
+        with pytest.raises(asyncio.TimeoutError):
+            async for _ in bus.request_stream("llm.generate", None, "test", timeout=0.02):
+                pass
+        return bus.get_stream_stats()["llm.generate"]["active"]
+
+    assert run(test) == 0
@@ -0,0 +1,129 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""同步订阅者的线程池选择、自动内联与线程池统计"""
+import threading
+import time
+
+from core.event_bus import Event, _AUTO_INLINE_SAMPLES
+from core.executor_pool import ExecutorPool
+
+from helpers import publish, run
+
+
+def _thread_name(names):
+    def callback(event):
+        names.append(threading.current_thread().name)
+    return callback
+
+
+def test_sync_subscribers_use_their_module_executor():
+    async def test(bus):
+        names = []
+        bus.set_module_executor("tts", 1)
+        bus.subscribe("speak", _thread_name(names), executor="tts")
+        bus.subscribe("speak", _thread_name(names))
+        bus.subscribe("speak", _thread_name(names), executor="unknown")
+        await publish(bus, "speak")
+        return names, bus.get_executor_stats()["pools"]
+
+    names, pools = run(test)
+    assert names[0].startswith("EventBus-tts")
+    assert names[1].startswith("EventBus-default")
+    # 没有同名线程池时使用默认线程池
+    assert names[2].startswith("EventBus-default")
+    assert pools["tts"]["completed"] == 1
+    assert pools["default"]["completed"] == 2
+
+
+def test_inline_subscribers_run_on_the_loop_thread():
+    async def test(bus):
+        names = []
+        bus.subscribe("tick", _thread_name(names), inline=True)
+        await publish(bus, "tick")
+        return names
+
+    assert run(test) == [threading.current_thread().name]
+
+
+def test_fast_subscribers_are_inlined_automatically():
+    async def test(bus):
+        names = []
+        bus.auto_inline_threshold = 0.01
+        bus.subscribe("tick", _thread_name(names))
+        for _ in range(_AUTO_INLINE_SAMPLES + 1):
+            await publish(bus, "tick")
+        return names, bus.get_executor_stats()["callbacks"][0]
+
+    names, callback = run(test)
+    # 积累足够的耗时样本之前在线程池中执行，之后直接在事件循环中调用
+    assert all(name.startswith("EventBus-default") for name in names[:_AUTO_INLINE_SAMPLES])
+    assert names[-1] == threading.current_thread().name
+    assert callback["inline"] is True
+    assert callback["calls"] == _AUTO_INLINE_SAMPLES + 1
+
+
+def test_slow_subscribers_stay_in_the_pool():
+    async def test(bus):
+        names = []
+        bus.auto_inline_threshold = 0.001
+
+        def slow(event):
+            time.sleep(0.002)
+            names.append(threading.current_thread().name)
+
+        bus.subscribe("tick", slow)
+        for _ in range(_AUTO_INLINE_SAMPLES + 1):
+            await publish(bus, "tick")
+        return names
+
+    assert all(name.startswith("EventBus-default") for name in run(test))
+
+
+def test_subscribers_calling_threadsafe_methods_are_never_inlined():
+    async def test(bus):
+        names = []
+        bus.auto_inline_threshold = 1.0
+
+        def relay(event):
+            names.append(threading.current_thread().name)
+            # 在线程中把事件交给事件循环，直接在事件循环中运行会死锁
+            bus.publish_threadsafe(Event(name="relayed", data=None, source="test"))
+
+        bus.subscribe("tick", relay)
+        for _ in range(_AUTO_INLINE_SAMPLES + 1):
+            await publish(bus, "tick")
+        return names, bus.get_executor_stats()["callbacks"][0]["inline"]
+
+    names, inline = run(test)
+    assert all(name.startswith("EventBus-default") for name in names)
+    assert inline is False
+
+
+def test_pool_counts_saturation():
+    pool = ExecutorPool("test", 1)
+    release = threading.Event()
+    try:
+        first = pool.submit(release.wait)
+        second = pool.submit(lambda: None)
+        time.sleep(0.01)
+        stats = pool.stats()
+        assert (stats["active"], stats["queued"], stats["saturated"]) == (1, 1, 1)
+        release.set()
+        first.result(timeout=1)
+        second.result(timeout=1)
+        assert pool.stats()["completed"] == 2
+    finally:
+        release.set()
+        pool.shutdown(wait=True)
@@ -0,0 +1,97 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""JSON Lines 日志的字段、按大小和日期轮转，以及已完成段的 gzip 压缩"""
+import gzip
+import json
+import time
+import logging
+import datetime
+
+from utils.logger import JsonLinesHandler
+
+
+def _record(msg, created=None, level=logging.INFO):
+    record = logging.LogRecord("modules.test", level, __file__, 1, msg, None, None)
+    if created is not None:
+        record.created = created
+    return record
+
+
+def _read(path):
+    opener = gzip.open if path.suffix == '.gz' else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_record_fields_and_context(tmp_path):
+    handler = JsonLinesHandler(tmp_path, compress=False)
+    record = _record("hello")
+    record.context = {'trace_id': "abc"}
+    record.exc_text = "Traceback"
+    handler.write_batch([record])
+    handler.close()
+    [entry] = _read(next(tmp_path.glob("*.jsonl")))
+    assert entry['level'] == "INFO"
+    assert entry['module'] == "modules.test"
+    assert entry['msg'] == "hello"
+    assert entry['trace_id'] == "abc"
+    assert entry['exc'] == "Traceback"
+
+
+def test_segments_rotate_by_size_and_are_compressed(tmp_path):
+    handler = JsonLinesHandler(tmp_path, max_bytes=200, compress=True)
+    handler.write_batch([_record(f"message {index:02d} " + "x" * 40) for index in range(10)])
+    handler.close()
+    compressed = sorted(tmp_path.glob("*.jsonl.gz"))
+    assert len(compressed) >= 2
+    assert not list(tmp_path.glob("*.tmp"))
+    # 最后一个段在关闭时没有写满，保持未压缩，下次启动时再压缩
+    segments = compressed + sorted(tmp_path.glob("*.jsonl"))
+    messages = [entry['msg'] for segment in segments for entry in _read(segment)]
+    assert messages == [f"message {index:02d} " + "x" * 40 for index in range(10)]
+    assert handler.stats()['written'] == 10
+
+
+def test_date_change_starts_a_new_segment(tmp_path):
+    handler = JsonLinesHandler(tmp_path, compress=False)
+    tomorrow = datetime.datetime.combine(datetime.date.today() + datetime.timedelta(days=1),
+                                         datetime.time(0, 0, 1)).timestamp()
+    handler.write_batch([_record("today"), _record("tomorrow", created=tomorrow)])
+    handler.close()
+    day = datetime.date.fromtimestamp(tomorrow).strftime('%Y-%m-%d')
+    [entry] = _read(tmp_path / f"{day}.000.jsonl")
+    assert entry['msg'] == "tomorrow"
+    assert handler.stats()['segments'] == 2
+
+
+def test_restart_continues_numbering_and_compresses_leftovers(tmp_path):
+    first = JsonLinesHandler(tmp_path, compress=False)
+    first.write_batch([_record("first run")])
+    first.close()
+    second = JsonLinesHandler(tmp_path, compress=True)
+    second.write_batch([_record("second run")])
+    second.close()
+    today = datetime.date.fromtimestamp(time.time()).strftime('%Y-%m-%d')
+    assert _read(tmp_path / f"{today}.000.jsonl.gz")[0]['msg'] == "first run"
+    assert _read(tmp_path / f"{today}.001.jsonl")[0]['msg'] == "second run"
+
+
+def test_level_and_filters_apply(tmp_path):
+    handler = JsonLinesHandler(tmp_path, compress=False)
+    handler.setLevel(logging.INFO)
+    handler.addFilter(lambda record: "secret" not in record.getMessage())
+    handler.write_batch([_record("debug", level=logging.DEBUG), _record("secret"), _record("kept")])
+    handler.close()
+    assert [entry['msg'] for entry in _read(next(tmp_path.glob("*.jsonl")))] == ["kept"]
@@ -0,0 +1,128 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""日志洪泛控制：按调用位置去重、按 logger 限速与采样，以及空闲时发出的汇总"""
+import time
+import logging
+import threading
+
+from utils.logger import AsyncLogHandler, LogFloodFilter
+
+
+def _record(msg, name="modules.flood", lineno=10, level=logging.INFO):
+    return logging.LogRecord(name, level, "/src/modules/flood.py", lineno, msg, None, None)
+
+
+def _filter(**config):
+    summaries = []
+    flood_filter = LogFloodFilter(summaries.append)
+    flood_filter.configure(config)
+    return flood_filter, summaries
+
+
+# === 去重 ===
+
+def test_f_string_flood_from_one_call_site_is_collapsed():
+    flood_filter, summaries = _filter(dedup_window=60, dedup_max_repeats=2)
+    passed = [flood_filter.filter(_record(f"弹幕 {index}")) for index in range(5)]
+    assert passed == [True, True, False, False, False]
+    flood_filter.flush()
+    [summary] = summaries
+    assert summary.getMessage().startswith("3 repeated messages suppressed")
+    assert summary.getMessage().endswith("last: 弹幕 4")
+    assert (summary.name, summary.lineno) == ("modules.flood", 10)
+
+
+def test_call_sites_are_counted_separately():
+    flood_filter, _ = _filter(dedup_window=60, dedup_max_repeats=1)
+    assert flood_filter.filter(_record("same", lineno=10))
+    assert flood_filter.filter(_record("same", lineno=11))
+    assert flood_filter.filter(_record("same", name="modules.other"))
+    assert not flood_filter.filter(_record("same", lineno=10))
+
+
+def test_warnings_are_never_suppressed():
+    flood_filter, _ = _filter(dedup_window=60, dedup_max_repeats=1, rate_limits={"modules": {'rate': 0.001}})
+    assert all(flood_filter.filter(_record("bad", level=logging.WARNING)) for _ in range(5))
+    assert flood_filter.stats()['suppressed'] == 0
+
+
+def test_tick_reports_a_flood_that_has_stopped():
+    flood_filter, summaries = _filter(dedup_window=0.05, dedup_max_repeats=1)
+    for index in range(3):
+        flood_filter.filter(_record(f"burst {index}"))
+    flood_filter.tick()
+    # 窗口还没有结束
+    assert summaries == []
+    time.sleep(0.06)
+    flood_filter.tick()
+    assert [summary.getMessage().split(' in ')[0] for summary in summaries] == ["2 repeated messages suppressed"]
+
+
+# === 限速与采样 ===
+
+def test_rate_limit_applies_to_child_loggers():
+    flood_filter, summaries = _filter(rate_limits={"modules": {'rate': 0.001, 'burst': 2}})
+    passed = [flood_filter.filter(_record("tick", name="modules.agent.dummy02", lineno=index)) for index in range(4)]
+    assert passed == [True, True, False, False]
+    assert flood_filter.filter(_record("tick", name="core.event_bus"))
+    flood_filter.flush()
+    assert [summary.getMessage() for summary in summaries] == [
+        "2 messages from modules dropped by rate limit or sampling"
+    ]
+
+
+def test_sampling_keeps_the_given_fraction():
+    flood_filter, _ = _filter(sampling={"modules": 0.25})
+    passed = [flood_filter.filter(_record("sample", lineno=index)) for index in range(8)]
+    assert passed.count(True) == 2
+
+
+def test_configure_reports_under_the_old_settings_first():
+    flood_filter, summaries = _filter(dedup_window=60, dedup_max_repeats=1)
+    flood_filter.filter(_record("a"))
+    flood_filter.filter(_record("a"))
+    flood_filter.configure(None)
+    assert len(summaries) == 1
+    assert not flood_filter.active
+
+
+# === 与后台写入线程配合 ===
+
+class _Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+        self.summary = threading.Event()
+
+    def handle(self, record):
+        self.messages.append(record.getMessage())
+        if "suppressed" in record.getMessage():
+            self.summary.set()
+        return True
+
+
+def test_idle_writer_emits_summaries_without_further_records():
+    target = _Collect()
+    handler = AsyncLogHandler([target])
+    flood_filter = LogFloodFilter(handler.emit)
+    flood_filter.set_dedup(0.05, 1)
+    handler.addFilter(flood_filter)
+    handler.set_idle_callback(flood_filter.tick, 0.02)
+    for index in range(4):
+        handler.handle(_record(f"flood {index}"))
+    assert target.summary.wait(2)
+    handler.close()
+    assert target.messages[0] == "flood 0"
+    assert target.messages[1].startswith("3 repeated messages suppressed")
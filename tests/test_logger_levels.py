@@ -0,0 +1,89 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""模块 logger 的级别门限在各种改变级别的方式下保持最新，记录归属于调用方"""
+import sys
+import logging
+
+import pytest
+
+from utils import logger as logger_module
+from utils.logger import get_logger, log, set_log_level
+
+
+class _Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def collected():
+    """收集根 logger 的记录，结束后恢复级别"""
+    root = logging.getLogger()
+    handler = _Collect()
+    root.addHandler(handler)
+    level = root.level
+    try:
+        yield handler.records
+    finally:
+        root.removeHandler(handler)
+        logging.disable(logging.NOTSET)
+        logging.getLogger("tests.quiet").setLevel(logging.NOTSET)
+        root.setLevel(level)
+
+
+def test_records_are_attributed_to_the_caller(collected):
+    module_log = get_logger("tests.module")
+    line = sys._getframe().f_lineno + 1
+    module_log.info("module %s", 1)
+    log.info("global")
+    assert [(record.name, record.getMessage()) for record in collected] == [
+        ("tests.module", "module 1"), (__name__, "global")
+    ]
+    assert collected[0].lineno == line
+    assert collected[0].funcName == "test_records_are_attributed_to_the_caller"
+
+
+def test_logger_set_level_refreshes_the_threshold(collected):
+    module_log = get_logger("tests.module")
+    logging.getLogger().setLevel(logging.WARNING)
+    assert not module_log.isEnabledFor(logging.INFO)
+    module_log.info("hidden")
+    logging.getLogger().setLevel(logging.DEBUG)
+    module_log.debug("shown")
+    assert [record.getMessage() for record in collected] == ["shown"]
+
+
+def test_logging_disable_refreshes_the_threshold(collected):
+    module_log = get_logger("tests.module")
+    logging.disable(logging.INFO)
+    assert logger_module._min_level == logging.INFO + 1
+    module_log.info("hidden")
+    module_log.warning("shown")
+    logging.disable(logging.NOTSET)
+    module_log.info("shown again")
+    assert [record.getMessage() for record in collected] == ["shown", "shown again"]
+
+
+def test_per_logger_levels_are_respected(collected):
+    set_log_level(logging.WARNING, "tests.quiet")
+    # 其他 logger 仍为 DEBUG，门限不变，由各 logger 自己的级别过滤
+    assert logger_module._min_level == logging.DEBUG
+    get_logger("tests.quiet").info("hidden")
+    get_logger("tests.loud").info("shown")
+    assert [record.name for record in collected] == ["tests.loud"]
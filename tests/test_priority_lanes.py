@@ -0,0 +1,154 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""优先级通道的调度顺序、加权份额与延迟统计"""
+import asyncio
+
+import pytest
+
+from core.event_bus import DispatchMode
+from core.priority_lanes import EventPriority, PriorityLanes, to_priority
+
+from helpers import publish, run
+
+
+def test_waiting_interactive_events_run_before_background_ones():
+    async def test(bus):
+        bus.configure_priority_lanes(1)
+        bus.set_dispatch_mode("work", DispatchMode.CONCURRENT)
+        order = []
+        release = asyncio.Event()
+
+        async def blocker(event):
+            await release.wait()
+
+        async def worker(event):
+            order.append(event.data)
+
+        bus.subscribe("block", blocker)
+        bus.subscribe("work", worker)
+        blocking = asyncio.ensure_future(publish(bus, "block"))
+        await asyncio.sleep(0)
+        pending = [
+            asyncio.ensure_future(publish(bus, "work", "background", priority=EventPriority.BACKGROUND)),
+            asyncio.ensure_future(publish(bus, "work", "normal")),
+            asyncio.ensure_future(publish(bus, "work", "interactive", priority=EventPriority.INTERACTIVE)),
+        ]
+        await asyncio.sleep(0.01)
+        release.set()
+        await asyncio.gather(blocking, *pending)
+        return order
+
+    assert run(test) == ["interactive", "normal", "background"]
+
+
+def test_default_priority_of_a_topic_is_used():
+    async def test(bus):
+        bus.configure_priority_lanes(4)
+        bus.set_priority("danmaku", "interactive")
+        seen = []
+        bus.subscribe("danmaku", lambda event: seen.append(event.priority), inline=True)
+        await publish(bus, "danmaku")
+        await publish(bus, "danmaku", priority=EventPriority.BACKGROUND)
+        return seen, bus.get_lane_stats()["lanes"]
+
+    seen, lanes = run(test)
+    assert seen == [EventPriority.INTERACTIVE, EventPriority.BACKGROUND]
+    assert lanes["interactive"]["events"] == 1
+    assert lanes["background"]["events"] == 1
+
+
+def test_handler_publishing_inside_its_slot_does_not_deadlock():
+    async def test(bus):
+        bus.configure_priority_lanes(1)
+        received = []
+
+        async def parent(event):
+            # 名额只有一个且被自己占用，子事件沿用这个名额
+            await publish(bus, "child")
+
+        bus.subscribe("parent", parent)
+        bus.subscribe("child", lambda event: received.append("child"), inline=True)
+        await asyncio.wait_for(publish(bus, "parent"), timeout=1)
+        return received
+
+    assert run(test) == ["child"]
+
+
+def test_weighted_round_robin_shares_slots_by_weight():
+    lanes = PriorityLanes(1, weights={"interactive": 3, "normal": 1, "background": 1})
+    for priority in EventPriority:
+        lanes._waiters[priority].extend([None] * 100)
+    picks = [lanes._next_lane() for _ in range(50)]
+    assert picks.count(EventPriority.INTERACTIVE) == 30
+    assert picks.count(EventPriority.NORMAL) == 10
+    assert picks.count(EventPriority.BACKGROUND) == 10
+
+
+def test_cancelled_waiter_gives_its_slot_to_the_next_one():
+    async def test():
+        lanes = PriorityLanes(1)
+        entered = []
+
+        async def hold(name, priority, release):
+            async with lanes.slot(priority):
+                entered.append(name)
+                await release.wait()
+
+        first_release, second_release = asyncio.Event(), asyncio.Event()
+        first = asyncio.ensure_future(hold("first", EventPriority.NORMAL, first_release))
+        await asyncio.sleep(0)
+        cancelled = asyncio.ensure_future(hold("cancelled", EventPriority.INTERACTIVE, asyncio.Event()))
+        second = asyncio.ensure_future(hold("second", EventPriority.BACKGROUND, second_release))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        first_release.set()
+        second_release.set()
+        await asyncio.gather(first, second)
+        return entered, lanes.inflight
+
+    assert asyncio.run(test()) == (["first", "second"], 0)
+
+
+def test_lane_stats_are_only_kept_once_configured():
+    async def test(bus):
+        bus.subscribe("plain", lambda event: None)
+        await publish(bus, "plain")
+        disabled = bus.get_lane_stats()
+        # max_inflight 为 None：不限制并发，只统计延迟
+        bus.configure_priority_lanes(None)
+        await publish(bus, "plain")
+        return disabled, bus.get_lane_stats()
+
+    disabled, enabled = run(test)
+    assert disabled == {}
+    assert enabled["max_inflight"] is None
+    assert enabled["lanes"]["normal"]["events"] == 1
+
+
+def test_latency_budget_is_counted():
+    lanes = PriorityLanes(budgets={"interactive": 0.01})
+    lanes.record(EventPriority.INTERACTIVE, 0.0, 0.005)
+    lanes.record(EventPriority.INTERACTIVE, 0.002, 0.02)
+    stats = lanes.stats()["lanes"]["interactive"]
+    assert (stats["events"], stats["over_budget"], stats["wait_max"]) == (2, 1, 0.002)
+
+
+def test_invalid_lane_settings_are_rejected():
+    with pytest.raises(ValueError):
+        PriorityLanes(0)
+    with pytest.raises(ValueError):
+        PriorityLanes(1, weights={"normal": 0})
+    assert to_priority("Background") is EventPriority.BACKGROUND
+    assert to_priority(0) is EventPriority.INTERACTIVE
@@ -0,0 +1,173 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""跨进程传输：共享内存的确认与删除，以及与工作进程之间的往返"""
+import asyncio
+import json
+import multiprocessing
+import threading
+from multiprocessing.shared_memory import SharedMemory
+
+import pytest
+
+from core import process_transport
+from core.event_bus import Event
+from core.process_transport import ProcessTransport, _Channel, _decode, _encode
+
+from helpers import run
+
+BLOB = bytes(range(256)) * 64
+
+
+def _exists(name: str) -> bool:
+    try:
+        shm = SharedMemory(name=name)
+    except FileNotFoundError:
+        return False
+    shm.close()
+    return True
+
+
+class _Probe(_Channel):
+    def on_message(self, message):
+        pass
+
+
+# === 共享内存 ===
+
+def test_large_binary_data_travels_through_shared_memory():
+    data, blocks = _encode(("publish", {"blob": BLOB, "small": b"x"}), 1024)
+    assert len(blocks) == 1 and _exists(blocks[0])
+    # 管道中只有共享内存的名称
+    assert len(data) < len(BLOB)
+    message, opened = _decode(data)
+    assert message == ("publish", {"blob": BLOB, "small": b"x"})
+    assert opened == blocks
+    # 接收方读取后删除共享内存
+    assert not _exists(blocks[0])
+
+
+def test_failed_encoding_removes_created_blocks(monkeypatch):
+    created = []
+
+    class RecordingSharedMemory(SharedMemory):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            if kwargs.get("create"):
+                created.append(self.name)
+
+    monkeypatch.setattr(process_transport, "SharedMemory", RecordingSharedMemory)
+    # 锁不能被 pickle，此时 blob 已经复制到共享内存
+    with pytest.raises(TypeError):
+        _encode(("publish", {"blob": BLOB, "lock": threading.Lock()}), 1024)
+    assert len(created) == 1
+    assert not _exists(created[0])
+
+
+def test_acknowledged_blocks_are_forgotten_and_the_rest_released():
+    async def test(bus):
+        near, far = multiprocessing.Pipe()
+        channel = _Probe("peer", near, asyncio.get_running_loop(), bus, shm_threshold=1024)
+        channel.send(("deliver", {"blob": BLOB}))
+        channel.send(("deliver", {"blob": BLOB}))
+        sent = set(channel._unacked)
+
+        # 对方打开了第一条消息中的共享内存并确认
+        _, acked = _decode(far.recv_bytes())
+        channel._dispatch(("ack", acked))
+        remaining = set(channel._unacked)
+        # 对方退出，没有打开第二条消息
+        channel.release_blocks()
+        near.close()
+        far.close()
+        return sent, acked, remaining, channel._unacked
+
+    sent, acked, remaining, after = run(test)
+    assert len(sent) == 2
+    assert remaining == sent - set(acked)
+    assert after == set()
+    assert not any(_exists(name) for name in sent)
+
+
+# === 工作进程 ===
+
+def _write_config(tmp_path, rate_limits=None):
+    config = {
+        "enabled_modules": [],
+        "dummy02": {"suffix": " [D02处理]", "enable_logging": False},
+        "event_bus": {"rate_limits": rate_limits or {}},
+    }
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps(config, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+def test_worker_round_trip_with_shared_memory(tmp_path):
+    config = _write_config(tmp_path)
+
+    async def test(bus):
+        transport = ProcessTransport(bus, config, shm_threshold=1024)
+        responses = []
+        bus.subscribe("dummy02.response", lambda event: responses.append(event), inline=True)
+        try:
+            states = await transport.start_worker("w1", ["agent.dummy02"])
+            await asyncio.sleep(0.2)
+            result = await bus.request("dummy02.transform", {"text": "hi", "blob": BLOB}, "test", timeout=10)
+            for _ in range(50):
+                if responses:
+                    break
+                await asyncio.sleep(0.05)
+            # 结果和工作进程发布的事件同样经过共享内存传回
+            handle = transport.workers["w1"]
+            await asyncio.sleep(0.1)
+            unacked = set(handle._unacked)
+        finally:
+            await transport.stop()
+        return states, result, responses, unacked
+
+    states, result, responses, unacked = run(test)
+    # 订阅在初始化时完成，状态只用来确认模块已在工作进程中加载
+    assert "agent.dummy02" in states
+    assert result["transformed"] == "hi [D02处理]"
+    assert result["original"]["blob"] == BLOB
+    assert len(responses) == 1
+    assert responses[0].origin == "w1"
+    assert responses[0].data["original"]["blob"] == BLOB
+    # 工作进程确认了它打开的每一段共享内存
+    assert unacked == set()
+
+
+def test_worker_applies_rate_limits_before_upload(tmp_path):
+    limits = {"topics": {"dummy02.response": {"rate": 0.01, "burst": 1, "policy": "drop"}}}
+    config = _write_config(tmp_path, limits)
+
+    async def test(bus):
+        bus.configure_rate_limits(limits)
+        transport = ProcessTransport(bus, config)
+        responses = []
+        bus.subscribe("dummy02.response", lambda event: responses.append(event.data["original"]), inline=True)
+        try:
+            await transport.start_worker("w1", ["agent.dummy02"])
+            await asyncio.sleep(0.2)
+            for index in range(3):
+                await bus.publish(Event(name="dummy02.transform", data={"text": str(index)}, source="test"))
+            await asyncio.sleep(0.5)
+        finally:
+            await transport.stop()
+        return responses, bus.get_rate_limit_stats()["topics"]["dummy02.response"]
+
+    responses, main_stats = run(test)
+    assert responses == [{"text": "0"}]
+    # 多余的事件在工作进程中就被丢弃，没有上传到主进程
+    assert (main_stats["allowed"], main_stats["dropped"]) == (1, 0)
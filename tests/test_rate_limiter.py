@@ -0,0 +1,129 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""发布限流的三种策略、DELAY 预支上限、通配模式与来源限制"""
+import pytest
+
+from core.rate_limiter import RateLimiter, RateLimitExceeded, RateLimitPolicy, TokenBucket
+
+from helpers import publish, run
+
+
+# === 令牌桶与限制集合 ===
+
+def test_drop_policy_drops_once_burst_is_spent():
+    limiter = RateLimiter()
+    limiter.set_limit("topic", "chat", rate=0.001, burst=2, policy="drop")
+    assert [limiter.check("chat", "m") for _ in range(3)] == [0.0, 0.0, None]
+    assert limiter.stats()['topics']['chat']['dropped'] == 1
+
+
+def test_reject_policy_raises_with_scope():
+    limiter = RateLimiter()
+    limiter.set_limit("source", "spammer", rate=0.001, burst=1, policy="reject")
+    limiter.check("any", "spammer")
+    with pytest.raises(RateLimitExceeded) as raised:
+        limiter.check("any", "spammer")
+    assert (raised.value.scope, raised.value.key) == ("source", "spammer")
+    # 其他来源不受影响
+    assert limiter.check("any", "other") == 0.0
+
+
+def test_delay_policy_queues_publishers_up_to_burst():
+    limiter = RateLimiter()
+    limiter.set_limit("topic", "tts", rate=10, burst=2, policy="delay")
+    waits = [limiter.check("tts", "m") for _ in range(5)]
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2] == pytest.approx(0.1, abs=0.01)
+    assert waits[3] == pytest.approx(0.2, abs=0.01)
+    # 预支已达 burst 个令牌，之后的事件被丢弃，等待时间不会无限增长
+    assert waits[4] is None
+    stats = limiter.stats()['topics']['tts']
+    assert (stats['delayed'], stats['dropped']) == (2, 1)
+
+
+def test_drop_does_not_consume_other_buckets():
+    limiter = RateLimiter()
+    limiter.set_limit("topic", "a.*", rate=0.001, burst=1, policy="drop")
+    limiter.set_limit("source", "m", rate=0.001, burst=5, policy="delay")
+    limiter.check("a.x", "m")
+    assert limiter.check("a.y", "m") is None
+    assert limiter.stats()['sources']['m']['allowed'] == 1
+
+
+def test_pattern_limits_follow_configuration_changes():
+    limiter = RateLimiter()
+    limiter.configure({'topics': {"a.*": {'rate': 0.001, 'burst': 1, 'policy': "drop"}}})
+    limiter.check("a.x", "m")
+    assert limiter.check("a.x", "m") is None
+    limiter.configure(None)
+    assert not limiter.active
+    assert limiter.check("a.x", "m") == 0.0
+
+
+def test_bucket_refills_over_time():
+    bucket = TokenBucket(rate=10, burst=1, policy=RateLimitPolicy.DROP)
+    bucket.take()
+    bucket.refill(bucket.updated + 0.05)
+    assert bucket.exhausted()
+    bucket.refill(bucket.updated + 0.05)
+    assert not bucket.exhausted()
+
+
+def test_invalid_rate_is_rejected():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+    with pytest.raises(ValueError):
+        RateLimiter().set_limit("everything", "x", rate=1)
+
+
+# === 事件总线 ===
+
+def test_bus_applies_policies_on_publish():
+    async def test(bus):
+        received = []
+        bus.subscribe("limited", lambda event: received.append(event.data))
+        bus.set_rate_limit("topic", "limited", rate=0.001, burst=1, policy="drop")
+        for index in range(3):
+            await publish(bus, "limited", index)
+        bus.set_rate_limit("topic", "limited", rate=0.001, burst=1, policy="reject")
+        await publish(bus, "limited", "accepted")
+        with pytest.raises(RateLimitExceeded):
+            await publish(bus, "limited", "rejected")
+        return received
+
+    assert run(test) == [0, "accepted"]
+
+
+def test_bus_delays_publishers():
+    async def test(bus):
+        loop = bus._loop
+        bus.subscribe("paced", lambda event: None)
+        bus.set_rate_limit("topic", "paced", rate=50, burst=1, policy="delay")
+        started = loop.time()
+        for _ in range(3):
+            await publish(bus, "paced")
+        return loop.time() - started
+
+    assert run(test) >= 0.035
+
+
+def test_invalid_configuration_keeps_previous_limits():
+    async def test(bus):
+        bus.set_rate_limit("topic", "kept", rate=1)
+        bus.configure_rate_limits({'topics': {"broken": {'burst': 1}}})
+        return bus.get_rate_limit_stats()
+
+    # 总线只记录错误而不抛出，原有的限制保持不变
+    assert list(run(test)['topics']) == ["kept"]
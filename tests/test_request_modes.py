@@ -0,0 +1,169 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""request() 的各种等待方式"""
+import asyncio
+
+import pytest
+
+from core.event_bus import RequestMode, _ResultList
+
+from helpers import run
+
+
+def test_request_ordered_returns_first_result_in_subscription_order():
+    async def test(bus):
+        finished = []
+
+        async def forwarder(event):
+            return None
+
+        async def slow(event):
+            await asyncio.sleep(0.03)
+            finished.append("slow")
+            return "slow"
+
+        async def fast(event):
+            finished.append("fast")
+            return "fast"
+
+        bus.subscribe("ask", forwarder)
+        bus.subscribe("ask", slow)
+        bus.subscribe("ask", fast)
+        result = await bus.request("ask", None, "test")
+        return result, finished
+
+    result, finished = run(test)
+    # 默认方式不取消任何订阅者，结果按订阅顺序选择，而不是谁先完成
+    assert result == "slow"
+    assert finished == ["slow", "fast"]
+
+
+def test_request_ordered_without_results_returns_no_response_marker():
+    async def test(bus):
+        bus.subscribe("ask", lambda event: None, inline=True)
+        return await bus.request("ask", None, "test")
+
+    assert run(test) == {"no_response": True}
+
+
+def test_request_without_subscribers_returns_none():
+    async def test(bus):
+        return await bus.request("nobody", None, "test")
+
+    assert run(test) is None
+
+
+def test_request_first_returns_fastest_and_cancels_the_rest():
+    async def test(bus):
+        cancelled = []
+
+        async def slow(event):
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.append("slow")
+                raise
+            return "slow"
+
+        async def fast(event):
+            await asyncio.sleep(0.01)
+            return "fast"
+
+        bus.subscribe("ask", slow)
+        bus.subscribe("ask", fast)
+        result = await bus.request("ask", None, "test", mode="first")
+        await asyncio.sleep(0)
+        return result, cancelled
+
+    assert run(test) == ("fast", ["slow"])
+
+
+def test_request_all_collects_every_result():
+    async def test(bus):
+        bus.subscribe("ask", lambda event: 1, inline=True)
+        bus.subscribe("ask", lambda event: None, inline=True)
+        bus.subscribe("ask", lambda event: 2, inline=True)
+        return await bus.request("ask", None, "test", mode=RequestMode.ALL)
+
+    assert sorted(run(test)) == [1, 2]
+
+
+def test_request_quorum_returns_once_enough_results_arrive():
+    async def test(bus):
+        async def answer(value, delay):
+            async def handler(event):
+                await asyncio.sleep(delay)
+                return value
+            return handler
+
+        bus.subscribe("ask", await answer("a", 0.01))
+        bus.subscribe("ask", await answer("b", 0.02))
+        bus.subscribe("ask", await answer("c", 1))
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        result = await bus.request("ask", None, "test", mode="quorum", quorum=2)
+        return result, loop.time() - started
+
+    result, elapsed = run(test)
+    assert sorted(result) == ["a", "b"]
+    assert elapsed < 0.5
+
+
+def test_request_quorum_not_reached_returns_none():
+    async def test(bus):
+        bus.subscribe("ask", lambda event: 1, inline=True)
+        return await bus.request("ask", None, "test", mode="quorum", quorum=2)
+
+    assert run(test) is None
+
+
+def test_request_timeout():
+    async def test(bus):
+        async def slow(event):
+            await asyncio.sleep(1)
+            return "late"
+
+        bus.subscribe("ask", lambda event: "early", inline=True)
+        bus.subscribe("ask", slow)
+        ordered = await bus.request("ask", None, "test", timeout=0.05)
+        partial = await bus.request("ask", None, "test", timeout=0.05, mode="all")
+        return ordered, partial
+
+    ordered, partial = run(test)
+    assert ordered is None
+    assert partial == ["early"]
+
+
+def test_result_list_is_folded_into_the_request():
+    # 跨进程转发的订阅者把远端的多个结果作为一个 _ResultList 返回
+    async def test(bus):
+        bus.subscribe("ask", lambda event: _ResultList(["remote 1", "remote 2"]), inline=True)
+        bus.subscribe("ask", lambda event: "local", inline=True)
+        everything = await bus.request("ask", None, "test", mode="all")
+        ordered = await bus.request("ask", None, "test")
+        return everything, ordered
+
+    everything, ordered = run(test)
+    assert everything == ["remote 1", "remote 2", "local"]
+    assert ordered == "remote 1"
+
+
+def test_invalid_request_mode_is_rejected():
+    async def test(bus):
+        bus.subscribe("ask", lambda event: 1, inline=True)
+        return await bus.request("ask", None, "test", mode="fastest")
+
+    with pytest.raises(ValueError):
+        run(test)
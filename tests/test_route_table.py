@@ -0,0 +1,140 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""路由表的路径参数匹配与冲突检查，以及 APIServer 对方法的检查（405、Allow、HEAD、OPTIONS）"""
+import asyncio
+
+import pytest
+
+from core.api_server import APIServer
+from core.route_table import RouteTable, route_params
+
+
+def _table(*paths):
+    return RouteTable({path: {'path': path, 'params': route_params(path)} for path in paths})
+
+
+# === 路由表 ===
+
+def test_params_are_extracted_by_name():
+    table = _table("/agent/{module}/session/{id}")
+    route, params = table.match("/agent/dummy01/session/42")
+    assert route['path'] == "/agent/{module}/session/{id}"
+    assert params == {'module': "dummy01", 'id': "42"}
+    assert table.match("/agent/dummy01/session") is None
+    assert table.match("/agent//session/42") is None
+
+
+def test_static_segments_win_over_params_with_backtracking():
+    table = _table("/a/{x}/c", "/a/b/{y}", "/a/b")
+    assert table.match("/a/b")[0]['path'] == "/a/b"
+    assert table.match("/a/b/z") == (table.routes["/a/b/{y}"], {'y': "z"})
+    # 固定分段 b 之后没有匹配的 c 路由时回退到参数分支
+    assert table.match("/a/b/c") == (table.routes["/a/b/{y}"], {'y': "c"})
+    assert table.match("/a/q/c") == (table.routes["/a/{x}/c"], {'x': "q"})
+
+
+def test_conflicting_param_routes_are_rejected():
+    table = _table("/a/{x}")
+    with pytest.raises(ValueError):
+        table.with_route("/a/{y}", {'path': "/a/{y}", 'params': ["y"]})
+    # 失败的修改不影响原来的路由表
+    assert list(table.routes) == ["/a/{x}"]
+
+
+@pytest.mark.parametrize("path", ["/a/{x", "/a/{1x}", "/a/{x}/{x}", "/a/pre{x}"])
+def test_invalid_params_are_rejected(path):
+    with pytest.raises(ValueError):
+        route_params(path)
+
+
+def test_without_route_returns_a_new_table():
+    table = _table("/a/{x}", "/b")
+    smaller = table.without_route("/a/{x}")
+    assert smaller.match("/a/1") is None
+    assert table.match("/a/1") is not None
+
+
+# === APIServer 的方法检查 ===
+
+def _serve(test):
+    async def main():
+        server = APIServer(port=0)
+        try:
+            return await test(server, server.app.test_client())
+        finally:
+            await server.stop()
+    return asyncio.run(main())
+
+
+def test_wrong_method_gets_405_with_allow_header():
+    async def test(server, client):
+        async def create(request):
+            return {'created': True}
+
+        await server.add_route("/items", ["POST"], create)
+        response = await client.get("/items")
+        return response.status_code, response.headers['Allow'], await response.get_json()
+
+    status, allow, body = _serve(test)
+    assert status == 405
+    assert allow == "OPTIONS, POST"
+    assert body == {'error': "method not allowed", 'path': "/items", 'method': "GET"}
+
+
+def test_get_routes_answer_head_and_options():
+    async def test(server, client):
+        async def item(request, id):
+            return {'id': id}
+
+        await server.add_route("/items/{id}", ["get"], item)
+        get = await client.get("/items/7")
+        head = await client.head("/items/7")
+        options = await client.options("/items/7")
+        return await get.get_json(), head.status_code, options.status_code, options.headers['Allow']
+
+    body, head_status, options_status, allow = _serve(test)
+    assert body == {'id': "7"}
+    # HEAD 由 GET 的处理函数处理，响应体由 ASGI 服务器去掉
+    assert head_status == 200
+    assert options_status == 204
+    assert allow == "GET, HEAD, OPTIONS"
+
+
+def test_conflicting_route_is_rejected_and_unknown_path_is_404():
+    async def test(server, client):
+        async def handler(request, **params):
+            return params
+
+        await server.add_route("/a/{x}", ["GET"], handler)
+        with pytest.raises(ValueError):
+            await server.add_route("/a/{y}", ["GET"], handler)
+        missing = await client.get("/nothing")
+        kept = await client.get("/a/1")
+        return missing.status_code, await kept.get_json()
+
+    assert _serve(test) == (404, {'x': "1"})
+
+
+def test_removed_route_is_no_longer_served():
+    async def test(server, client):
+        async def handler(request):
+            return "ok"
+
+        await server.add_route("/tmp", ["GET"], handler)
+        assert (await client.get("/tmp")).status_code == 200
+        result = await server.remove_route("/tmp")
+        return result['existed'], (await client.get("/tmp")).status_code
+
+    assert _serve(test) == (True, 404)
@@ -0,0 +1,106 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""状态事件：最新值、补发与合并"""
+import asyncio
+
+from helpers import new_bus, publish, run
+
+
+def test_state_topic_replays_current_value_to_new_subscribers():
+    async def test(bus):
+        bus.declare_state("viewer.count")
+        await publish(bus, "viewer.count", 10)
+        await publish(bus, "viewer.count", 12)
+        received = []
+        bus.subscribe("viewer.count", lambda event: received.append(event.data))
+        bus.subscribe("viewer.*", lambda event: received.append(("wildcard", event.data)))
+        await asyncio.sleep(0.02)
+        return bus.get_state("viewer.count"), received
+
+    state, received = run(test)
+    assert state == 12
+    assert len(received) == 2
+    assert 12 in received and ("wildcard", 12) in received
+
+
+def test_cleared_state_is_not_replayed():
+    async def test(bus):
+        bus.declare_state("mood")
+        await publish(bus, "mood", "happy")
+        bus.clear_state("mood")
+        received = []
+        bus.subscribe("mood", lambda event: received.append(event.data))
+        await asyncio.sleep(0.02)
+        return bus.get_state("mood", "unknown"), received
+
+    assert run(test) == ("unknown", [])
+
+
+def test_state_subscriber_only_sees_latest_value_when_slow():
+    async def test(bus):
+        bus.declare_state("viewer.count")
+        received = []
+
+        async def slow(event):
+            received.append(event.data)
+            await asyncio.sleep(0.02)
+
+        bus.subscribe("viewer.count", slow)
+        for value in range(10):
+            await publish(bus, "viewer.count", value)
+        await asyncio.sleep(0.1)
+        return received
+
+    received = run(test)
+    # 处理期间到达的更新被合并，只收到最新值
+    assert received[-1] == 9
+    assert len(received) <= 2
+
+
+def test_subscribe_without_a_loop_skips_state_replay():
+    bus = new_bus()
+
+    async def setup():
+        bus.declare_state("mood")
+        await publish(bus, "mood", "happy")
+
+    asyncio.run(setup())
+    received = []
+    # 事件循环已经关闭，订阅不应抛出异常
+    bus.subscribe("mood", lambda event: received.append(event.data))
+    assert received == []
+    assert bus.get_state("mood") == "happy"
+    bus.shutdown()
+
+
+def test_declaring_state_converts_existing_subscribers():
+    async def test(bus):
+        received = []
+
+        async def slow(event):
+            received.append(event.data)
+            await asyncio.sleep(0.02)
+
+        bus.subscribe("mood", slow)
+        bus.declare_state("mood")
+        for value in ["calm", "happy", "excited"]:
+            await publish(bus, "mood", value)
+        await asyncio.sleep(0.05)
+        return received, bus.get_queue_stats()["mood"][0]["maxsize"]
+
+    received, maxsize = run(test)
+    assert maxsize == 1
+    assert received[-1] == "excited"
+    assert "happy" not in received
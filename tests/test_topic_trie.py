@@ -0,0 +1,101 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""通配订阅与 TopicTrie 的匹配规则"""
+import pytest
+
+from core.topic_trie import TopicTrie, is_pattern
+
+from helpers import publish, run
+
+
+# === 通配订阅 ===
+
+@pytest.mark.parametrize("pattern, matched", [
+    ("chat.message", ["chat.message"]),
+    ("chat.*", ["chat.message", "chat.gift"]),
+    ("*.message", ["chat.message", "danmaku.message"]),
+    ("chat.#", ["chat", "chat.message", "chat.gift", "chat.gift.big"]),
+    ("#", ["chat", "chat.message", "chat.gift", "chat.gift.big", "danmaku.message"]),
+    ("#.big", ["chat.gift.big"]),
+])
+def test_wildcard_subscriptions(pattern, matched):
+    names = ["chat", "chat.message", "chat.gift", "chat.gift.big", "danmaku.message"]
+
+    async def test(bus):
+        received = []
+        bus.subscribe(pattern, lambda event: received.append(event.name), inline=True)
+        for name in names:
+            await publish(bus, name)
+        return received
+
+    assert run(test) == matched
+
+
+def test_wildcard_and_exact_subscribers_run_in_subscription_order():
+    async def test(bus):
+        received = []
+        bus.subscribe("chat.#", lambda event: received.append("wildcard 1"), inline=True)
+        bus.subscribe("chat.message", lambda event: received.append("exact"), inline=True)
+        bus.subscribe("*.message", lambda event: received.append("wildcard 2"), inline=True)
+        await publish(bus, "chat.message")
+        return received
+
+    assert run(test) == ["wildcard 1", "exact", "wildcard 2"]
+
+
+def test_unsubscribe_wildcard():
+    async def test(bus):
+        received = []
+
+        def callback(event):
+            received.append(event.name)
+
+        bus.subscribe("chat.*", callback, inline=True)
+        await publish(bus, "chat.message")
+        bus.unsubscribe("chat.*", callback)
+        await publish(bus, "chat.message")
+        return received
+
+    assert run(test) == ["chat.message"]
+
+
+# === TopicTrie ===
+
+def test_trie_match_returns_each_pattern_once():
+    trie = TopicTrie()
+    for pattern in ["chat.#", "#", "chat.*", "#.message"]:
+        trie.add(pattern)
+    # "#" 可以用多种方式吞掉分段，同一模式仍然只返回一次
+    assert sorted(trie.match("chat.message")) == ["#", "#.message", "chat.#", "chat.*"]
+
+
+def test_trie_add_is_idempotent_and_remove_prunes_nodes():
+    trie = TopicTrie()
+    trie.add("a.*.c")
+    trie.add("a.*.c")
+    assert len(trie) == 1
+    assert trie.remove("a.*") is False
+    assert trie.remove("a.*.c") is True
+    assert len(trie) == 0
+    assert trie.match("a.b.c") == []
+    assert trie._root.children == {}
+
+
+def test_is_pattern():
+    assert is_pattern("chat.*")
+    assert is_pattern("#")
+    assert not is_pattern("chat.message")
+    # 只有整个分段是通配符时才算模式
+    assert not is_pattern("chat.a*b")
@@ -0,0 +1,124 @@
+# SwarmCloneBackend
+# Copyright (c) 2026 SwarmClone <github.com/SwarmClone> and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""trace 在发布链路上的传递与追踪文件"""
+import json
+
+from core.event_bus import Event
+from core.tracing import activate, current_span, deactivate, format_id, log_context, spans_enabled
+
+from helpers import publish, run
+
+
+def test_events_published_by_a_handler_join_its_trace(tmp_path):
+    async def test(bus):
+        bus.enable_tracing(tmp_path / "trace.json")
+        seen = {}
+
+        async def on_question(event):
+            seen["question"] = event
+            await publish(bus, "answer")
+
+        bus.subscribe("question", on_question)
+        bus.subscribe("answer", lambda event: seen.setdefault("answer", event))
+        await publish(bus, "question")
+        return seen
+
+    seen = run(test)
+    question, answer = seen["question"], seen["answer"]
+    assert question.trace_id is not None and question.parent_span_id is None
+    assert answer.trace_id == question.trace_id
+    assert answer.parent_span_id == question.span_id
+    assert answer.span_id != question.span_id
+
+
+def test_trace_reaches_threadpool_handlers(tmp_path):
+    async def test(bus):
+        bus.enable_tracing(tmp_path / "trace.json")
+        spans = []
+
+        def blocking(event):
+            # 在线程池中执行，仍然能看到当前事件
+            spans.append(current_span())
+
+        bus.subscribe("work", blocking, inline=False)
+        event = Event(name="work", data=None, source="test")
+        await bus.publish(event)
+        return spans, (event.trace_id, event.span_id)
+
+    spans, expected = run(test)
+    assert spans == [expected]
+
+
+def test_no_spans_without_tracing_or_log_context():
+    async def test(bus):
+        spans = []
+
+        def handler(event):
+            spans.append((event.trace_id, event.span_id, current_span()))
+
+        bus.subscribe("topic", handler, inline=True)
+        await publish(bus, "topic")
+        return spans
+
+    assert not spans_enabled()
+    assert run(test) == [(None, None, None)]
+
+
+def test_received_trace_is_kept(tmp_path):
+    async def test(bus):
+        bus.enable_tracing(tmp_path / "trace.json")
+        received = []
+        bus.subscribe("topic", lambda event: received.append((event.trace_id, event.parent_span_id)), inline=True)
+        # 例如从其他进程收到的事件，已经带有 trace
+        await publish(bus, "topic", trace_id=7, span_id=8, parent_span_id=9)
+        return received
+
+    assert run(test) == [(7, 9)]
+
+
+def test_trace_file_is_complete_after_disable(tmp_path):
+    path = tmp_path / "trace.json"
+
+    async def test(bus):
+        bus.enable_tracing(path)
+        tracer = bus._tracer
+        bus.subscribe("topic", lambda event: None, inline=True)
+        for _ in range(3):
+            await publish(bus, "topic")
+        bus.disable_tracing()
+        return tracer
+
+    tracer = run(test)
+    assert tracer.join(timeout=5)
+    assert not spans_enabled()
+    records = json.loads(path.read_text(encoding="utf-8"))
+    handled = [record for record in records if record["ph"] == "X"]
+    assert len(handled) == 3
+    assert all(record["name"] == "topic" and record["args"]["outcome"] == "ok" for record in handled)
+    # 每次处理都有一对从发布者指向处理者的流向事件
+    assert sum(record["ph"] == "s" for record in records) == 3
+
+
+def test_log_context_describes_the_current_event():
+    event = Event(name="chat.message", data=None, source="chat", trace_id=1, span_id=2)
+    assert log_context() is None
+    token = activate(event)
+    try:
+        assert log_context() == {
+            "event": "chat.message", "source": "chat",
+            "trace_id": format_id(1), "span_id": format_id(2),
+        }
+    finally:
+        deactivate(token)